@@ -5,6 +5,22 @@ import urllib.request
 import time
 from datetime import datetime
 
+# item_basic fields used to build a listing
+SHOPEE_ITEM_FIELDS = (
+    "itemid", "shopid", "name", "image", "images", "price", "price_min",
+    "shop_name", "sold", "historical_sold", "shop_location", "item_rating"
+)
+
+
+def project_shopee_items(payload, max_results):
+    """Decode a Shopee search response and keep only the item_basic fields we use"""
+    data = json.loads(payload)
+    projected = []
+    for item in (data.get("items") or [])[:max_results]:
+        item_basic = item.get("item_basic") or {}
+        projected.append({key: item_basic.get(key) for key in SHOPEE_ITEM_FIELDS})
+    return projected
+
 class handler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
         self.send_response(200)
@@ -88,37 +104,35 @@ class handler(BaseHTTPRequestHandler):
             req = urllib.request.Request(url, headers=headers)
 
             with urllib.request.urlopen(req, timeout=30) as response:
-                data = json.loads(response.read().decode('utf-8'))
-                items = data.get("items", [])
-
-                for item in items[:max_results]:
-                    item_info = item.get("item_basic", {})
+                items = project_shopee_items(response.read(), max_results)
+                scraped_at = datetime.now().isoformat()
 
-                    item_id = item_info.get("itemid", "")
-                    shop_id = item_info.get("shopid", "")
-                    name = item_info.get("name", "Unknown Product")
+                for item_info in items:
+                    item_id = item_info["itemid"] or ""
+                    shop_id = item_info["shopid"] or ""
+                    name = item_info["name"] or "Unknown Product"
 
                     # Generate product URL
                     clean_name = name[:50].replace(" ", "-").replace("/", "-")
                     product_url = f"https://shopee.tw/{urllib.parse.quote(clean_name)}-i.{shop_id}.{item_id}"
 
                     # Get image URL
-                    image = item_info.get("image", "")
+                    image = item_info["image"]
                     if image:
                         thumbnail_url = f"https://cf.shopee.tw/file/{image}"
                     else:
-                        images = item_info.get("images", [])
+                        images = item_info["images"]
                         thumbnail_url = f"https://cf.shopee.tw/file/{images[0]}" if images else ""
 
                     # Get price (Shopee returns in cents)
-                    price = item_info.get("price", 0) / 100000 if item_info.get("price") else 0
-                    price_min = item_info.get("price_min", 0) / 100000 if item_info.get("price_min") else price
+                    price = item_info["price"] / 100000 if item_info["price"] else 0
+                    price_min = item_info["price_min"] / 100000 if item_info["price_min"] else price
 
                     # Get other info
-                    seller_name = item_info.get("shop_name", "") or f"Shop_{shop_id}"
-                    sold = item_info.get("sold", 0) or item_info.get("historical_sold", 0)
-                    location = item_info.get("shop_location", "") or "台灣"
-                    rating = item_info.get("item_rating", {}).get("rating_star")
+                    seller_name = item_info["shop_name"] or f"Shop_{shop_id}"
+                    sold = item_info["sold"] or item_info["historical_sold"] or 0
+                    location = item_info["shop_location"] or "台灣"
+                    rating = (item_info["item_rating"] or {}).get("rating_star")
 
                     listings.append({
                         "id": f"shopee_{shop_id}_{item_id}",
@@ -134,7 +148,7 @@ class handler(BaseHTTPRequestHandler):
                         "sales_count": sold,
                         "rating": rating,
                         "location": location,
-                        "scraped_at": datetime.now().isoformat()
+                        "scraped_at": scraped_at
                     })
 
         except Exception as e:
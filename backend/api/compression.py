@@ -0,0 +1,99 @@
+"""
+Response Compression
+回應壓縮 - 對接受 gzip 的用戶端壓縮回應內容，但不壓縮即時串流
+
+starlette 0.35 的 GZipMiddleware 連 text/event-stream 也壓縮：壓縮器會緩衝內容，
+SSE 事件要等緩衝滿或連線結束才送達瀏覽器。這裡依回應的 Content-Type 決定：
+排除的類型原樣送出；串流回應每個區塊都 flush，送出的內容不會卡在壓縮器裡。
+"""
+import zlib
+from typing import Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+DEFAULT_EXCLUDED_MEDIA_TYPES = ("text/event-stream",)
+
+
+class GZipMiddleware:
+    """
+    Gzip response bodies of at least minimum_size bytes, except excluded media types
+
+    Args:
+        app: ASGI app
+        minimum_size: Smaller single-part bodies are sent as-is
+        compresslevel: zlib level
+        exclude_media_types: Content types never compressed (live streams)
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        compresslevel: int = 6,
+        exclude_media_types: Sequence[str] = DEFAULT_EXCLUDED_MEDIA_TYPES
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.exclude_media_types = frozenset(media_type.lower() for media_type in exclude_media_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or "gzip" not in Headers(scope=scope).get("accept-encoding", ""):
+            await self.app(scope, receive, send)
+            return
+
+        start: Message = {}
+        passthrough = False
+        compressor = None
+
+        async def send_compressed(message: Message):
+            nonlocal start, passthrough, compressor
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+                passthrough = "content-encoding" in headers or media_type in self.exclude_media_types
+                if passthrough:
+                    await send(message)
+                else:
+                    # Held back until the first body part decides the encoding headers
+                    start = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    await send(start)
+                    await send(message)
+                    passthrough = True
+                    return
+
+                compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = "gzip"
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    if "content-length" in headers:
+                        del headers["Content-Length"]
+                else:
+                    body = compressor.compress(body) + compressor.flush()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+
+            # Streamed part: flush so every chunk reaches the client as soon as it is produced
+            data = compressor.compress(body)
+            data += compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,59 @@
+"""
+List Pagination
+清單分頁 - keyset cursor 與欄位投影
+
+清單 API 仍回傳 JSON 陣列；還有下一頁時，cursor 放在 X-Next-Cursor 標頭，
+帶 ?cursor=<值> 取得下一頁。?fields=id,platform 只回傳指定欄位。
+"""
+from typing import Dict, List, Optional, Type
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from services.storage import DocumentTable
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+async def fetch_page(
+    table: DocumentTable,
+    limit: int,
+    cursor: Optional[str],
+    **filters
+) -> tuple:
+    """(documents, next_cursor) for one page; 400 on a malformed cursor"""
+    try:
+        return await table.page(limit=limit, cursor=cursor, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def page_response(
+    docs: List[Dict],
+    next_cursor: Optional[str],
+    model: Type[BaseModel],
+    fields: Optional[str] = None
+) -> JSONResponse:
+    """
+    JSON array of documents shaped by the response model
+
+    Args:
+        fields: Comma-separated subset of the model's fields ("id" is always included)
+    """
+    if fields:
+        requested = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in model.model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"未知欄位: {', '.join(unknown)}")
+        if "id" not in requested:
+            requested.insert(0, "id")
+        content = [{name: doc.get(name) for name in requested} for doc in docs]
+    else:
+        content = [model(**doc).model_dump(mode="json") for doc in docs]
+
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return JSONResponse(content=content, headers=headers)
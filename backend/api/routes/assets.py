@@ -7,18 +7,18 @@ import uuid
 import base64
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
 from pydantic import BaseModel
 from loguru import logger
 
 from config import settings
 from services.image_compare import ImageCompareEngine
+from api.storage import get_storage
+from api.users import current_user_id
+from api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, fetch_page, page_response
 
 router = APIRouter()
 
-# In-memory storage (replace with database in production)
-assets_db = {}
-
 
 class AssetMetadata(BaseModel):
     """資產元數據"""
@@ -59,7 +59,8 @@ async def upload_asset(
     tags: str = Form(""),
     description: str = Form(""),
     product_sku: str = Form(""),
-    brand_name: str = Form("")
+    brand_name: str = Form(""),
+    user_id: str = Depends(current_user_id)
 ):
     """
     Upload a digital asset and compute its fingerprint
@@ -102,7 +103,7 @@ async def upload_asset(
         now = datetime.now().isoformat()
         asset = {
             "id": asset_id,
-            "user_id": "user-001",  # TODO: Get from auth
+            "user_id": user_id,
             "file_name": file.filename,
             "original_url": f"/uploads/{saved_filename}",
             "thumbnail_url": f"/uploads/{saved_filename}",
@@ -132,7 +133,7 @@ async def upload_asset(
             "_fingerprint_raw": fingerprint_data  # Store raw for comparison
         }
 
-        assets_db[asset_id] = asset
+        await get_storage().assets.insert(asset)
 
         logger.info(f"Asset uploaded: {asset_id}")
 
@@ -160,34 +161,18 @@ async def upload_asset(
 
 
 @router.get("/", response_model=List[AssetResponse])
-async def get_assets(status: Optional[str] = None):
+async def get_assets(
+    status: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
     """
-    Get all assets
-    取得所有資產
+    Get assets, oldest first (next page cursor in the X-Next-Cursor header)
+    取得資產（分頁）
     """
-    assets = list(assets_db.values())
-
-    if status:
-        assets = [a for a in assets if a.get('status') == status]
-
-    return [
-        AssetResponse(
-            id=a["id"],
-            user_id=a["user_id"],
-            file_name=a["file_name"],
-            original_url=a["original_url"],
-            thumbnail_url=a["thumbnail_url"],
-            file_size=a["file_size"],
-            dimensions=a["dimensions"],
-            fingerprint=a["fingerprint"],
-            metadata=a["metadata"],
-            status=a["status"],
-            scan_stats=a["scan_stats"],
-            created_at=a["created_at"],
-            updated_at=a["updated_at"]
-        )
-        for a in assets
-    ]
+    assets, next_cursor = await fetch_page(get_storage().assets, limit, cursor, status=status)
+    return page_response(assets, next_cursor, AssetResponse, fields)
 
 
 @router.get("/{asset_id}", response_model=AssetResponse)
@@ -196,7 +181,7 @@ async def get_asset(asset_id: str):
     Get asset by ID
     根據 ID 取得資產
     """
-    asset = assets_db.get(asset_id)
+    asset = await get_storage().assets.get(asset_id)
     if not asset:
         raise HTTPException(status_code=404, detail="資產不存在")
 
@@ -223,11 +208,10 @@ async def delete_asset(asset_id: str):
     Delete an asset
     刪除資產
     """
-    if asset_id not in assets_db:
+    asset = await get_storage().assets.delete(asset_id)
+    if not asset:
         raise HTTPException(status_code=404, detail="資產不存在")
 
-    asset = assets_db.pop(asset_id)
-
     # Delete file
     try:
         file_path = os.path.join(settings.UPLOAD_DIR, os.path.basename(asset["original_url"]))
@@ -245,7 +229,7 @@ async def recompute_fingerprint(asset_id: str):
     Recompute fingerprint for an asset
     重新計算資產指紋
     """
-    asset = assets_db.get(asset_id)
+    asset = await get_storage().assets.get(asset_id)
     if not asset:
         raise HTTPException(status_code=404, detail="資產不存在")
 
@@ -260,14 +244,17 @@ async def recompute_fingerprint(asset_id: str):
         fingerprint_data = await compare_engine.compute_fingerprint(contents)
 
         # Update asset
-        asset["fingerprint"] = {
-            "pHash": fingerprint_data['hashes'].get('phash', ''),
-            "orbDescriptors": str(fingerprint_data['orb']['feature_count']),
-            "colorHistogram": 'computed',
-            "featureCount": fingerprint_data['orb']['feature_count']
-        }
-        asset["_fingerprint_raw"] = fingerprint_data
-        asset["updated_at"] = datetime.now().isoformat()
+        await get_storage().assets.update(
+            asset_id,
+            fingerprint={
+                "pHash": fingerprint_data['hashes'].get('phash', ''),
+                "orbDescriptors": str(fingerprint_data['orb']['feature_count']),
+                "colorHistogram": 'computed',
+                "featureCount": fingerprint_data['orb']['feature_count']
+            },
+            _fingerprint_raw=fingerprint_data,
+            updated_at=datetime.now().isoformat()
+        )
 
         return FingerprintResponse(
             id=asset_id,
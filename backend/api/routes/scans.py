@@ -3,20 +3,180 @@ Scans API Routes
 掃描任務 API
 """
 import asyncio
+import json
+import os
 import uuid
 from datetime import datetime
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from loguru import logger
 
-from services.crawler import CrawlerManager
+from config import settings
+from services.crawler import (
+    CrawlerManager, ListingStore, PagePlanner, SellerFrontier, SyntheticCatalog, build_transport
+)
+from services.cancel import DEADLINE, Cancelled, CancelToken
+from services.progress import ProgressHub
+from services.storage import NOT_NULL, greater_than
+from services.workers import WorkerPool
+from api.storage import get_storage
+from api.users import current_user_id
+from api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, fetch_page, page_response
 
 router = APIRouter()
 
-# In-memory storage
-scans_db = {}
-scan_progress = {}
+# Listing store for incremental scans (opened on first use)
+_listing_store: Optional[ListingStore] = None
+
+
+def get_listing_store() -> ListingStore:
+    global _listing_store
+    if _listing_store is None:
+        _listing_store = ListingStore(settings.LISTING_STORE_PATH)
+    return _listing_store
+
+
+# Scan worker pool (started with the app)
+_scan_pool: Optional[WorkerPool] = None
+
+
+def start_scan_workers():
+    """Run queued scans in this process; interrupted ones resume from their checkpoint"""
+    global _scan_pool
+    storage = get_storage()
+    storage.scan_queue.lease_seconds = settings.SCAN_JOB_LEASE
+    _scan_pool = WorkerPool(
+        storage.scan_queue,
+        run_scan,
+        workers=settings.SCAN_WORKERS,
+        max_per_user=settings.SCAN_MAX_PER_USER
+    )
+    _scan_pool.start()
+
+
+async def stop_scan_workers():
+    """Stop the pool (running scans go back to the queue), then write pending listing rows"""
+    global _scan_pool, _listing_store
+    if _scan_pool is not None:
+        await _scan_pool.stop()
+        _scan_pool = None
+    if _listing_store is not None:
+        _listing_store.close()
+        _listing_store = None
+
+
+# Crawler transport (live / record / replay / standin), shared by all scans
+crawler_transport = build_transport(
+    mode=settings.CRAWLER_HTTP_MODE,
+    cassette_dir=settings.CRAWLER_CASSETTE_DIR,
+    standin_url=settings.CRAWLER_STANDIN_URL
+)
+
+
+def build_synthetic_catalog(asset_images: List[str]) -> SyntheticCatalog:
+    """Synthetic catalog with copies of this scan's uploaded assets planted in it"""
+    planted = []
+    for asset_image in asset_images:
+        file_path = os.path.join(settings.UPLOAD_DIR, os.path.basename(asset_image))
+        try:
+            with open(file_path, 'rb') as f:
+                planted.append(f.read())
+        except OSError as e:
+            logger.warning(f"Synthetic catalog: cannot read asset {file_path}: {e}")
+
+    return SyntheticCatalog(
+        listings_per_platform=settings.SYNTHETIC_LISTINGS_PER_PLATFORM,
+        results_per_keyword=settings.SYNTHETIC_RESULTS_PER_KEYWORD,
+        infringing_rate=settings.SYNTHETIC_INFRINGING_RATE,
+        asset_images=planted,
+        seed=settings.SYNTHETIC_SEED
+    )
+
+
+async def seller_violation_history() -> Dict[Tuple[str, str], int]:
+    """Known violations per (platform, seller_id), whitelisted ones excluded"""
+    return await get_storage().violations.count_by(
+        ("platform", "seller_id"),
+        is_whitelisted=False,
+        seller_id=NOT_NULL
+    )
+
+
+def scan_violation_records(task_id: str, start: int, violations: List[Dict]) -> List[Dict]:
+    """Scan violations as scan_violations rows, numbered from start + 1 in the order found"""
+    return [
+        {
+            "id": f"{task_id}-{seq:06d}",
+            "task_id": task_id,
+            "seq": seq,
+            "platform": (violation.get("listing") or {}).get("platform"),
+            **violation
+        }
+        for seq, violation in enumerate(violations, start + 1)
+    ]
+
+
+def compact_violation(violation: Dict) -> Dict:
+    """Flat projection of a scan violation (no raw listing data or score breakdown)"""
+    listing = violation.get("listing") or {}
+    similarity = violation.get("similarity") or {}
+    return {
+        "id": violation["id"],
+        "seq": violation["seq"],
+        "platform": violation.get("platform"),
+        "listing_id": listing.get("id"),
+        "title": listing.get("title"),
+        "url": listing.get("url"),
+        "thumbnail_url": listing.get("thumbnail_url"),
+        "price": listing.get("price"),
+        "seller_id": listing.get("seller_id"),
+        "similarity": similarity.get("overall"),
+        "level": similarity.get("level"),
+        "asset_image": violation.get("asset_image")
+    }
+
+
+async def stored_scan_results(task_id: str) -> Dict:
+    """
+    Scan summary; results stored before violations had their own table
+    have them moved to scan_violations on first read
+    """
+    storage = get_storage()
+    stored = await storage.scan_results.get(task_id)
+    results = stored["results"] if stored else {}
+    if "violations" in results:
+        results = dict(results)
+        violations = results.pop("violations") or []
+        await storage.scan_violations.insert_many(scan_violation_records(task_id, 0, violations))
+        await storage.scan_results.insert({"id": task_id, "results": results})
+    return results
+
+
+async def load_checkpoint(task_id: str) -> Tuple[Optional[Dict], List[Dict]]:
+    """
+    Last checkpoint of an interrupted scan and the violations stored up to it;
+    violations stored after it belong to searches that will run again and are removed
+    """
+    storage = get_storage()
+    stored = await storage.scan_checkpoints.get(task_id)
+    checkpoint = stored["state"] if stored else None
+    kept = checkpoint["violations"] if checkpoint else 0
+
+    # One DELETE over the (task_id, seq) index
+    removed = await storage.scan_violations.delete_where(task_id=task_id, seq=greater_than(kept))
+    if removed:
+        logger.info(f"Scan {task_id}: dropped {removed} violations stored after the checkpoint")
+
+    restored = [
+        {
+            key: value for key, value in violation.items()
+            if key not in ("id", "task_id", "seq", "platform")
+        }
+        for violation in sorted(await storage.scan_violations.list(task_id=task_id), key=lambda v: v["seq"])
+    ]
+    return checkpoint, restored
 
 
 class ScanConfig(BaseModel):
@@ -27,6 +187,10 @@ class ScanConfig(BaseModel):
     similarity_threshold: float = 70
     max_results: int = 100
     scan_depth: int = 5
+    incremental: bool = True  # 跳過上次掃描後未變動的商品
+    adaptive_pages: bool = True  # 依新商品比例調整每個關鍵字的翻頁數
+    max_sellers: int = 20  # 追查侵權賣家其他商品的賣家數 (0 = 不追查)
+    timeout_seconds: Optional[int] = None  # 掃描期限 (秒，從第一次開始起算)；None 使用預設
 
 
 class ScanTaskResponse(BaseModel):
@@ -51,49 +215,170 @@ class ScanProgressUpdate(BaseModel):
     message: str
     scanned: int
     violations: int
+    eta_seconds: Optional[float] = None
+    telemetry: Dict = {}
+
+
+# Progress broadcast to WebSocket / SSE subscribers (per process)
+progress_hub = ProgressHub(max_rate=settings.PROGRESS_MAX_RATE)
+
+# Subscribers of a scan running in another process follow its stored progress
+REMOTE_POLL_INTERVAL = 1.0
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+def progress_snapshot(task: Dict, stored: Optional[Dict] = None) -> Dict:
+    """Progress message for a task from its last stored progress (or the task itself)"""
+    state = {
+        "task_id": task["id"],
+        **(stored or {
+            "progress": task["progress"],
+            "message": "等待中...",
+            "scanned": task["total_scanned"],
+            "violations": task["violations_found"],
+            "eta_seconds": None,
+            "stages": {},
+            "telemetry": {}
+        }),
+        "status": task["status"]
+    }
+    if task["status"] == "completed":
+        state.update(progress=100, message="掃描完成", scanned=task["total_scanned"],
+                     violations=task["violations_found"])
+    elif task["status"] == "failed":
+        state["message"] = f"掃描失敗：{task.get('error') or ''}"
+    elif task["status"] == "cancelled":
+        state["message"] = "掃描已取消"
+    return state
 
 
-# WebSocket connections for real-time progress
-active_connections: dict = {}
+def publish_final(task: Optional[Dict], stored: Optional[Dict] = None):
+    """Last message of a finished scan (with its last stored progress); ends its subscriptions"""
+    if task is not None and task["status"] in TERMINAL_STATUSES:
+        progress_hub.publish(task["id"], progress_snapshot(task, stored), final=True)
 
 
-async def send_progress_update(task_id: str, progress: int, message: str, scanned: int, violations: int):
-    """Send progress update to WebSocket clients"""
-    if task_id in active_connections:
-        try:
-            await active_connections[task_id].send_json({
-                "task_id": task_id,
-                "progress": progress,
-                "message": message,
-                "scanned": scanned,
-                "violations": violations
-            })
-        except Exception as e:
-            logger.debug(f"WebSocket send error: {e}")
+async def progress_updates(task_id: str) -> AsyncIterator[Dict]:
+    """
+    Current progress first, then coalesced updates until the scan ends
+
+    Updates published in this process arrive through the hub; while the hub is
+    quiet the stored state is checked, which follows scans run by other processes.
+    """
+    storage = get_storage()
+    with progress_hub.subscribe(task_id) as subscription:
+        last = None
+        if progress_hub.last(task_id) is None:
+            task = await storage.scans.get(task_id)
+            if task is None:
+                return
+            last = progress_snapshot(task, await storage.scan_progress.get(task_id))
+            yield last
+            if task["status"] in TERMINAL_STATUSES:
+                return
 
+        while True:
+            state = await subscription.next(timeout=REMOTE_POLL_INTERVAL)
+            if state is not None:
+                last = state
+                yield state
+                if subscription.finished:
+                    return
+                continue
+
+            task = await storage.scans.get(task_id)
+            if task is None:
+                return
+            stored = await storage.scan_progress.get(task_id)
+            state = progress_snapshot(task, stored)
+            if task["status"] in TERMINAL_STATUSES:
+                yield state
+                return
+            if stored is not None and state != last:
+                last = state
+                yield state
+
+
+async def run_scan(task: Dict, cancel_token: CancelToken):
+    """
+    Run a scan claimed from the queue (resumes from its checkpoint when it has one)
 
-async def run_scan(task_id: str, config: ScanConfig, asset_images: List[str]):
-    """Background task to run scan"""
+    The scan stops within a bounded time when cancel_token fires: DELETE in this
+    process, lease lost (cancelled from another process) or the scan's deadline.
+    """
+    storage = get_storage()
+    task_id = task["id"]
+    worker_id = task.get("worker_id")
     try:
-        # Update status to running
-        scans_db[task_id]["status"] = "running"
-        scans_db[task_id]["started_at"] = datetime.now().isoformat()
+        config = ScanConfig(**task["config"])
 
-        crawler_manager = CrawlerManager()
+        # Get asset images
+        asset_images = []
+        for asset_id in config.asset_ids:
+            asset = await storage.assets.get(asset_id)
+            if asset:
+                # Use the stored file
+                asset_images.append(asset["original_url"])
 
-        async def on_progress(progress: int, message: str):
-            scans_db[task_id]["progress"] = progress
-            scan_progress[task_id] = {
+        if not asset_images:
+            # For testing, allow without real assets
+            logger.warning(f"No asset images found for task {task_id}")
+
+        checkpoint, restored_violations = await load_checkpoint(task_id)
+        if checkpoint:
+            logger.info(
+                f"Scan {task_id} resuming: {len(checkpoint['searches'])} searches and "
+                f"{len(restored_violations)} violations from the last checkpoint"
+            )
+        task = await storage.scans.update(task_id, started_at=task.get("started_at") or datetime.now().isoformat())
+
+        # The deadline counts from the first start, so resuming does not extend it
+        timeout = config.timeout_seconds or settings.SCAN_DEADLINE_SECONDS
+        if timeout:
+            cancel_token.deadline = datetime.fromisoformat(task["started_at"]).timestamp() + timeout
+
+        crawler_manager = CrawlerManager(
+            transport=crawler_transport,
+            synthetic=build_synthetic_catalog(asset_images) if settings.CRAWLER_SYNTHETIC else None,
+            synthetic_images_in_memory=settings.SYNTHETIC_IMAGES_IN_MEMORY,
+            live_search=settings.CRAWLER_LIVE_SEARCH
+        )
+
+        async def on_progress(
+            progress: int,
+            message: str,
+            stages: Optional[dict] = None,
+            telemetry: Optional[dict] = None
+        ):
+            if progress != task["progress"]:
+                task["progress"] = progress
+                await storage.scans.update(task_id, progress=progress)
+            telemetry = telemetry or {}
+            state = {
                 "progress": progress,
                 "message": message,
-                "scanned": scans_db[task_id]["total_scanned"],
-                "violations": scans_db[task_id]["violations_found"]
+                "scanned": telemetry.get("listings", task["total_scanned"]),
+                "violations": telemetry.get("violations", task["violations_found"]),
+                "eta_seconds": telemetry.get("eta_seconds"),
+                "stages": stages or {},
+                "telemetry": telemetry
             }
-            await send_progress_update(
-                task_id, progress, message,
-                scans_db[task_id]["total_scanned"],
-                scans_db[task_id]["violations_found"]
-            )
+            await storage.scan_progress.put(task_id, state)
+            progress_hub.publish(task_id, {"task_id": task_id, **state, "status": "running"})
+
+        # Violations are stored as the scan finds them (readable before it completes)
+        stored_violations = len(restored_violations)
+
+        async def store_violations(batch: List[Dict]):
+            nonlocal stored_violations
+            # Rows are numbered from what was stored; a failed batch is re-sent with the same ids
+            records = scan_violation_records(task_id, stored_violations, batch)
+            await storage.scan_violations.insert_many(records)
+            stored_violations += len(batch)
+
+        async def save_checkpoint(state: Dict):
+            await storage.scan_checkpoints.insert({"id": task_id, "state": state})
 
         # Run scan
         result = await crawler_manager.scan_with_comparison(
@@ -103,30 +388,88 @@ async def run_scan(task_id: str, config: ScanConfig, asset_images: List[str]):
             similarity_threshold=config.similarity_threshold,
             max_pages=config.scan_depth,
             max_results_per_platform=config.max_results // len(config.platforms),
-            on_progress=on_progress
+            on_progress=on_progress,
+            stage_workers={
+                "crawl": settings.SCAN_CRAWL_WORKERS,
+                "download": settings.SCAN_DOWNLOAD_WORKERS,
+                "hash": settings.SCAN_HASH_WORKERS,
+                "compare": settings.SCAN_COMPARE_WORKERS,
+                "verify": settings.SCAN_VERIFY_WORKERS
+            },
+            queue_size=settings.SCAN_QUEUE_SIZE,
+            listing_store=get_listing_store() if config.incremental else None,
+            page_planner=PagePlanner(
+                min_new_ratio=settings.SCAN_MIN_NEW_RATIO,
+                max_extension=settings.SCAN_PAGE_EXTENSION
+            ) if config.adaptive_pages else None,
+            seller_frontier=SellerFrontier(
+                seller_history=await seller_violation_history(),
+                max_sellers=config.max_sellers
+            ) if config.max_sellers > 0 else None,
+            max_seller_products=settings.SCAN_SELLER_PRODUCTS,
+            violation_sink=store_violations,
+            cancel_token=cancel_token,
+            on_checkpoint=save_checkpoint,
+            checkpoint_searches=settings.SCAN_CHECKPOINT_SEARCHES,
+            checkpoint=checkpoint,
+            restored_violations=restored_violations
         )
 
-        # Update scan record
-        scans_db[task_id]["status"] = "completed"
-        scans_db[task_id]["completed_at"] = datetime.now().isoformat()
-        scans_db[task_id]["total_scanned"] = result["total_scanned"]
-        scans_db[task_id]["violations_found"] = result["violations_found"]
-        scans_db[task_id]["progress"] = 100
-        scans_db[task_id]["results"] = result
+        # Update scan record (summary only; violations are already in scan_violations)
+        result.pop("violations", None)
+        await storage.scan_results.insert({"id": task_id, "results": result})
+        finished = await storage.scan_queue.finish(
+            task_id, worker_id,
+            status="completed",
+            completed_at=datetime.now().isoformat(),
+            total_scanned=result["total_scanned"],
+            violations_found=result["violations_found"],
+            progress=100
+        )
+        await storage.scan_progress.flush()
+        publish_final(finished, await storage.scan_progress.get(task_id))
+        if finished is None:
+            # Cancelled while the last results were written: the cancellation stands
+            logger.info(f"Scan {task_id} finished after it was cancelled")
+            return
+        await storage.scan_checkpoints.delete(task_id)
 
         logger.info(f"Scan {task_id} completed: {result['violations_found']} violations found")
 
+    except Cancelled as e:
+        if e.reason == DEADLINE:
+            logger.warning(f"Scan {task_id} stopped: deadline exceeded")
+            await storage.scan_queue.finish(
+                task_id, worker_id,
+                status="failed",
+                error="掃描逾時",
+                completed_at=datetime.now().isoformat(),
+                violations_found=await storage.scan_violations.count(task_id=task_id)
+            )
+        else:
+            logger.info(f"Scan {task_id} stopped: {e.reason}")
+
+        # Taken over by another worker: it resumes from the checkpoint; otherwise the scan is over
+        current = await storage.scans.get(task_id)
+        if current and current["status"] != "running":
+            await storage.scan_checkpoints.delete(task_id)
+            publish_final(current)
+
     except Exception as e:
         logger.error(f"Scan {task_id} failed: {e}")
-        scans_db[task_id]["status"] = "failed"
-        scans_db[task_id]["error"] = str(e)
+        publish_final(await storage.scan_queue.finish(task_id, worker_id, status="failed", error=str(e)))
+
+    finally:
+        # A scan taken over by another worker (or a failed finish) never publishes
+        # a final state: drop what the hub holds for it
+        progress_hub.discard(task_id)
 
 
 @router.post("/create", response_model=ScanTaskResponse)
-async def create_scan(config: ScanConfig, background_tasks: BackgroundTasks):
+async def create_scan(config: ScanConfig, user_id: str = Depends(current_user_id)):
     """
-    Create a new scan task
-    建立新的掃描任務
+    Create a new scan task (queued; started by the scan worker pool)
+    建立新的掃描任務；SCAN_MAX_PER_USER 依 X-User-Id 標頭的使用者計算
     """
     try:
         # Validate config
@@ -143,7 +486,7 @@ async def create_scan(config: ScanConfig, background_tasks: BackgroundTasks):
 
         task = {
             "id": task_id,
-            "user_id": "user-001",
+            "user_id": user_id,
             "type": "hybrid",
             "status": "queued",
             "config": config.dict(),
@@ -155,23 +498,11 @@ async def create_scan(config: ScanConfig, background_tasks: BackgroundTasks):
             "completed_at": None
         }
 
-        scans_db[task_id] = task
+        await get_storage().scans.insert(task)
 
-        # Get asset images (from assets_db)
-        from .assets import assets_db
-        asset_images = []
-        for asset_id in config.asset_ids:
-            asset = assets_db.get(asset_id)
-            if asset:
-                # Use the stored file
-                asset_images.append(asset["original_url"])
-
-        if not asset_images:
-            # For testing, allow without real assets
-            logger.warning(f"No asset images found for task {task_id}")
-
-        # Start background scan
-        background_tasks.add_task(run_scan, task_id, config, asset_images)
+        # Queued durably: a worker claims it (now, if one is idle in this process)
+        if _scan_pool is not None:
+            _scan_pool.wake()
 
         logger.info(f"Scan task created: {task_id}")
 
@@ -185,17 +516,18 @@ async def create_scan(config: ScanConfig, background_tasks: BackgroundTasks):
 
 
 @router.get("/", response_model=List[ScanTaskResponse])
-async def get_scans(status: Optional[str] = None):
+async def get_scans(
+    status: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
     """
-    Get all scan tasks
-    取得所有掃描任務
+    Get scan tasks, oldest first (next page cursor in the X-Next-Cursor header)
+    取得掃描任務（分頁）
     """
-    tasks = list(scans_db.values())
-
-    if status:
-        tasks = [t for t in tasks if t.get('status') == status]
-
-    return [ScanTaskResponse(**t) for t in tasks]
+    tasks, next_cursor = await fetch_page(get_storage().scans, limit, cursor, status=status)
+    return page_response(tasks, next_cursor, ScanTaskResponse, fields)
 
 
 @router.get("/{task_id}", response_model=ScanTaskResponse)
@@ -204,7 +536,7 @@ async def get_scan(task_id: str):
     Get scan task by ID
     根據 ID 取得掃描任務
     """
-    task = scans_db.get(task_id)
+    task = await get_storage().scans.get(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="掃描任務不存在")
 
@@ -217,50 +549,100 @@ async def get_scan_progress(task_id: str):
     Get scan progress
     取得掃描進度
     """
-    task = scans_db.get(task_id)
+    storage = get_storage()
+    task = await storage.scans.get(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="掃描任務不存在")
 
-    progress = scan_progress.get(task_id, {
-        "progress": task["progress"],
-        "message": "等待中...",
-        "scanned": task["total_scanned"],
-        "violations": task["violations_found"]
-    })
-
-    return progress
+    return progress_hub.last(task_id) or progress_snapshot(task, await storage.scan_progress.get(task_id))
 
 
 @router.get("/{task_id}/results")
 async def get_scan_results(task_id: str):
     """
-    Get scan results
-    取得掃描結果
+    Get scan results summary (violations are paged from /{task_id}/results/violations)
+    取得掃描結果摘要
     """
-    task = scans_db.get(task_id)
+    storage = get_storage()
+    task = await storage.scans.get(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="掃描任務不存在")
 
     if task["status"] != "completed":
         raise HTTPException(status_code=400, detail="掃描尚未完成")
 
-    return task.get("results", {})
+    return await stored_scan_results(task_id)
 
 
-@router.delete("/{task_id}")
-async def cancel_scan(task_id: str):
+@router.get("/{task_id}/results/violations")
+async def get_scan_result_violations(
+    task_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    compact: bool = False,
+    output: str = Query("json", alias="format", pattern="^(json|ndjson)$")
+):
     """
-    Cancel a scan task
-    取消掃描任務
+    Get a scan's violations in the order they were found, also while the scan runs
+    取得掃描發現的侵權商品（分頁）
+
+    format=json 回傳一頁 JSON 陣列，下一頁 cursor 在 X-Next-Cursor 標頭；
+    format=ndjson 從 cursor 起串流所有記錄，每行一筆。compact=true 只回傳扁平的摘要欄位。
     """
-    task = scans_db.get(task_id)
+    storage = get_storage()
+    task = await storage.scans.get(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="掃描任務不存在")
-
     if task["status"] == "completed":
-        raise HTTPException(status_code=400, detail="已完成的任務無法取消")
+        await stored_scan_results(task_id)
+
+    project = compact_violation if compact else (lambda violation: violation)
+
+    if output == "ndjson":
+        first_page = await fetch_page(storage.scan_violations, MAX_PAGE_SIZE, cursor, task_id=task_id)
+
+        async def lines():
+            violations, next_cursor = first_page
+            while True:
+                if violations:
+                    yield "".join(
+                        json.dumps(project(violation), ensure_ascii=False) + "\n"
+                        for violation in violations
+                    )
+                if not next_cursor:
+                    break
+                violations, next_cursor = await storage.scan_violations.page(
+                    limit=MAX_PAGE_SIZE, cursor=next_cursor, task_id=task_id
+                )
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
 
-    scans_db[task_id]["status"] = "cancelled"
+    violations, next_cursor = await fetch_page(storage.scan_violations, limit, cursor, task_id=task_id)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return JSONResponse(content=[project(violation) for violation in violations], headers=headers)
+
+
+@router.delete("/{task_id}")
+async def cancel_scan(task_id: str):
+    """
+    Cancel a scan task
+    取消掃描任務
+    """
+    storage = get_storage()
+    # Compare-and-set: only a queued or running scan becomes cancelled, so a scan
+    # that finishes meanwhile keeps its completed / failed status
+    task = await storage.scan_queue.cancel(task_id, completed_at=datetime.now().isoformat())
+    if task is None:
+        current = await storage.scans.get(task_id)
+        if not current:
+            raise HTTPException(status_code=404, detail="掃描任務不存在")
+        raise HTTPException(status_code=409, detail=f"任務已結束 ({current['status']})，無法取消")
+    publish_final(task)
+
+    # Running in this process: stop it now; a scan running in another process
+    # stops when its worker next renews the lease (within a third of the lease time)
+    if _scan_pool is not None:
+        _scan_pool.cancel(task_id)
 
     return {"message": "掃描任務已取消", "id": task_id}
 
@@ -268,25 +650,53 @@ async def cancel_scan(task_id: str):
 @router.websocket("/{task_id}/ws")
 async def websocket_progress(websocket: WebSocket, task_id: str):
     """
-    WebSocket for real-time scan progress
+    WebSocket for real-time scan progress (any number of viewers per task)
     即時掃描進度 WebSocket
     """
     await websocket.accept()
-    active_connections[task_id] = websocket
 
-    try:
+    async def answer_pings():
         while True:
-            # Keep connection alive and wait for disconnect
-            data = await websocket.receive_text()
-            if data == "ping":
+            if await websocket.receive_text() == "ping":
                 await websocket.send_text("pong")
 
+    receiver = asyncio.create_task(answer_pings())
+    try:
+        async for state in progress_updates(task_id):
+            if receiver.done():
+                break
+            await websocket.send_json(state)
+        if not receiver.done():
+            await websocket.close()
     except WebSocketDisconnect:
-        if task_id in active_connections:
-            del active_connections[task_id]
+        pass
+    finally:
+        receiver.cancel()
+        await asyncio.gather(receiver, return_exceptions=True)
         logger.debug(f"WebSocket disconnected for task {task_id}")
 
 
+@router.get("/{task_id}/events")
+async def progress_events(task_id: str):
+    """
+    Server-Sent Events stream of scan progress (same messages as the WebSocket)
+    掃描進度 SSE：每則 event: progress，掃描結束時送出 event: end
+    """
+    if not await get_storage().scans.get(task_id):
+        raise HTTPException(status_code=404, detail="掃描任務不存在")
+
+    async def events():
+        async for state in progress_updates(task_id):
+            yield f"event: progress\ndata: {json.dumps(state, ensure_ascii=False)}\n\n"
+        yield "event: end\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/quick-search")
 async def quick_search(
     keyword: str,
@@ -298,7 +708,7 @@ async def quick_search(
     快速搜尋（不進行比對）
     """
     try:
-        crawler_manager = CrawlerManager()
+        crawler_manager = CrawlerManager(transport=crawler_transport)
         results = await crawler_manager.search_all_platforms(
             keyword=keyword,
             platforms=platforms,
@@ -310,7 +720,7 @@ async def quick_search(
         for platform, result in results.items():
             for listing in result.listings:
                 all_listings.append({
-                    **listing.__dict__,
+                    **listing.to_dict(),
                     "platform": platform
                 })
 
@@ -2,17 +2,18 @@
 Violations API Routes
 侵權記錄 API
 """
+import json
 import uuid
 from datetime import datetime
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from typing import Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import BaseModel, ValidationError
 from loguru import logger
 
-router = APIRouter()
+from api.storage import get_storage
+from api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, fetch_page, page_response
 
-# In-memory storage
-violations_db = {}
+router = APIRouter()
 
 
 class ViolationCreate(BaseModel):
@@ -61,7 +62,7 @@ async def create_violation(violation: ViolationCreate):
             "created_at": now
         }
 
-        violations_db[violation_id] = record
+        await get_storage().violations.insert(record)
 
         logger.info(f"Violation created: {violation_id}")
 
@@ -77,27 +78,24 @@ async def get_violations(
     task_id: Optional[str] = None,
     asset_id: Optional[str] = None,
     platform: Optional[str] = None,
-    has_case: Optional[bool] = None
+    has_case: Optional[bool] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
 ):
     """
-    Get violations with optional filters
-    取得侵權記錄（可篩選）
+    Get violations with optional filters, oldest first
+    (next page cursor in the X-Next-Cursor header)
+    取得侵權記錄（可篩選、分頁）
     """
-    violations = list(violations_db.values())
-
-    if task_id:
-        violations = [v for v in violations if v["task_id"] == task_id]
-    if asset_id:
-        violations = [v for v in violations if v["asset_id"] == asset_id]
-    if platform:
-        violations = [v for v in violations if v["platform"] == platform]
-    if has_case is not None:
-        if has_case:
-            violations = [v for v in violations if v.get("case_id")]
-        else:
-            violations = [v for v in violations if not v.get("case_id")]
-
-    return [ViolationResponse(**v) for v in violations]
+    violations, next_cursor = await fetch_page(
+        get_storage().violations, limit, cursor,
+        task_id=task_id or None,
+        asset_id=asset_id or None,
+        platform=platform or None,
+        has_case=None if has_case is None else int(has_case)
+    )
+    return page_response(violations, next_cursor, ViolationResponse, fields)
 
 
 @router.get("/{violation_id}", response_model=ViolationResponse)
@@ -106,7 +104,7 @@ async def get_violation(violation_id: str):
     Get violation by ID
     根據 ID 取得侵權記錄
     """
-    violation = violations_db.get(violation_id)
+    violation = await get_storage().violations.get(violation_id)
     if not violation:
         raise HTTPException(status_code=404, detail="侵權記錄不存在")
 
@@ -119,12 +117,10 @@ async def toggle_whitelist(violation_id: str, is_whitelisted: bool):
     Toggle whitelist status
     切換白名單狀態
     """
-    violation = violations_db.get(violation_id)
+    violation = await get_storage().violations.update(violation_id, is_whitelisted=is_whitelisted)
     if not violation:
         raise HTTPException(status_code=404, detail="侵權記錄不存在")
 
-    violations_db[violation_id]["is_whitelisted"] = is_whitelisted
-
     return {"message": "已更新白名單狀態", "is_whitelisted": is_whitelisted}
 
 
@@ -134,12 +130,10 @@ async def link_to_case(violation_id: str, case_id: str):
     Link violation to a case
     將侵權記錄連結到案件
     """
-    violation = violations_db.get(violation_id)
+    violation = await get_storage().violations.update(violation_id, case_id=case_id)
     if not violation:
         raise HTTPException(status_code=404, detail="侵權記錄不存在")
 
-    violations_db[violation_id]["case_id"] = case_id
-
     return {"message": "已連結到案件", "case_id": case_id}
 
 
@@ -149,43 +143,21 @@ async def delete_violation(violation_id: str):
     Delete a violation record
     刪除侵權記錄
     """
-    if violation_id not in violations_db:
+    if not await get_storage().violations.delete(violation_id):
         raise HTTPException(status_code=404, detail="侵權記錄不存在")
 
-    del violations_db[violation_id]
-
     return {"message": "侵權記錄已刪除", "id": violation_id}
 
 
 @router.get("/stats/summary")
-async def get_violation_stats():
+async def get_violation_stats(
+    days: Optional[int] = Query(None, ge=1, le=3650, description="by_day 只回傳最近幾天")
+):
     """
     Get violation statistics
-    取得侵權統計
+    取得侵權統計 (讀取隨寫入維護的計數器)
     """
-    violations = list(violations_db.values())
-
-    # Count by platform
-    by_platform = {}
-    for v in violations:
-        platform = v["platform"]
-        by_platform[platform] = by_platform.get(platform, 0) + 1
-
-    # Count by similarity level
-    by_similarity = {"exact": 0, "high": 0, "medium": 0, "low": 0}
-    for v in violations:
-        level = v["similarity"].get("level", "low")
-        by_similarity[level] = by_similarity.get(level, 0) + 1
-
-    # Pending (no case)
-    pending = len([v for v in violations if not v.get("case_id")])
-
-    return {
-        "total": len(violations),
-        "pending": pending,
-        "by_platform": by_platform,
-        "by_similarity": by_similarity
-    }
+    return await get_storage().violation_stats.summary(days=days)
 
 
 @router.post("/batch-create")
@@ -194,7 +166,7 @@ async def batch_create_violations(violations: List[ViolationCreate]):
     Create multiple violation records at once
     批次建立侵權記錄
     """
-    created = []
+    records = []
     for v in violations:
         violation_id = f"vio-{uuid.uuid4().hex[:8]}"
         now = datetime.now().isoformat()
@@ -212,9 +184,115 @@ async def batch_create_violations(violations: List[ViolationCreate]):
             "created_at": now
         }
 
-        violations_db[violation_id] = record
-        created.append(ViolationResponse(**record))
+        records.append(record)
+
+    # One transaction for the whole batch
+    await get_storage().violations.insert_many(records)
+    created = [ViolationResponse(**record) for record in records]
 
     logger.info(f"Batch created {len(created)} violations")
 
     return {"created": len(created), "violations": created}
+
+
+MAX_INGEST_ERRORS = 20
+
+
+def _ingest_record(violation_id: str, v: ViolationCreate, now: str) -> Dict:
+    return {
+        "id": violation_id,
+        "task_id": v.task_id,
+        "asset_id": v.asset_id,
+        "platform": v.platform,
+        "listing": v.listing,
+        "similarity": v.similarity,
+        "detected_at": now,
+        "is_whitelisted": False,
+        "case_id": None,
+        "created_at": now
+    }
+
+
+async def _ndjson_lines(request: Request):
+    """(line number, text) for each non-empty line of the request body, read as it arrives"""
+    buffer = b""
+    number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            if line.strip():
+                yield number, line
+    if buffer.strip():
+        yield number + 1, buffer
+
+
+@router.post("/ingest")
+async def ingest_violations(
+    request: Request,
+    chunk_size: int = Query(1000, ge=1, le=10000)
+):
+    """
+    Stream violations as NDJSON (one ViolationCreate object per line)
+    串流匯入侵權記錄 (NDJSON)
+
+    每 chunk_size 筆驗證後提交一次；同一 (資產, 平台, 商品 ID) 已存在的記錄會略過。
+    只回傳筆數與建立的 ID 範圍，不回傳記錄內容。ID 為 vio-<batch_id>-<序號>，
+    同一批次內依匯入順序遞增。
+    """
+    storage = get_storage()
+    batch_id = uuid.uuid4().hex[:8]
+    received = created = duplicates = rejected = 0
+    errors: List[Dict] = []
+    id_ranges: List[List[str]] = []
+    seq = last_seq = 0
+    pending: List[Dict] = []
+
+    async def commit():
+        nonlocal created, duplicates, last_seq
+        inserted = await storage.violations.insert_unique(pending, "listing_key")
+        created += len(inserted)
+        duplicates += len(pending) - len(inserted)
+        # Consecutive sequence numbers collapse into one [first, last] range
+        for record in inserted:
+            record_seq = int(record["id"].rsplit("-", 1)[1])
+            if id_ranges and record_seq == last_seq + 1:
+                id_ranges[-1][1] = record["id"]
+            else:
+                id_ranges.append([record["id"], record["id"]])
+            last_seq = record_seq
+        pending.clear()
+
+    async for line_number, line in _ndjson_lines(request):
+        received += 1
+        try:
+            v = ViolationCreate.model_validate(json.loads(line))
+        except (ValueError, ValidationError) as e:
+            rejected += 1
+            if len(errors) < MAX_INGEST_ERRORS:
+                errors.append({"line": line_number, "error": str(e).splitlines()[0]})
+            continue
+
+        seq += 1
+        pending.append(_ingest_record(f"vio-{batch_id}-{seq:08d}", v, datetime.now().isoformat()))
+        if len(pending) >= chunk_size:
+            await commit()
+
+    if pending:
+        await commit()
+
+    logger.info(
+        f"Ingested violations batch {batch_id}: {created} created, "
+        f"{duplicates} duplicates, {rejected} rejected"
+    )
+
+    return {
+        "batch_id": batch_id,
+        "received": received,
+        "created": created,
+        "duplicates": duplicates,
+        "rejected": rejected,
+        "id_ranges": id_ranges,
+        "errors": errors
+    }
@@ -0,0 +1,24 @@
+"""
+Shared Storage
+API 共用的資料庫 (第一次使用時開啟)
+"""
+from typing import Optional
+
+from config import settings
+from services.storage import Storage
+
+_storage: Optional[Storage] = None
+
+
+def get_storage() -> Storage:
+    global _storage
+    if _storage is None:
+        _storage = Storage(settings.DATABASE_PATH)
+    return _storage
+
+
+def close_storage():
+    global _storage
+    if _storage is not None:
+        _storage.close()
+        _storage = None
@@ -0,0 +1,23 @@
+"""
+Request User
+目前請求的使用者 - 資產擁有者與每位使用者的掃描並行上限都依此區分
+
+尚未接上登入驗證：使用者 ID 由 X-User-Id 標頭帶入 (前端或閘道設定)，
+未帶標頭的請求都算成 settings.DEFAULT_USER_ID，共用同一個並行上限。
+接上驗證後只要改這個 dependency，路由不需要修改。
+"""
+from typing import Optional
+
+from fastapi import Header
+
+from config import settings
+
+
+USER_ID_HEADER = "X-User-Id"
+
+
+async def current_user_id(
+    x_user_id: Optional[str] = Header(None, alias=USER_ID_HEADER, max_length=64)
+) -> str:
+    """User the request acts for"""
+    return (x_user_id or "").strip() or settings.DEFAULT_USER_ID
@@ -17,11 +17,61 @@ class Settings(BaseSettings):
     # Storage
     UPLOAD_DIR: str = "./uploads"
     MAX_UPLOAD_SIZE: int = 20 * 1024 * 1024  # 20MB
+    LISTING_STORE_PATH: str = "./data/listings.db"
+    DATABASE_PATH: str = "./data/app.db"  # assets, scans, violations (SQLite WAL)
 
     # Image Comparison Settings
     PHASH_THRESHOLD: int = 10
     OVERALL_SIMILARITY_THRESHOLD: float = 0.70
 
+    # Crawler HTTP: live | record | replay | standin
+    CRAWLER_HTTP_MODE: str = "live"
+    CRAWLER_CASSETTE_DIR: str = "./data/cassettes"
+    CRAWLER_STANDIN_URL: str = "http://127.0.0.1:8900"
+    # Keyword search requests Shopee/Ruten through the transport above (opt-in);
+    # False returns simulated search results
+    CRAWLER_LIVE_SEARCH: bool = False
+
+    # Synthetic marketplace (load testing): generated listings with planted asset copies
+    CRAWLER_SYNTHETIC: bool = False
+    SYNTHETIC_LISTINGS_PER_PLATFORM: int = 1_000_000
+    SYNTHETIC_RESULTS_PER_KEYWORD: int = 2_000
+    SYNTHETIC_INFRINGING_RATE: float = 0.01
+    SYNTHETIC_SEED: int = 0
+    SYNTHETIC_IMAGES_IN_MEMORY: bool = True  # False: served by the local stand-in
+
+    # Scan Pipeline (worker count per stage, max items queued per stage)
+    SCAN_QUEUE_SIZE: int = 100
+    SCAN_CRAWL_WORKERS: int = 4
+    SCAN_DOWNLOAD_WORKERS: int = 8
+    SCAN_HASH_WORKERS: int = 2
+    SCAN_COMPARE_WORKERS: int = 2
+    SCAN_VERIFY_WORKERS: int = 2
+
+    # Adaptive paging: stop a keyword once a page has fewer new listings than
+    # SCAN_MIN_NEW_RATIO; productive keywords may grow to scan_depth × SCAN_PAGE_EXTENSION
+    SCAN_MIN_NEW_RATIO: float = 0.2
+    SCAN_PAGE_EXTENSION: float = 2.0
+
+    # Seller expansion: listings fetched per flagged seller's shop
+    SCAN_SELLER_PRODUCTS: int = 50
+
+    # Requests without an X-User-Id header act as this user (no login yet, see api/users.py)
+    DEFAULT_USER_ID: str = "user-001"
+
+    # Scan job queue: scans run per process, running scans per user (all processes),
+    # lease renewed while a scan runs (an expired lease means its process died: resume
+    # elsewhere), searches per checkpoint (0 = one keyword on every platform)
+    SCAN_WORKERS: int = 4
+    SCAN_MAX_PER_USER: int = 2
+    SCAN_JOB_LEASE: float = 30.0
+    SCAN_CHECKPOINT_SEARCHES: int = 0
+    # Default scan deadline in seconds (0 = none); ScanConfig.timeout_seconds overrides
+    SCAN_DEADLINE_SECONDS: int = 3600
+
+    # Progress messages per second per scan sent to WebSocket / SSE viewers (0 = unthrottled)
+    PROGRESS_MAX_RATE: float = 4.0
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -17,7 +17,9 @@ from loguru import logger
 import os
 
 from config import settings
+from api.compression import GZipMiddleware
 from api.routes import assets, scans, violations
+from api.storage import close_storage
 
 
 @asynccontextmanager
@@ -30,10 +32,15 @@ async def lifespan(app: FastAPI):
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
     logger.info(f"Upload directory: {settings.UPLOAD_DIR}")
 
+    # Scan workers (queued and interrupted scans start here)
+    scans.start_scan_workers()
+
     yield
 
     # Shutdown
     logger.info("Shutting down...")
+    await scans.stop_scan_workers()
+    close_storage()
 
 
 # Create FastAPI app
@@ -51,8 +58,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Gzip responses (scan results and other large JSON / NDJSON bodies) for clients that accept it;
+# SSE progress streams (text/event-stream) are sent uncompressed so each event arrives immediately
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Static files for uploads
 if os.path.exists(settings.UPLOAD_DIR):
     app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
@@ -0,0 +1,220 @@
+"""
+Crawler Benchmark
+爬蟲解析基準測試 - 以錄製頁面比較舊版與目前實作的速度與記憶體
+
+頁面來源：--cassette-dir 指定的錄製回應 (CassetteTransport 格式)；
+未指定時使用本地替身伺服器 (standin) 產生的同格式頁面。
+
+使用方式 (在 backend/ 目錄)：
+    python -m scripts.bench_crawler
+    python -m scripts.bench_crawler --cassette-dir ./data/cassettes --repeat 5
+"""
+import argparse
+import json
+import os
+import re
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from services.crawler import parsing
+from services.crawler.base import ProductListing
+from services.crawler.parsing import RutenListingParser, decode_shopee_items
+from services.crawler.standin import _ruten_html, _shopee_item
+from services.crawler.transport import load_recording
+
+
+# Search-result regex used before the linear parser (user-029)
+LEGACY_RUTEN_PATTERN = re.compile(
+    r'data-gno="(\d+)".*?<img[^>]*src="([^"]+)".*?<a[^>]*href="([^"]+)"[^>]*>([^<]+)</a>.*?\$(\d+(?:,\d+)?)',
+    re.DOTALL
+)
+
+RUTEN_HOSTS = ('find.ruten.com.tw', 'class.ruten.com.tw')
+SHOPEE_HOSTS = ('shopee.tw',)
+
+
+def load_pages(cassette_dir: str, hosts) -> List[bytes]:
+    """Recorded response bodies whose URL host is one of hosts"""
+    pages = []
+    for root, _, files in os.walk(cassette_dir):
+        for name in files:
+            if not name.endswith('.json'):
+                continue
+            meta_path = os.path.join(root, name)
+            with open(meta_path, encoding='utf-8') as f:
+                url = json.load(f).get('url', '')
+            if any(f"//{host}/" in url for host in hosts):
+                recorded = load_recording(meta_path, meta_path[:-len('.json')] + '.body')
+                if recorded is not None and recorded[0] == 200:
+                    pages.append(recorded[2])
+    return pages
+
+
+def timed(fn: Callable, pages: List, repeat: int) -> Dict:
+    """Best of repeat runs over all pages"""
+    best = None
+    items = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = sum(len(fn(page)) for page in pages)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {'seconds': best, 'items': items}
+
+
+def report(name: str, old: Dict, new: Dict, unit: str = 'items'):
+    speedup = old['seconds'] / new['seconds'] if new['seconds'] else float('inf')
+    print(
+        f"{name:<16} old {old['seconds'] * 1000:9.1f} ms ({old[unit]} {unit})   "
+        f"new {new['seconds'] * 1000:9.1f} ms ({new[unit]} {unit})   x{speedup:.1f}"
+    )
+
+
+def split_prices(html: str) -> str:
+    """Price split across tags (<b>$</b><b>1,280</b>), as on the current Ruten markup"""
+    return re.sub(r'<strong>\$([\d,]+)</strong>', r'<b>$</b><b>\1</b>', html)
+
+
+def bench_ruten(args):
+    if args.cassette_dir:
+        pages = [page.decode('utf-8', 'replace') for page in load_pages(args.cassette_dir, RUTEN_HOSTS)]
+        if not pages:
+            print("ruten: no recorded pages")
+            return
+        report(f"ruten x{len(pages)}", timed(LEGACY_RUTEN_PATTERN.findall, pages, args.repeat),
+               timed(RutenListingParser.parse, pages, args.repeat))
+        return
+
+    pages = [_ruten_html(f"keyword{i}", 0, args.items_per_page) for i in range(args.pages)]
+    report(f"ruten x{len(pages)}", timed(LEGACY_RUTEN_PATTERN.findall, pages, args.repeat),
+           timed(RutenListingParser.parse, pages, args.repeat))
+
+    # The old regex backtracks across the whole page when no price follows "$":
+    # kept to small pages, it does not finish on full-size ones
+    pages = [split_prices(_ruten_html(f"keyword{i}", 0, 20)) for i in range(5)]
+    report(f"ruten split x{len(pages)}", timed(LEGACY_RUTEN_PATTERN.findall, pages, 1),
+           timed(RutenListingParser.parse, pages, args.repeat))
+
+
+def json_loads_name() -> str:
+    return 'orjson' if parsing.json_loads is not json.loads else 'json (orjson not installed)'
+
+
+def legacy_shopee_items(payload: bytes) -> List[dict]:
+    """json.loads of the whole response, then the item_basic of each item (before user-030)"""
+    data = json.loads(payload)
+    return [item.get('item_basic', {}) for item in data.get('items', [])]
+
+
+def bench_shopee(args):
+    if args.cassette_dir:
+        pages = [page for page in load_pages(args.cassette_dir, SHOPEE_HOSTS) if page.startswith(b'{')]
+    else:
+        pages = [
+            json.dumps(
+                {'items': [{'item_basic': _shopee_item(f"keyword{i}", n)} for n in range(args.items_per_page)]},
+                ensure_ascii=False
+            ).encode()
+            for i in range(args.pages)
+        ]
+    if not pages:
+        print("shopee: no recorded pages")
+        return
+    report(f"shopee x{len(pages)}", timed(legacy_shopee_items, pages, args.repeat),
+           timed(lambda page: decode_shopee_items(page, item_key='item_basic'), pages, args.repeat))
+    print(f"{'':16} decoder: {json_loads_name()}")
+
+
+@dataclass
+class LegacyListing:
+    """ProductListing before user-031: per-instance dict, ISO timestamp, raw_data dict"""
+    id: str
+    platform: str
+    title: str
+    url: str
+    thumbnail_url: str
+    price: float
+    currency: str = 'TWD'
+    seller_id: str = ''
+    seller_name: str = ''
+    seller_url: str = ''
+    sales_count: int = 0
+    rating: Optional[float] = None
+    review_count: int = 0
+    location: str = ''
+    shipping_info: str = ''
+    scraped_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    raw_data: Dict = field(default_factory=dict)
+
+
+def shopee_listing_fields(item: dict) -> Dict:
+    shop_id = str(item['shopid'])
+    return {
+        'id': f"shopee_{item['itemid']}",
+        'platform': 'shopee',
+        'title': item['name'],
+        'url': f"https://shopee.tw/product/{shop_id}/{item['itemid']}",
+        'thumbnail_url': f"https://down-tw.img.susercontent.com/file/{item['image']}_tn",
+        'price': item['price'] / 100000,
+        'seller_id': shop_id,
+        'seller_name': item['shop_name'],
+        'seller_url': f"https://shopee.tw/shop/{shop_id}",
+        'sales_count': item['sold'],
+        'location': item['shop_location']
+    }
+
+
+def retained_listings(cls, payloads: List[bytes]) -> Dict:
+    """Decode every page into listings; memory still held once the payloads are dropped"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    listings = [
+        cls(**shopee_listing_fields(item))
+        for payload in payloads
+        for item in decode_shopee_items(payload, item_key='item_basic')
+    ]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': elapsed, 'MB': round(current / 1e6, 1), 'items': len(listings)}
+
+
+def bench_memory(args):
+    count = args.pages * args.items_per_page * 10
+    payloads = [
+        json.dumps(
+            {'items': [{'item_basic': _shopee_item(f"keyword{i}", n)} for n in range(1000)]},
+            ensure_ascii=False
+        ).encode()
+        for i in range(count // 1000)
+    ]
+    old = retained_listings(LegacyListing, payloads)
+    new = retained_listings(ProductListing, payloads)
+    report(f"listings x{new['items']}", old, new, unit='MB')
+
+
+BENCHES = {
+    'ruten': bench_ruten,
+    'shopee': bench_shopee,
+    'memory': bench_memory
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawler parsing benchmark (old vs current)")
+    parser.add_argument('--cassette-dir', default=None, help='Recorded responses (default: stand-in pages)')
+    parser.add_argument('--pages', type=int, default=50, help='Generated pages per platform')
+    parser.add_argument('--items-per-page', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', choices=sorted(BENCHES), action='append')
+    args = parser.parse_args()
+
+    for name in args.only or BENCHES:
+        BENCHES[name](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Cancellation
+取消權杖 - 手動取消或超過期限 (deadline) 時，持有權杖的工作應儘快停止
+
+長時間工作 (掃描) 在等待 I/O 時以 wait() 監看權杖，觸發後取消自己的 asyncio task，
+讓 HTTP 連線、下載與比對 worker 在有限時間內釋放；迴圈中也可以 cancelled 主動檢查。
+"""
+import asyncio
+import time
+from typing import Optional
+
+
+CANCELLED = 'cancelled'
+DEADLINE = 'deadline'
+
+
+class Cancelled(Exception):
+    """Work stopped by its CancelToken (reason: 'cancelled', 'deadline' or the caller's reason)"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancelToken:
+    """
+    Cancellation flag with an optional deadline
+
+    Args:
+        deadline: Wall-clock time (time.time()) after which the token counts as cancelled
+    """
+
+    def __init__(self, deadline: Optional[float] = None):
+        self.deadline = deadline
+        self.reason: Optional[str] = None
+        self._event = asyncio.Event()
+
+    def cancel(self, reason: str = CANCELLED):
+        if self.reason is None:
+            self.reason = reason
+        self._event.set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline (None without one)"""
+        return None if self.deadline is None else self.deadline - time.time()
+
+    @property
+    def cancelled(self) -> bool:
+        if self.reason is None and self.deadline is not None and time.time() >= self.deadline:
+            self.cancel(DEADLINE)
+        return self.reason is not None
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise Cancelled(self.reason)
+
+    async def wait(self):
+        """Return once the token is cancelled or its deadline passes"""
+        while not self.cancelled:
+            remaining = self.remaining()
+            try:
+                await asyncio.wait_for(self._event.wait(), None if remaining is None else max(remaining, 0))
+            except asyncio.TimeoutError:
+                pass
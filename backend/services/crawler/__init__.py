@@ -7,6 +7,12 @@ from .shopee import ShopeeCrawler
 from .ruten import RutenCrawler
 from .yahoo import YahooCrawler
 from .manager import CrawlerManager
+from .progress import ScanProgress
+from .store import ListingStore
+from .planner import PagePlanner
+from .frontier import SellerFrontier
+from .transport import CassetteTransport, RedirectTransport, build_transport
+from .synthetic import SyntheticCatalog, SyntheticImageTransport
 
 __all__ = [
     'BaseCrawler',
@@ -15,5 +21,14 @@ __all__ = [
     'ShopeeCrawler',
     'RutenCrawler',
     'YahooCrawler',
-    'CrawlerManager'
+    'CrawlerManager',
+    'ScanProgress',
+    'ListingStore',
+    'PagePlanner',
+    'SellerFrontier',
+    'CassetteTransport',
+    'RedirectTransport',
+    'build_transport',
+    'SyntheticCatalog',
+    'SyntheticImageTransport'
 ]
@@ -3,18 +3,28 @@ Base Crawler Class
 爬蟲基礎類別 - 使用 httpx 進行簡單爬蟲
 """
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from dataclasses import dataclass, field, fields
+from typing import List, Optional, Dict, Any, AsyncIterator, Callable, Tuple
 from datetime import datetime
 import asyncio
 import random
+import sys
+import time
 from loguru import logger
 import httpx
 
+from ..image_compare.fetch import fetch_image
 
-@dataclass
+
+@dataclass(slots=True)
 class ProductListing:
-    """商品列表資料結構"""
+    """
+    商品列表資料結構
+
+    大量爬取時會同時存在數十萬筆，因此使用 __slots__ (無 per-instance dict)、
+    平台與賣家字串 intern 共用、時間存 epoch 秒數，raw_data 預設不配置。
+    對外輸出請用 to_dict()。
+    """
     id: str
     platform: str
     title: str
@@ -30,8 +40,38 @@ class ProductListing:
     review_count: int = 0
     location: str = ''
     shipping_info: str = ''
-    scraped_at: str = field(default_factory=lambda: datetime.now().isoformat())
-    raw_data: Dict = field(default_factory=dict)
+    scraped_at: int = field(default_factory=lambda: int(time.time()))
+    raw_data: Optional[Dict] = None
+
+    def __post_init__(self):
+        # Values repeated across many listings share one string object
+        self.platform = _intern(self.platform)
+        self.currency = _intern(self.currency)
+        self.seller_id = _intern(self.seller_id)
+        self.seller_name = _intern(self.seller_name)
+        self.location = _intern(self.location)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready dict (scraped_at as ISO string)"""
+        data = {name: getattr(self, name) for name in _LISTING_FIELDS}
+        data['scraped_at'] = datetime.fromtimestamp(self.scraped_at).isoformat()
+        data['raw_data'] = self.raw_data or {}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ProductListing':
+        """Listing back from to_dict() output (scraped_at reset, raw_data dropped)"""
+        return cls(**{
+            name: value for name, value in data.items()
+            if name in _LISTING_FIELDS and name not in ('scraped_at', 'raw_data')
+        })
+
+
+_LISTING_FIELDS = tuple(f.name for f in fields(ProductListing))
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
 
 
 @dataclass
@@ -60,7 +100,10 @@ class BaseCrawler(ABC):
         delay_min: float = 1.0,
         delay_max: float = 3.0,
         timeout: int = 30,
-        max_retries: int = 3
+        max_retries: int = 3,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        synthetic: Optional[Any] = None,
+        live_search: bool = False
     ):
         self.platform_name = platform_name
         self.base_url = base_url
@@ -68,6 +111,12 @@ class BaseCrawler(ABC):
         self.delay_max = delay_max
         self.timeout = timeout
         self.max_retries = max_retries
+        # Custom transport (record/replay, local stand-in); None = live sites
+        self.transport = transport
+        # SyntheticCatalog: serve generated listings instead of the real site
+        self.synthetic = synthetic
+        # Keyword search requests the site (through transport); False = simulated results
+        self.live_search = live_search
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -79,10 +128,18 @@ class BaseCrawler(ABC):
         delay = random.uniform(self.delay_min, self.delay_max)
         await asyncio.sleep(delay)
 
+    def _client(self, timeout: Optional[float] = None) -> httpx.AsyncClient:
+        """HTTP client using this crawler's headers and transport"""
+        return httpx.AsyncClient(
+            timeout=timeout or self.timeout,
+            headers=self.headers,
+            transport=self.transport
+        )
+
     async def fetch(self, url: str) -> Optional[str]:
         """Fetch URL content"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout, headers=self.headers) as client:
+            async with self._client() as client:
                 response = await client.get(url)
                 response.raise_for_status()
                 return response.text
@@ -91,6 +148,66 @@ class BaseCrawler(ABC):
             return None
 
     @abstractmethod
+    async def search_page(
+        self,
+        keyword: str,
+        page: int,
+        page_size: int = 50
+    ) -> List[ProductListing]:
+        """Fetch and parse a single search result page (page is 0-based)"""
+        pass
+
+    async def _iter_pages(
+        self,
+        keyword: str,
+        max_pages: int,
+        max_results: int,
+        next_page: Optional[Callable[[int, List[ProductListing]], bool]] = None
+    ) -> AsyncIterator[Tuple[int, List[ProductListing]]]:
+        """
+        Yield (page, listings) until pages run out, max_results is reached
+        or next_page(page, listings) returns False
+        """
+        remaining = max_results
+        if remaining <= 0:
+            return
+        for page in range(max_pages):
+            if self.synthetic is not None:
+                listings = self.synthetic.search_page(self.platform_name, keyword, page)
+            else:
+                if page > 0 and self.live_search:
+                    await self.random_delay()
+                listings = await self.search_page(keyword, page)
+            if not listings:
+                break
+
+            listings = listings[:remaining]
+            remaining -= len(listings)
+            yield page, listings
+
+            if next_page is not None and not next_page(page, listings):
+                break
+            if remaining <= 0:
+                break
+
+    async def search_stream(
+        self,
+        keyword: str,
+        max_pages: int = 5,
+        max_results: int = 100,
+        next_page: Optional[Callable[[int, List[ProductListing]], bool]] = None
+    ) -> AsyncIterator[ProductListing]:
+        """
+        Search for products, yielding listings page by page as they are parsed
+
+        Consumers can start working on the first page while later pages
+        are still being fetched. next_page(page, listings) is called after
+        each page has been consumed; returning False stops the search.
+        """
+        async for _, listings in self._iter_pages(keyword, max_pages, max_results, next_page):
+            for listing in listings:
+                yield listing
+
     async def search(
         self,
         keyword: str,
@@ -98,7 +215,31 @@ class BaseCrawler(ABC):
         max_results: int = 100
     ) -> CrawlerResult:
         """Search for products"""
-        pass
+        start_time = time.time()
+        listings: List[ProductListing] = []
+        errors: List[str] = []
+        pages_scraped = 0
+
+        logger.info(f"{self.platform_name} search for: {keyword}")
+
+        try:
+            async for _, page_listings in self._iter_pages(keyword, max_pages, max_results):
+                listings.extend(page_listings)
+                pages_scraped += 1
+        except Exception as e:
+            logger.error(f"{self.platform_name} search error: {e}")
+            errors.append(str(e))
+
+        return CrawlerResult(
+            platform=self.platform_name,
+            keyword=keyword,
+            total_found=len(listings),
+            listings=listings,
+            pages_scraped=pages_scraped,
+            duration_ms=int((time.time() - start_time) * 1000),
+            errors=errors,
+            success=not errors
+        )
 
     @abstractmethod
     async def get_product_details(self, product_url: str) -> Optional[ProductListing]:
@@ -115,12 +256,15 @@ class BaseCrawler(ABC):
         pass
 
     async def download_image(self, image_url: str) -> Optional[bytes]:
-        """Download image from URL"""
+        """
+        Download image from URL
+
+        Streams with a byte cap and checks the header (format, pixel size)
+        before the body is read, see image_compare.fetch.
+        """
         try:
-            async with httpx.AsyncClient(timeout=30, headers=self.headers) as client:
-                response = await client.get(image_url)
-                response.raise_for_status()
-                return response.content
+            async with self._client(timeout=30) as client:
+                return await fetch_image(image_url, client)
         except Exception as e:
             logger.error(f"Failed to download image {image_url}: {e}")
             return None
@@ -0,0 +1,236 @@
+"""
+Listing Deduplication
+跨關鍵字、跨平台商品去重 - 以 (platform, id) 及標準化圖片網址合併重複商品，
+下載後再以內容雜湊與近似 pHash 將同一張圖的不同網址合併成群集
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .base import ProductListing
+
+
+# Image CDN hosts that serve the same files under different names
+IMAGE_HOST_ALIASES = {
+    'cf.shopee.tw': 'down-tw.img.susercontent.com',
+    'down-tw.img.susercontent.com': 'down-tw.img.susercontent.com',
+}
+
+# Size suffixes appended to an image file name (e.g. Shopee `<hash>_tn`)
+IMAGE_SIZE_SUFFIXES = ('_tn',)
+
+
+def canonical_image_url(url: str) -> str:
+    """
+    Normalize an image URL so copies of the same file compare equal
+
+    Drops scheme, query string and fragment, lowercases the host,
+    folds CDN host aliases and strips size suffixes.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    host = IMAGE_HOST_ALIASES.get(host, host)
+
+    path = parts.path
+    for suffix in IMAGE_SIZE_SUFFIXES:
+        if path.endswith(suffix):
+            path = path[:-len(suffix)]
+            break
+
+    return f"{host}{path}"
+
+
+@dataclass
+class ListingRecord:
+    """去重後的單一商品與找到它的關鍵字"""
+    listing: ProductListing
+    keywords: List[str] = field(default_factory=list)
+    image_key: str = ''                 # canonical image URL of this listing
+    image_hash: Optional[str] = None    # own pHash when merged into another image's cluster
+    _listing_dict: Optional[Dict] = field(default=None, repr=False)
+
+    def listing_dict(self) -> Dict:
+        """Serialized listing, built once and shared by all of its violations"""
+        if self._listing_dict is None:
+            self._listing_dict = self.listing.to_dict()
+        return self._listing_dict
+
+
+@dataclass
+class ImageGroup:
+    """
+    共用同一張圖片的商品
+    第一個成員負責下載與比對，比對結果套用到所有成員
+    """
+    canonical_url: str
+    members: List[ListingRecord] = field(default_factory=list)
+    matches: List[Dict] = field(default_factory=list)
+    phash: Optional[str] = None
+    pending: int = 0          # candidates still being verified
+    compared: bool = False    # compare stage finished for this image
+    finalized: bool = False   # every verdict is in
+
+    @property
+    def representative(self) -> ListingRecord:
+        return self.members[0]
+
+
+class ListingDeduplicator:
+    """
+    Deduplicate listings before comparison
+    同一商品只保留一筆 (記錄所有關鍵字)，同一圖片只下載、比對一次
+    """
+
+    def __init__(self):
+        self._records: Dict[Tuple[str, str], ListingRecord] = {}
+        self._groups: Dict[str, ImageGroup] = {}
+        self._merged_hashes: Dict[str, Optional[str]] = {}
+        self.duplicate_listings = 0
+        self.duplicate_images = 0
+
+    def add(self, listing: ProductListing, keyword: str) -> Tuple[Optional[ListingRecord], Optional[ImageGroup], bool]:
+        """
+        Register a crawled listing
+
+        Returns:
+            Tuple of (record, group, is_new_image):
+            - record is None when the listing was already seen (keyword is recorded)
+            - group is None when the listing has no image
+            - is_new_image is True when this listing should be downloaded and compared
+        """
+        key = (listing.platform, listing.id)
+        record = self._records.get(key)
+        if record is not None:
+            self.duplicate_listings += 1
+            if keyword not in record.keywords:
+                record.keywords.append(keyword)
+            return None, None, False
+
+        record = ListingRecord(listing=listing, keywords=[keyword])
+        self._records[key] = record
+
+        if not listing.thumbnail_url:
+            return record, None, False
+
+        canonical = canonical_image_url(listing.thumbnail_url)
+        record.image_key = canonical
+        group = self._groups.get(canonical)
+        if group is not None:
+            self.duplicate_images += 1
+            record.image_hash = self._merged_hashes.get(canonical)
+            group.members.append(record)
+            return record, group, False
+
+        group = ImageGroup(canonical_url=canonical, members=[record])
+        self._groups[canonical] = group
+        return record, group, True
+
+    def merge(self, group: ImageGroup, into: ImageGroup):
+        """
+        Fold an image group into the representative of its cluster
+
+        Members keep their own image URL and hash (for the listing store);
+        later listings with the merged URL join `into` directly.
+        """
+        for record in group.members:
+            record.image_hash = group.phash
+        into.members.extend(group.members)
+        group.members = []
+        self._groups[group.canonical_url] = into
+        self._merged_hashes[group.canonical_url] = group.phash
+
+    def stats(self) -> Dict:
+        return {
+            'unique_listings': len(self._records),
+            'unique_images': len(self._groups),
+            'duplicate_listings': self.duplicate_listings,
+            'duplicate_images': self.duplicate_images
+        }
+
+
+@dataclass
+class ImageCluster:
+    """內容相同或近乎相同的圖片 (不同網址)，只比對代表圖"""
+    representative: ImageGroup
+    phash: str
+    images: int = 1
+    exact: int = 0
+    near: int = 0
+
+
+class ImageClusterIndex:
+    """
+    Cluster downloaded images by exact content hash and near-identical pHash
+
+    Near-identical means a Hamming distance of at most max_distance bits to
+    the cluster representative. The hash is split into max_distance + 1
+    bands: two hashes that close must agree on at least one whole band, so
+    only clusters sharing a band are checked.
+
+    The default of 7 bits is for the 256-bit hashes of PHashComparator
+    (hash_size 16), about 2.7% of the bits. The image-guardian backend uses
+    3 bits of a 64-bit hash (about 4.7%). This one is kept stricter on
+    purpose: a merged image inherits its representative's verdict, so a
+    false merge hides a match instead of adding a comparison.
+    """
+
+    def __init__(self, max_distance: int = 7):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.clusters: List[ImageCluster] = []
+        self._by_digest: Dict[str, ImageCluster] = {}
+        self._by_band: Dict[Tuple[int, str], List[ImageCluster]] = {}
+
+    def _band_keys(self, phash: str) -> List[Tuple[int, str]]:
+        width = max(1, len(phash) // self.bands)
+        return [(band, phash[band * width:(band + 1) * width]) for band in range(self.bands)]
+
+    def assign(self, group: ImageGroup, digest: Optional[str], phash: str) -> Tuple[ImageCluster, bool]:
+        """
+        Place an image group in a cluster
+
+        Returns:
+            (cluster, is_new) - is_new is True when group became a representative
+        """
+        cluster = self._by_digest.get(digest) if digest else None
+        if cluster is not None:
+            cluster.images += 1
+            cluster.exact += 1
+            return cluster, False
+
+        value = int(phash, 16)
+        band_keys = self._band_keys(phash)
+        for key in band_keys:
+            for cluster in self._by_band.get(key, ()):
+                if (value ^ int(cluster.phash, 16)).bit_count() <= self.max_distance:
+                    cluster.images += 1
+                    cluster.near += 1
+                    if digest:
+                        self._by_digest[digest] = cluster
+                    return cluster, False
+
+        cluster = ImageCluster(representative=group, phash=phash)
+        self.clusters.append(cluster)
+        if digest:
+            self._by_digest[digest] = cluster
+        for key in band_keys:
+            self._by_band.setdefault(key, []).append(cluster)
+        return cluster, True
+
+    def stats(self, top: int = 10) -> Dict:
+        merged = [cluster for cluster in self.clusters if cluster.images > 1]
+        merged.sort(key=lambda cluster: len(cluster.representative.members), reverse=True)
+        return {
+            'images': sum(cluster.images for cluster in self.clusters),
+            'clusters': len(self.clusters),
+            'merged_exact': sum(cluster.exact for cluster in self.clusters),
+            'merged_near': sum(cluster.near for cluster in self.clusters),
+            'largest': [
+                {
+                    'representative': cluster.representative.representative.listing.id,
+                    'images': cluster.images,
+                    'listings': len(cluster.representative.members)
+                }
+                for cluster in merged[:top]
+            ]
+        }
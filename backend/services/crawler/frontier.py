@@ -0,0 +1,141 @@
+"""
+Seller Expansion Frontier
+賣家擴展佇列 - 商品被判定侵權後，依命中可能性排序追查該賣家的其他商品
+
+優先度 = violation_weight × 賣家侵權次數 (歷史 + 本次掃描) + log(1 + 被標記商品的銷量)
+已造訪的網址 (搜尋結果商品、賣場) 不會再送出請求。
+"""
+import heapq
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .base import ProductListing
+
+
+@dataclass(order=True)
+class SellerTask:
+    """待爬取的賣家 (heap 依 sort_key 排序)"""
+    sort_key: float
+    seq: int
+    platform: str = field(compare=False)
+    seller_id: str = field(compare=False)
+    seller_url: str = field(compare=False, default='')
+    priority: float = field(compare=False, default=0.0)
+
+
+class SellerFrontier:
+    """
+    Priority queue of sellers to expand
+
+    Args:
+        seller_history: Known violations per (platform, seller_id) from earlier scans
+        max_sellers: Sellers expanded per scan
+        violation_weight: Priority per violation, relative to log(1 + sales_count)
+    """
+
+    def __init__(
+        self,
+        seller_history: Optional[Dict[Tuple[str, str], int]] = None,
+        max_sellers: int = 20,
+        violation_weight: float = 10.0
+    ):
+        self.seller_history = dict(seller_history or {})
+        self.max_sellers = max_sellers
+        self.violation_weight = violation_weight
+
+        self._heap: List[SellerTask] = []
+        self._seq = 0
+        self._violations: Dict[Tuple[str, str], int] = {}
+        self._sales: Dict[Tuple[str, str], int] = {}
+        self._flagged: Set[Tuple[str, str]] = set()
+        self._queued: Set[Tuple[str, str]] = set()
+        self._expanded: Set[Tuple[str, str]] = set()
+        self._visited: Set[str] = set()
+        self._from_sellers: Set[Tuple[str, str]] = set()
+
+        self.urls_skipped = 0
+        self.listings_from_sellers = 0
+        self.violations_from_sellers = 0
+
+    def priority(self, platform: str, seller_id: str) -> float:
+        key = (platform, seller_id)
+        violations = self.seller_history.get(key, 0) + self._violations.get(key, 0)
+        return self.violation_weight * violations + math.log1p(self._sales.get(key, 0))
+
+    def flag(self, listing: ProductListing):
+        """A listing was judged infringing: (re)queue its seller"""
+        listing_key = (listing.platform, listing.id)
+        if listing_key in self._flagged:
+            return
+        self._flagged.add(listing_key)
+        if listing_key in self._from_sellers:
+            self.violations_from_sellers += 1
+
+        if not listing.seller_id:
+            return
+        key = (listing.platform, listing.seller_id)
+        self._violations[key] = self._violations.get(key, 0) + 1
+        self._sales[key] = max(self._sales.get(key, 0), listing.sales_count or 0)
+        if key in self._expanded:
+            return
+
+        # Re-pushed with the new priority; the stale entry is skipped on pop
+        priority = self.priority(*key)
+        self._seq += 1
+        heapq.heappush(self._heap, SellerTask(
+            sort_key=-priority,
+            seq=self._seq,
+            platform=listing.platform,
+            seller_id=listing.seller_id,
+            seller_url=listing.seller_url,
+            priority=priority
+        ))
+        self._queued.add(key)
+
+    def restore(self, expanded: Iterable[Tuple[str, str]]):
+        """Sellers already expanded before a resumed scan was interrupted"""
+        self._expanded.update((platform, seller_id) for platform, seller_id in expanded)
+
+    def visit(self, url: str) -> bool:
+        """Mark a URL visited; False if it was already"""
+        if not url:
+            return True
+        if url in self._visited:
+            self.urls_skipped += 1
+            return False
+        self._visited.add(url)
+        return True
+
+    def admit(self, listing: ProductListing) -> bool:
+        """Seller listing not seen yet in this scan (counted for the hit rate)"""
+        if not self.visit(listing.url):
+            return False
+        self._from_sellers.add((listing.platform, listing.id))
+        self.listings_from_sellers += 1
+        return True
+
+    def pop_batch(self) -> List[SellerTask]:
+        """Queued sellers in priority order, within the remaining seller budget"""
+        batch = []
+        while self._heap and len(self._expanded) < self.max_sellers:
+            task = heapq.heappop(self._heap)
+            key = (task.platform, task.seller_id)
+            if key in self._expanded or task.priority != self.priority(*key):
+                continue
+            if task.seller_url and not self.visit(task.seller_url):
+                continue
+            self._expanded.add(key)
+            batch.append(task)
+        return batch
+
+    def stats(self) -> Dict:
+        return {
+            'sellers_flagged': len(self._queued),
+            'sellers_expanded': len(self._expanded),
+            'listings_from_sellers': self.listings_from_sellers,
+            'violations_from_sellers': self.violations_from_sellers,
+            'hit_rate': round(self.violations_from_sellers / self.listings_from_sellers, 4)
+            if self.listings_from_sellers else None,
+            'urls_skipped': self.urls_skipped
+        }
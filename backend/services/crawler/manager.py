@@ -3,29 +3,21 @@ Crawler Manager
 爬蟲管理器 - 統一管理多平台爬蟲
 """
 import asyncio
-from typing import List, Dict, Optional
-from dataclasses import dataclass, field
-from datetime import datetime
+from typing import Callable, List, Dict, Optional
 from loguru import logger
+import httpx
 
 from .base import ProductListing, CrawlerResult
 from .shopee import ShopeeCrawler
 from .ruten import RutenCrawler
 from .yahoo import YahooCrawler
-
-
-@dataclass
-class ScanProgress:
-    """掃描進度"""
-    task_id: str
-    status: str  # 'queued', 'running', 'completed', 'failed'
-    progress: int  # 0-100
-    message: str
-    platforms_completed: List[str] = field(default_factory=list)
-    total_scanned: int = 0
-    violations_found: int = 0
-    started_at: Optional[str] = None
-    completed_at: Optional[str] = None
+from ..cancel import CancelToken
+from .scan import ScanJob, DEFAULT_QUEUE_SIZE
+from .progress import ScanProgress
+from .store import ListingStore
+from .planner import PagePlanner
+from .frontier import SellerFrontier
+from .synthetic import SyntheticCatalog, SyntheticImageTransport
 
 
 class CrawlerManager:
@@ -34,11 +26,31 @@ class CrawlerManager:
     統一管理蝦皮、露天、Yahoo 爬蟲
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        synthetic: Optional[SyntheticCatalog] = None,
+        synthetic_images_in_memory: bool = True,
+        live_search: bool = False
+    ):
+        """
+        Args:
+            transport: HTTP transport shared by all crawlers
+                (see transport.build_transport); None = live sites
+            synthetic: Generate listings from this catalog instead of crawling
+            synthetic_images_in_memory: Render synthetic thumbnails in-process;
+                False leaves them to the transport (e.g. the local stand-in)
+            live_search: Shopee/Ruten keyword search requests the site through
+                transport; False returns simulated search results
+        """
+        self.synthetic = synthetic
+        if synthetic is not None and synthetic_images_in_memory:
+            transport = SyntheticImageTransport(synthetic, wrapped=transport)
+
         self.crawlers = {
-            'shopee': ShopeeCrawler(),
-            'ruten': RutenCrawler(),
-            'yahoo': YahooCrawler()
+            'shopee': ShopeeCrawler(transport=transport, synthetic=synthetic, live_search=live_search),
+            'ruten': RutenCrawler(transport=transport, synthetic=synthetic, live_search=live_search),
+            'yahoo': YahooCrawler(transport=transport, synthetic=synthetic, live_search=live_search)
         }
         self._progress_callbacks: Dict[str, callable] = {}
 
@@ -113,11 +125,27 @@ class CrawlerManager:
         similarity_threshold: float = 70.0,
         max_pages: int = 5,
         max_results_per_platform: int = 50,
-        on_progress: callable = None
+        on_progress: callable = None,
+        stage_workers: Optional[Dict[str, int]] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        listing_store: Optional[ListingStore] = None,
+        page_planner: Optional[PagePlanner] = None,
+        seller_frontier: Optional[SellerFrontier] = None,
+        max_seller_products: int = 50,
+        violation_sink: Optional[Callable] = None,
+        cancel_token: Optional[CancelToken] = None,
+        on_checkpoint: Optional[Callable] = None,
+        checkpoint_searches: int = 0,
+        checkpoint: Optional[Dict] = None,
+        restored_violations: Optional[List[Dict]] = None
     ) -> Dict:
         """
         Scan platforms and compare images
 
+        Listings flow through a bounded pipeline
+        (crawl → dedupe → download → hash → compare → verify → sink),
+        so every stage runs concurrently and memory stays bounded.
+
         Args:
             asset_images: Original images to protect
             keywords: Search keywords
@@ -125,95 +153,59 @@ class CrawlerManager:
             similarity_threshold: Minimum similarity to flag
             max_pages: Max pages per platform
             max_results_per_platform: Max results per platform
-            on_progress: Progress callback
+            on_progress: Progress callback, called as
+                on_progress(progress, message, stages=..., telemetry=...) (sync or
+                async); telemetry is ScanProgress.telemetry(): listings / images /
+                comparisons / bytes per second, per-platform completion and ETA
+            stage_workers: Worker count per stage (overrides defaults)
+            queue_size: Max items waiting in front of each stage
+            listing_store: Persistent listing store; when given, listings
+                whose image is unchanged since the last scan are skipped
+            page_planner: Adaptive paging; when given, max_pages is the base
+                budget per search and low-yield searches stop early
+            seller_frontier: Seller expansion; when given, the shops of
+                flagged sellers are crawled after the keyword searches
+            max_seller_products: Listings fetched per expanded seller
+            violation_sink: Called with each batch of new violations while the
+                scan runs (sync or async), e.g. to persist results incrementally
+            cancel_token: Cancellation / deadline; when it fires, crawling stops
+                paginating and every stage worker (requests, downloads,
+                comparisons) is cancelled, then Cancelled is raised
+            on_checkpoint: Called with the resume state after every
+                checkpoint_searches searches (default: one keyword on all
+                platforms) and every seller round (sync or async)
+            checkpoint: State from on_checkpoint to resume an interrupted scan;
+                searches and sellers it lists are not repeated
+            restored_violations: Violations handed to violation_sink up to
+                that checkpoint
 
         Returns:
             Dict with scan results and violations
         """
-        from ..image_compare import ImageCompareEngine
-
-        compare_engine = ImageCompareEngine(similarity_threshold=similarity_threshold)
-
-        all_violations = []
-        all_listings = []
-        total_steps = len(keywords) * len(platforms) + len(asset_images)
-        current_step = 0
-
-        # Step 1: Search for products
-        for keyword in keywords:
-            search_results = await self.search_all_platforms(
-                keyword=keyword,
-                platforms=platforms,
-                max_pages=max_pages,
-                max_results_per_platform=max_results_per_platform,
-                on_progress=None  # We'll handle progress ourselves
-            )
-
-            for platform, result in search_results.items():
-                all_listings.extend(result.listings)
-                current_step += 1
-
-                if on_progress:
-                    progress = int((current_step / total_steps) * 60)  # 0-60% for search
-                    on_progress(progress, f"已搜尋 {len(all_listings)} 個商品...")
-
-        # Step 2: Compare images
-        if on_progress:
-            on_progress(60, "開始 AI 圖片比對...")
-
-        for i, asset_image in enumerate(asset_images):
-            current_step += 1
-
-            if on_progress:
-                progress = 60 + int((i / len(asset_images)) * 35)  # 60-95% for comparison
-                on_progress(progress, f"正在比對資產 {i + 1}/{len(asset_images)}...")
-
-            # Compare against all listings
-            for listing in all_listings:
-                if not listing.thumbnail_url:
-                    continue
-
-                try:
-                    result = await compare_engine.compare(
-                        asset_image,
-                        listing.thumbnail_url,
-                        fast_mode=True  # Use fast mode for initial scan
-                    )
-
-                    if result.is_match:
-                        # Do full comparison for potential matches
-                        full_result = await compare_engine.compare(
-                            asset_image,
-                            listing.thumbnail_url,
-                            fast_mode=False
-                        )
-
-                        if full_result.is_match:
-                            all_violations.append({
-                                'listing': listing.__dict__,
-                                'similarity': {
-                                    'overall': full_result.overall_similarity,
-                                    'phash_score': full_result.phash_score,
-                                    'orb_score': full_result.orb_score,
-                                    'color_score': full_result.color_score,
-                                    'level': full_result.similarity_level
-                                },
-                                'asset_image': asset_image if not asset_image.startswith('data:') else '[base64]'
-                            })
-
-                except Exception as e:
-                    logger.debug(f"Error comparing with {listing.url}: {e}")
-
-        if on_progress:
-            on_progress(100, f"掃描完成！發現 {len(all_violations)} 個可疑侵權")
-
-        return {
-            'total_scanned': len(all_listings),
-            'violations_found': len(all_violations),
-            'violations': all_violations,
-            'platforms_searched': platforms,
-            'keywords_used': keywords
-        }
+        job = ScanJob(
+            crawlers=self.crawlers,
+            asset_images=asset_images,
+            keywords=keywords,
+            platforms=platforms,
+            similarity_threshold=similarity_threshold,
+            max_pages=max_pages,
+            max_results_per_platform=max_results_per_platform,
+            stage_workers=stage_workers,
+            queue_size=queue_size,
+            on_progress=on_progress,
+            listing_store=listing_store,
+            synthetic=self.synthetic,
+            page_planner=page_planner,
+            seller_frontier=seller_frontier,
+            max_seller_products=max_seller_products,
+            violation_sink=violation_sink,
+            cancel_token=cancel_token,
+            on_checkpoint=on_checkpoint,
+            checkpoint_searches=checkpoint_searches,
+            checkpoint=checkpoint,
+            restored_violations=restored_violations
+        )
+        return await job.run()
 
     def _get_platform_name(self, platform: str) -> str:
         """Get Chinese name for platform"""
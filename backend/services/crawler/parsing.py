@@ -0,0 +1,90 @@
+"""
+Listing Parsers
+商品列表解析 - 露天搜尋頁/賣場頁 HTML 與蝦皮 API 回應共用的解析實作
+
+爬蟲 (ruten.py / shopee.py) 與基準測試 (scripts/bench_crawler.py) 都從這裡匯入。
+image-guardian-backend 為獨立部署的應用，其 services/crawler.py 保留一份完全相同的
+RutenListingParser，修改時兩邊一起改 (tests/test_parsing.py 會比對兩者)。
+"""
+import json
+import re
+from html import unescape
+from typing import List, Optional, Tuple
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # orjson 為選用套件，未安裝時使用標準庫
+    json_loads = json.loads
+
+
+def decode_shopee_items(payload: bytes, item_key: Optional[str] = None) -> List[dict]:
+    """
+    解碼蝦皮 API 回應，只取出商品資料
+
+    Args:
+        payload: 原始回應內容 (bytes)
+        item_key: 商品資料所在的欄位 (搜尋 API 為 "item_basic")
+
+    Returns:
+        商品資料 dict 列表
+    """
+    data = json_loads(payload)
+    items = data.get('items') or []
+    if item_key:
+        return [item.get(item_key) or {} for item in items]
+    return items
+
+
+class RutenListingParser:
+    """
+    露天商品列表解析器 (搜尋頁與店舖頁共用)
+
+    以 data-gno 屬性切出每張商品卡 (最多 CARD_LIMIT 字元)，再對每張卡套用一個
+    預先編譯的正則：第一張圖片、之後第一個商品連結的文字 (標題)、之後第一個 $價格
+    ($ 與數字可分屬不同標籤)、之後指向賣場 (index00.php?s=) 的連結 (賣家帳號，
+    沒有時為空字串)。每段只用 possessive 重複，不回溯；比對範圍以 pos/endpos
+    限制在單張卡內，整頁為線性時間。
+    """
+
+    # Longest card markup looked at: a card without a price cannot drag the match across the page
+    CARD_LIMIT = 8192
+
+    GNO_PATTERN = re.compile(r'data-gno="?(\d+)')
+    CARD_PATTERN = re.compile(
+        r'[^<]*+(?:<(?!img\b)[^<]*+)*+'
+        r'<img\b[^>]*?\ssrc="([^"]+)"[^>]*>'
+        r'[^<]*+(?:<(?!a\b)[^<]*+|<a\b[^>]*index00\.php[^<]*+)*+'
+        r'<a\b[^>]*?\shref="[^"]*"[^>]*>([^<]*+(?:<(?!/a>)[^<]*+)*+)</a>'
+        r'[^$]*+(?:\$(?!(?:<[^>]*>|\s)*\d)[^$]*+)*+\$(?:<[^>]*>|\s)*+(\d+(?:,\d+)*)'
+        r'(?:[^<]*+(?:<(?!a\b)[^<]*+)*+<a\b[^>]*index00\.php\?(?:[^&"\'>]*&(?:amp;)?)*?s=([^&"\'\s>]+))?'
+    )
+    SELLER_PATTERN = re.compile(r'index00\.php\?(?:[^&"\'>]*&(?:amp;)?)*?s=([^&"\'\s>]+)')
+    TAG_PATTERN = re.compile(r'<[^>]*>')
+
+    @classmethod
+    def parse(cls, html: str) -> List[Tuple[str, str, str, str, str]]:
+        """Return (item_id, image_url, title, price, seller_id) tuples"""
+        bounds = [(match.end(), match.group(1)) for match in cls.GNO_PATTERN.finditer(html)]
+        bounds.append((len(html), None))
+        items = []
+        for (start, item_id), (next_start, _) in zip(bounds, bounds[1:]):
+            end = min(next_start, start + cls.CARD_LIMIT)
+            match = cls.CARD_PATTERN.match(html, start, end)
+            if match is None:
+                continue
+            image_url, title, price, seller_id = match.groups()
+            if '<' in title:
+                title = cls.TAG_PATTERN.sub('', title)
+            if '&' in title:
+                title = unescape(title)
+            title = title.strip()
+            if not title:
+                continue
+            if seller_id is None:
+                # Seller link placed before the title link
+                seller = cls.SELLER_PATTERN.search(html, start, match.start(2))
+                seller_id = seller.group(1) if seller else ''
+            items.append((item_id, image_url, title, price, seller_id))
+
+        return items
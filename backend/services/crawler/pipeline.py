@@ -0,0 +1,150 @@
+"""
+Bounded Stage Pipeline
+有界佇列多階段處理管線 - 每個階段有獨立的 worker 數量與佇列上限
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from loguru import logger
+
+
+# Stage handler: (item, emit) -> None, call `await emit(x)` zero or more times
+StageHandler = Callable[[Any, Callable[[Any], Awaitable[None]]], Awaitable[None]]
+
+_STOP = object()
+
+
+@dataclass
+class StageStats:
+    """階段統計"""
+    name: str
+    workers: int
+    queue_size: int
+    processed: int = 0
+    emitted: int = 0
+    failed: int = 0
+    busy: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    def snapshot(self, queue_depth: int) -> Dict:
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        return {
+            'workers': self.workers,
+            'busy': self.busy,
+            'queue_depth': queue_depth,
+            'queue_size': self.queue_size,
+            'processed': self.processed,
+            'emitted': self.emitted,
+            'failed': self.failed,
+            'throughput': round(self.processed / elapsed, 2)
+        }
+
+
+class Stage:
+    """
+    Pipeline stage
+    從有界佇列取出項目，交給 handler 處理後送往下一階段
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: StageHandler,
+        workers: int = 1,
+        queue_size: int = 100
+    ):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.stats = StageStats(name=name, workers=self.workers, queue_size=self.queue.maxsize)
+
+    def snapshot(self) -> Dict:
+        return self.stats.snapshot(self.queue.qsize())
+
+
+class Pipeline:
+    """
+    Bounded producer/consumer pipeline
+    多階段管線：階段之間以有界 asyncio.Queue 串接，下游滿載時上游自動等待 (backpressure)
+    """
+
+    def __init__(self, stages: List[Stage]):
+        if not stages:
+            raise ValueError("Pipeline requires at least one stage")
+        self.stages = stages
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per-stage queue depth and throughput"""
+        return {stage.name: stage.snapshot() for stage in self.stages}
+
+    async def run(self, items: Iterable[Any]):
+        """
+        Feed items into the first stage and run until every stage drains
+
+        Args:
+            items: Inputs for the first stage
+        """
+        tasks: List[asyncio.Task] = []
+        closers: List[asyncio.Task] = []
+
+        for index, stage in enumerate(self.stages):
+            next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            workers = [
+                asyncio.create_task(self._worker(stage, next_stage))
+                for _ in range(stage.workers)
+            ]
+            tasks.extend(workers)
+            closers.append(asyncio.create_task(self._close_after(workers, next_stage)))
+
+        try:
+            first = self.stages[0]
+            for item in items:
+                await first.queue.put(item)
+            for _ in range(first.workers):
+                await first.queue.put(_STOP)
+
+            await asyncio.gather(*tasks, *closers)
+
+        finally:
+            pending = [task for task in tasks + closers if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                # Cancelled mid-run: wait for the workers to unwind (closing their
+                # connections) and drop queued items so the pipeline can run again
+                await asyncio.gather(*pending, return_exceptions=True)
+                for stage in self.stages:
+                    while not stage.queue.empty():
+                        stage.queue.get_nowait()
+
+    async def _worker(self, stage: Stage, next_stage: Optional[Stage]):
+        async def emit(item: Any):
+            stage.stats.emitted += 1
+            if next_stage is not None:
+                await next_stage.queue.put(item)
+
+        while True:
+            item = await stage.queue.get()
+            if item is _STOP:
+                return
+
+            stage.stats.busy += 1
+            try:
+                await stage.handler(item, emit)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stage.stats.failed += 1
+                logger.debug(f"Pipeline stage '{stage.name}' error: {e}")
+            finally:
+                stage.stats.busy -= 1
+                stage.stats.processed += 1
+
+    async def _close_after(self, workers: List[asyncio.Task], next_stage: Optional[Stage]):
+        """Once every worker of a stage is done, signal the next stage to stop"""
+        await asyncio.gather(*workers)
+        if next_stage is not None:
+            for _ in range(next_stage.workers):
+                await next_stage.queue.put(_STOP)
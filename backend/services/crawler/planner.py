@@ -0,0 +1,147 @@
+"""
+Adaptive Page Planner
+自適應翻頁預算 - 依每個 (關鍵字, 平台) 搜尋的產出決定是否繼續翻頁
+
+固定 max_pages 時，後面幾頁常常只剩已看過的商品。planner 在每頁之後檢查：
+- 這頁的新商品比例 (尚未在本次掃描出現過的商品) 低於 min_new_ratio → 停止翻頁
+- 停止所省下的頁數進入共用額度，仍有產出的搜尋可借用，
+  最多到 max_pages × max_extension 頁 (每個搜尋的 max_results 上限不變)
+
+只用抓取當下就有的訊號：比對階段落後爬取好幾頁，pHash 初篩通過數
+(survivors) 只記錄在統計中，不參與翻頁決定。
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from .base import ProductListing
+
+
+@dataclass
+class SearchBudget:
+    """單一 (關鍵字, 平台) 搜尋的翻頁預算"""
+    keyword: str
+    platform: str
+    base_pages: int
+    granted: int
+    pages: int = 0
+    listings: int = 0
+    new_listings: int = 0
+    last_new_ratio: float = 1.0
+    survivors: int = 0              # reported only: arrives after later pages are fetched
+    stopped: Optional[str] = None   # low_yield | budget | exhausted
+
+    def to_dict(self) -> Dict:
+        return {
+            'keyword': self.keyword,
+            'platform': self.platform,
+            'pages': self.pages,
+            'listings': self.listings,
+            'new_listings': self.new_listings,
+            'survivors': self.survivors,
+            'extra_pages': max(0, self.pages - self.base_pages),
+            'stopped': self.stopped
+        }
+
+
+class PagePlanner:
+    """
+    Shared page budget for one scan
+
+    Args:
+        min_new_ratio: Stop a search once a page has fewer new listings than this
+        min_pages: Pages every search fetches before it can be stopped
+        max_extension: Searches still yielding may grow to max_pages × this
+    """
+
+    def __init__(
+        self,
+        min_new_ratio: float = 0.2,
+        min_pages: int = 1,
+        max_extension: float = 2.0
+    ):
+        self.min_new_ratio = min_new_ratio
+        self.min_pages = max(1, min_pages)
+        self.max_extension = max(1.0, max_extension)
+
+        self.budgets: Dict[Tuple[str, str], SearchBudget] = {}
+        self.pool = 0              # pages donated by stopped searches, not yet borrowed
+        self.pages_budget = 0
+        self.pages_saved = 0       # pages not fetched because the planner stopped a search
+        self._seen: Set[Tuple[str, str]] = set()
+
+    def open(self, keyword: str, platform: str, max_pages: int) -> SearchBudget:
+        """Register a search with its base page budget"""
+        budget = SearchBudget(keyword=keyword, platform=platform, base_pages=max_pages, granted=max_pages)
+        self.budgets[(keyword, platform)] = budget
+        self.pages_budget += max_pages
+        return budget
+
+    def page_limit(self, budget: SearchBudget) -> int:
+        """Upper bound on pages a search may ever fetch"""
+        return max(budget.base_pages, int(budget.base_pages * self.max_extension))
+
+    def record_page(self, budget: SearchBudget, listings: List[ProductListing]):
+        """Count a fetched page and how many of its listings are new to this scan"""
+        new = 0
+        for listing in listings:
+            key = (listing.platform, listing.id)
+            if key not in self._seen:
+                self._seen.add(key)
+                new += 1
+        budget.pages += 1
+        budget.listings += len(listings)
+        budget.new_listings += new
+        budget.last_new_ratio = new / len(listings) if listings else 0.0
+
+    def record_survivor(self, keyword: str, platform: str):
+        """A listing from this search passed the pHash gate (statistics only)"""
+        budget = self.budgets.get((keyword, platform))
+        if budget is not None:
+            budget.survivors += 1
+
+    def next_page(self, budget: SearchBudget) -> bool:
+        """Decide whether the search fetches another page"""
+        if budget.stopped:
+            return False
+        if budget.pages < self.min_pages:
+            return True
+
+        if budget.last_new_ratio < self.min_new_ratio:
+            self._stop(budget, 'low_yield')
+            return False
+
+        if budget.pages < budget.granted:
+            return True
+        if self.pool > 0 and budget.pages < self.page_limit(budget):
+            self.pool -= 1
+            budget.granted += 1
+            return True
+
+        self._stop(budget, 'budget')
+        return False
+
+    def close(self, budget: SearchBudget):
+        """Search ended; unused pages (including borrowed ones) go back to the pool"""
+        if not budget.stopped:
+            self._stop(budget, 'exhausted')
+
+    def _stop(self, budget: SearchBudget, reason: str):
+        budget.stopped = reason
+        unused = max(0, budget.granted - budget.pages)
+        self.pool += unused
+        # Searches that ran out of results or budget were not cut short by the planner
+        if reason == 'low_yield':
+            self.pages_saved += unused
+
+    def stats(self) -> Dict:
+        pages_fetched = sum(budget.pages for budget in self.budgets.values())
+        stopped_low_yield = [b for b in self.budgets.values() if b.stopped == 'low_yield']
+        return {
+            'pages_budget': self.pages_budget,
+            'pages_fetched': pages_fetched,
+            'pages_saved': self.pages_saved,
+            'pages_reallocated': sum(max(0, b.pages - b.base_pages) for b in self.budgets.values()),
+            'searches_stopped_low_yield': len(stopped_low_yield),
+            'searches_extended': sum(1 for b in self.budgets.values() if b.pages > b.base_pages),
+            'searches': [budget.to_dict() for budget in self.budgets.values()]
+        }
@@ -0,0 +1,142 @@
+"""
+Scan Progress
+掃描進度與即時吞吐量 - 每秒商品數、圖片數、比對數、下載量、各平台完成度與預估剩餘時間
+
+速率為指數移動平均 (時間常數 smoothing 秒)，瞬間的快慢不會讓 ETA 大幅跳動。
+預估總商品數 = 已收商品 + 未完成搜尋數 × 已完成搜尋的平均商品數；第一個搜尋完成前
+以每個搜尋的結果上限 (results_per_search) × 搜尋總數估計，一開始就有百分比與 ETA。
+"""
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+# Counters with a moving-average rate (per second)
+RATE_COUNTERS = ('total_scanned', 'listings_done', 'images_downloaded', 'comparisons', 'bytes_downloaded')
+
+
+@dataclass
+class ScanProgress:
+    """掃描進度"""
+    task_id: str = ''
+    status: str = 'queued'  # 'queued', 'running', 'completed', 'failed'
+    progress: int = 0  # 0-100
+    message: str = ''
+    platforms_completed: List[str] = field(default_factory=list)
+    total_scanned: int = 0
+    violations_found: int = 0
+    started_at: Optional[str] = None
+    completed_at: Optional[str] = None
+
+    # Throughput telemetry
+    listings_done: int = 0
+    images_downloaded: int = 0
+    bytes_downloaded: int = 0
+    comparisons: int = 0
+    searches_total: int = 0
+    searches_done: int = 0
+    platforms: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    rates: Dict[str, float] = field(default_factory=dict)
+    expected_listings: Optional[int] = None
+    results_per_search: int = 0  # Result cap per search: expected yield until a search completes
+    eta_seconds: Optional[float] = None
+    smoothing: float = 10.0
+
+    _started: float = field(default_factory=time.monotonic, repr=False)
+    _sampled_at: Optional[float] = field(default=None, repr=False)
+    _previous: Dict[str, int] = field(default_factory=dict, repr=False)
+
+    # ==================== Events ====================
+
+    def _platform(self, platform: str) -> Dict[str, int]:
+        return self.platforms.setdefault(platform, {'searches_total': 0, 'searches_done': 0, 'listings': 0})
+
+    def add_searches(self, platform: str, count: int = 1):
+        self._platform(platform)['searches_total'] += count
+        self.searches_total += count
+        if platform in self.platforms_completed:
+            self.platforms_completed.remove(platform)
+
+    def search_done(self, platform: str):
+        stats = self._platform(platform)
+        stats['searches_done'] += 1
+        self.searches_done += 1
+        if stats['searches_done'] >= stats['searches_total'] and platform not in self.platforms_completed:
+            self.platforms_completed.append(platform)
+
+    def listing_found(self, platform: str):
+        self._platform(platform)['listings'] += 1
+
+    def image_downloaded(self, size: int):
+        self.images_downloaded += 1
+        self.bytes_downloaded += size
+
+    # ==================== Sampling ====================
+
+    def sample(self, now: Optional[float] = None):
+        """Fold the counters since the last sample into the moving-average rates, then ETA and percent"""
+        now = time.monotonic() if now is None else now
+        if self._sampled_at is None:
+            # Baseline: counters present before the first sample (a resumed scan) are not throughput
+            self._previous = {name: getattr(self, name) for name in RATE_COUNTERS}
+            self._sampled_at = now
+        elapsed = now - self._sampled_at
+        if elapsed > 0:
+            weight = 1.0 - math.exp(-elapsed / self.smoothing)
+            for name in RATE_COUNTERS:
+                value = getattr(self, name)
+                rate = (value - self._previous.get(name, 0)) / elapsed
+                previous_rate = self.rates.get(name)
+                self.rates[name] = rate if previous_rate is None else previous_rate + weight * (rate - previous_rate)
+                self._previous[name] = value
+            self._sampled_at = now
+
+        self.expected_listings = None
+        if self.searches_done:
+            # Observed yield of the finished searches
+            remaining = max(self.searches_total - self.searches_done, 0)
+            self.expected_listings = self.total_scanned + round(remaining * self.total_scanned / self.searches_done)
+        elif self.results_per_search and self.searches_total:
+            # Nothing finished yet: every search returning its full result cap (an upper bound)
+            self.expected_listings = max(self.searches_total * self.results_per_search, self.total_scanned)
+
+        self.eta_seconds = None
+        rate = self.rates.get('listings_done') or 0.0
+        if self.expected_listings is not None and rate > 0:
+            self.eta_seconds = round(max(self.expected_listings - self.listings_done, 0) / rate, 1)
+
+        if self.expected_listings:
+            # Never moves backwards (seller rounds add searches late); 100 only when done
+            percent = int(99 * min(self.listings_done / self.expected_listings, 1.0))
+            self.progress = max(self.progress, percent)
+
+    def telemetry(self) -> Dict:
+        """JSON-ready throughput snapshot for progress messages"""
+        return {
+            'elapsed_seconds': round(time.monotonic() - self._started, 1),
+            'listings_per_sec': round(self.rates.get('total_scanned', 0.0), 2),
+            'listings_done_per_sec': round(self.rates.get('listings_done', 0.0), 2),
+            'images_per_sec': round(self.rates.get('images_downloaded', 0.0), 2),
+            'comparisons_per_sec': round(self.rates.get('comparisons', 0.0), 2),
+            'bytes_per_sec': round(self.rates.get('bytes_downloaded', 0.0)),
+            'listings': self.total_scanned,
+            'listings_done': self.listings_done,
+            'expected_listings': self.expected_listings,
+            'images_downloaded': self.images_downloaded,
+            'bytes_downloaded': self.bytes_downloaded,
+            'comparisons': self.comparisons,
+            'violations': self.violations_found,
+            'searches_done': self.searches_done,
+            'searches_total': self.searches_total,
+            'platforms': {
+                platform: {
+                    **stats,
+                    'percent': round(100 * stats['searches_done'] / stats['searches_total'])
+                    if stats['searches_total'] else 0
+                }
+                for platform, stats in self.platforms.items()
+            },
+            'platforms_completed': list(self.platforms_completed),
+            'eta_seconds': self.eta_seconds
+        }
@@ -1,11 +1,12 @@
 """
 Ruten Crawler - 露天拍賣爬蟲 (簡化版)
 """
-import time
 from typing import List, Optional
+
 from loguru import logger
 
-from .base import BaseCrawler, ProductListing, CrawlerResult
+from .base import BaseCrawler, ProductListing
+from .parsing import RutenListingParser
 
 
 class RutenCrawler(BaseCrawler):
@@ -18,20 +19,36 @@ class RutenCrawler(BaseCrawler):
             **kwargs
         )
 
-    async def search(
+    async def search_page(
         self,
         keyword: str,
-        max_pages: int = 5,
-        max_results: int = 100
-    ) -> CrawlerResult:
-        """搜尋露天商品 - 模擬結果"""
-        start_time = time.time()
-        listings = []
-        errors = []
+        page: int,
+        page_size: int = 50
+    ) -> List[ProductListing]:
+        """
+        搜尋露天商品 (搜尋頁 HTML，每頁固定 50 筆，page_size 不適用)；賣家帳號取自商品卡的賣場連結
+        未開啟 live_search 時為模擬結果
+        """
+        if not self.live_search:
+            return self._simulated_page(keyword, page, page_size)
+
+        async with self._client() as client:
+            response = await client.get(
+                'https://find.ruten.com.tw/s/',
+                params={'q': keyword, 'p': page + 1}
+            )
+            response.raise_for_status()
+            items = RutenListingParser.parse(response.text)
+
+        return [self._listing(*item) for item in items]
 
-        logger.info(f"Ruten search for: {keyword}")
+    def _simulated_page(self, keyword: str, page: int, page_size: int) -> List[ProductListing]:
+        """模擬搜尋結果 (只有一頁，沒有賣家帳號)"""
+        if page > 0:
+            return []
 
-        for i in range(min(10, max_results)):
+        listings = []
+        for i in range(min(10, page_size)):
             listings.append(ProductListing(
                 id=f"ruten_{keyword}_{i}",
                 platform='ruten',
@@ -44,21 +61,54 @@ class RutenCrawler(BaseCrawler):
                 location="台灣"
             ))
 
-        duration_ms = int((time.time() - start_time) * 1000)
-
-        return CrawlerResult(
-            platform='ruten',
-            keyword=keyword,
-            total_found=len(listings),
-            listings=listings,
-            pages_scraped=1,
-            duration_ms=duration_ms,
-            errors=errors,
-            success=True
-        )
+        return listings
 
     async def get_product_details(self, product_url: str) -> Optional[ProductListing]:
         return None
 
     async def get_seller_products(self, seller_id: str, max_products: int = 50) -> List[ProductListing]:
-        return []
+        """露天賣家賣場商品 (賣場頁 HTML)"""
+        if self.synthetic is not None:
+            return self.synthetic.seller_listings(self.platform_name, seller_id, max_products)
+
+        listings: List[ProductListing] = []
+        seen = set()
+        async with self._client() as client:
+            page = 1
+            while len(listings) < max_products:
+                try:
+                    response = await client.get(
+                        'https://class.ruten.com.tw/user/index00.php',
+                        params={'s': seller_id, 'p': page}
+                    )
+                    response.raise_for_status()
+                    items = RutenListingParser.parse(response.text)
+                except Exception as e:
+                    logger.error(f"Ruten seller {seller_id} error: {e}")
+                    break
+
+                # Out-of-range pages repeat the last page
+                items = [item for item in items if item[0] not in seen]
+                if not items:
+                    break
+
+                for item in items:
+                    seen.add(item[0])
+                    listings.append(self._listing(*item[:4], seller_id))
+                page += 1
+                await self.random_delay()
+
+        return listings[:max_products]
+
+    def _listing(self, item_id: str, image_url: str, title: str, price: str, seller_id: str) -> ProductListing:
+        return ProductListing(
+            id=f"ruten_{item_id}",
+            platform='ruten',
+            title=title,
+            url=f"https://www.ruten.com.tw/item/show?{item_id}",
+            thumbnail_url=image_url,
+            price=float(price.replace(',', '')),
+            seller_id=seller_id,
+            seller_url=f"https://class.ruten.com.tw/user/index00.php?s={seller_id}" if seller_id else '',
+            location='台灣'
+        )
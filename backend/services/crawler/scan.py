@@ -0,0 +1,674 @@
+"""
+Scan Job
+掃描任務 - 以有界管線串接 crawl → dedupe → download → hash → compare → verify → sink
+(hash 階段將相同或近乎相同的圖片分群，每群只比對代表圖；
+關鍵字搜尋完成後，依優先度追查侵權賣家的其他商品)
+"""
+import asyncio
+import hashlib
+import inspect
+import json
+from dataclasses import dataclass
+
+import numpy as np
+from typing import Callable, Dict, List, Optional
+from loguru import logger
+
+from ..cancel import CancelToken, Cancelled
+from .base import BaseCrawler, ProductListing
+from .dedupe import ListingDeduplicator, ListingRecord, ImageGroup, ImageClusterIndex
+from .frontier import SellerFrontier, SellerTask
+from .pipeline import Pipeline, Stage
+from .planner import PagePlanner
+from .progress import ScanProgress
+from .store import ListingStore
+from .synthetic import SyntheticCatalog
+
+
+# Default worker count per stage
+DEFAULT_STAGE_WORKERS = {
+    'crawl': 4,
+    'dedupe': 1,
+    'download': 8,
+    'hash': 2,
+    'compare': 2,
+    'verify': 2,
+    'sink': 1
+}
+DEFAULT_QUEUE_SIZE = 100
+
+
+@dataclass
+class ScanItem:
+    """管線中的單一商品"""
+    listing: ProductListing
+    keyword: str
+    group: Optional[ImageGroup] = None
+    image_bytes: Optional[bytes] = None
+    phash: Optional[str] = None
+
+
+@dataclass
+class ScanCandidate:
+    """通過 pHash 初篩的 (商品, 資產) 配對"""
+    item: ScanItem
+    asset_image: str
+    phash_score: float
+    asset_hash: Optional[str] = None
+
+
+class ScanJob:
+    """
+    Single scan run
+    單次掃描：每個階段獨立 worker 數與有界佇列，下游忙碌時上游自動等待
+    """
+
+    def __init__(
+        self,
+        crawlers: Dict[str, BaseCrawler],
+        asset_images: List[str],
+        keywords: List[str],
+        platforms: List[str],
+        similarity_threshold: float = 70.0,
+        max_pages: int = 5,
+        max_results_per_platform: int = 50,
+        stage_workers: Optional[Dict[str, int]] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        on_progress: Callable = None,
+        progress_interval: float = 1.0,
+        listing_store: Optional[ListingStore] = None,
+        synthetic: Optional[SyntheticCatalog] = None,
+        page_planner: Optional[PagePlanner] = None,
+        seller_frontier: Optional[SellerFrontier] = None,
+        max_seller_products: int = 50,
+        violation_sink: Optional[Callable] = None,
+        cancel_token: Optional[CancelToken] = None,
+        on_checkpoint: Optional[Callable] = None,
+        checkpoint_searches: int = 0,
+        checkpoint: Optional[Dict] = None,
+        restored_violations: Optional[List[Dict]] = None
+    ):
+        from ..image_compare import ImageCompareEngine
+
+        self.crawlers = crawlers
+        self.asset_images = asset_images
+        self.keywords = keywords
+        self.platforms = platforms
+        self.max_pages = max_pages
+        self.max_results_per_platform = max_results_per_platform
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+
+        self.engine = ImageCompareEngine(similarity_threshold=similarity_threshold)
+        self.threshold = similarity_threshold
+        self.asset_hashes: List[Optional[str]] = []
+        self.asset_index = None   # PackedHashes of asset_hashes
+        self.assets_key: Optional[str] = None
+
+        # Incremental scan: skip listings whose image and asset set are unchanged
+        self.store = listing_store
+        self.incremental = {'new': 0, 'changed': 0, 'unchanged_skipped': 0, 'hash_reused': 0}
+
+        # Adaptive paging: stop low-yield searches, lend their pages to productive ones
+        self.planner = page_planner
+
+        # Seller expansion: crawl the shops of flagged sellers, best first
+        self.frontier = seller_frontier
+        self.max_seller_products = max_seller_products
+
+        self.violations: List[Dict] = []
+        # Violations found so far are handed to violation_sink on every progress tick
+        self.violation_sink = violation_sink
+        self.violations_flushed = 0
+        self._flush_lock = asyncio.Lock()
+
+        # Cancellation / deadline: run() stops the pipeline and raises Cancelled
+        self.cancel_token = cancel_token
+
+        # Live telemetry: throughput, per-platform completion and ETA for on_progress
+        self.progress = ScanProgress(status='running', results_per_search=max_results_per_platform)
+        for platform in platforms:
+            self.progress.add_searches(platform, len(keywords))
+        self.listings_admitted = 0
+        self.listings_done = 0
+        self.dedupe = ListingDeduplicator()
+        # Same picture under different URLs: compare one representative per cluster
+        self.clusters = ImageClusterIndex()
+
+        # Synthetic catalog: planted copies are the ground truth for recall
+        self.synthetic = synthetic
+        self.planted_seen = 0
+
+        # Checkpoints: with on_checkpoint, searches run in batches of checkpoint_searches
+        # (default: one keyword on every platform); after each batch drains, the state
+        # needed to resume without redoing finished searches is handed to on_checkpoint
+        self.on_checkpoint = on_checkpoint
+        self.checkpoint_searches = checkpoint_searches or len(platforms)
+        self.checkpoints = 0
+        self.searches_completed: List[List[str]] = []
+        self.sellers_completed: List[List[str]] = []
+        self.resumed = False
+        self._restored = set()
+        if checkpoint:
+            self._resume(checkpoint, restored_violations or [])
+
+        workers = {**DEFAULT_STAGE_WORKERS, **(stage_workers or {})}
+        self.pipeline = Pipeline([
+            Stage('crawl', self._crawl, workers['crawl'], queue_size),
+            Stage('dedupe', self._dedupe, workers['dedupe'], queue_size),
+            Stage('download', self._download, workers['download'], queue_size),
+            Stage('hash', self._hash, workers['hash'], queue_size),
+            Stage('compare', self._compare, workers['compare'], queue_size),
+            Stage('verify', self._verify, workers['verify'], queue_size),
+            Stage('sink', self._sink, workers['sink'], queue_size),
+        ])
+
+    async def run(self) -> Dict:
+        """
+        Run the scan and return the result dict
+
+        Raises:
+            Cancelled: cancel_token was cancelled or its deadline passed; violations
+                found so far were still handed to violation_sink
+            Exception: violation_sink still failed on the final flush
+        """
+        self.asset_hashes = [
+            await self.engine.phash.compute_hash(asset_image)
+            for asset_image in self.asset_images
+        ]
+        self.assets_key = hashlib.sha1(
+            json.dumps([self.asset_hashes, self.threshold]).encode()
+        ).hexdigest()
+        self.asset_index = self.engine.phash.pack(self.asset_hashes)
+
+        # First sample is the baseline (restored counters do not count as throughput)
+        self._sample_progress()
+        await self._notify(0, "開始搜尋並比對...")
+
+        reporter = asyncio.create_task(self._report_progress())
+        work = asyncio.create_task(self._run_searches())
+        try:
+            if self.cancel_token is not None:
+                # Cancelling the work task unwinds every stage worker: pending requests,
+                # downloads and comparisons stop at their next await
+                watcher = asyncio.create_task(self.cancel_token.wait())
+                try:
+                    await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    watcher.cancel()
+                if not work.done():
+                    work.cancel()
+                    await asyncio.gather(work, return_exceptions=True)
+                    raise Cancelled(self.cancel_token.reason)
+            await work
+        finally:
+            if not work.done():
+                work.cancel()
+                await asyncio.gather(work, return_exceptions=True)
+            reporter.cancel()
+            if self.store is not None:
+                await asyncio.to_thread(self.store.flush)
+            await self._flush_violations()
+
+        if self.violations_flushed < len(self.violations):
+            # The sink kept failing: a scan must not complete with violations it never stored
+            await self._flush_violations(raise_errors=True)
+
+        self._sample_progress()
+        self.progress.status = 'completed'
+        self.progress.progress = 100
+        self.progress.eta_seconds = 0.0
+        await self._notify(100, f"掃描完成！發現 {len(self.violations)} 個可疑侵權")
+
+        return {
+            'total_scanned': self.listings_admitted,
+            'violations_found': len(self.violations),
+            'violations': self.violations,
+            'best_matches': self._best_matches(),
+            'platforms_searched': self.platforms,
+            'keywords_used': self.keywords,
+            'dedupe': self.dedupe.stats(),
+            'clusters': self.clusters.stats(),
+            'incremental': self.incremental if self.store is not None else None,
+            'paging': self.planner.stats() if self.planner is not None else None,
+            'seller_expansion': self.frontier.stats() if self.frontier is not None else None,
+            'synthetic': self._synthetic_report() if self.synthetic is not None else None,
+            'checkpoints': self.checkpoints,
+            'resumed': self.resumed,
+            'pipeline': self.pipeline.snapshot(),
+            'telemetry': self.progress.telemetry()
+        }
+
+    async def _run_searches(self):
+        """Keyword searches, then seller expansion rounds (checkpointed per batch)"""
+        completed = {tuple(search) for search in self.searches_completed}
+        searches = [
+            (keyword, platform)
+            for keyword in self.keywords
+            for platform in self.platforms
+            if (keyword, platform) not in completed
+        ]
+        step = self.checkpoint_searches if self.on_checkpoint else max(len(searches), 1)
+        for start in range(0, len(searches), step):
+            batch = searches[start:start + step]
+            await self.pipeline.run(batch)
+            self.searches_completed.extend(list(search) for search in batch)
+            await self._checkpoint()
+        # Each round expands the sellers flagged so far; their hits feed the next round
+        while self.frontier is not None:
+            sellers = self.frontier.pop_batch()
+            if not sellers:
+                break
+            for task in sellers:
+                self.progress.add_searches(task.platform)
+            await self.pipeline.run(sellers)
+            self.sellers_completed.extend([task.platform, task.seller_id] for task in sellers)
+            await self._checkpoint()
+
+    # ==================== Stages ====================
+
+    async def _crawl(self, search, emit):
+        if isinstance(search, SellerTask):
+            await self._crawl_seller(search, emit)
+            return
+
+        keyword, platform = search
+        crawler = self.crawlers.get(platform)
+        budget = None
+        max_pages = self.max_pages
+        if self.planner is not None:
+            budget = self.planner.open(keyword, platform, self.max_pages)
+            max_pages = self.planner.page_limit(budget)
+
+        def next_page(page, listings):
+            if budget is not None:
+                self.planner.record_page(budget, listings)
+                if not self.planner.next_page(budget):
+                    return False
+            # No further pages once the scan is cancelled
+            return self.cancel_token is None or not self.cancel_token.cancelled
+        try:
+            if crawler:
+                async for listing in crawler.search_stream(
+                    keyword=keyword,
+                    max_pages=max_pages,
+                    max_results=self.max_results_per_platform,
+                    next_page=next_page
+                ):
+                    if self.frontier is not None:
+                        self.frontier.visit(listing.url)
+                    await emit(ScanItem(listing=listing, keyword=keyword))
+        except Exception as e:
+            logger.error(f"Error searching {platform}: {e}")
+        finally:
+            if budget is not None:
+                self.planner.close(budget)
+            self.progress.search_done(platform)
+
+    async def _crawl_seller(self, task: SellerTask, emit):
+        crawler = self.crawlers.get(task.platform)
+        keyword = f"seller:{task.seller_id}"
+        try:
+            if crawler:
+                listings = await crawler.get_seller_products(task.seller_id, self.max_seller_products)
+                for listing in listings:
+                    if self.frontier.admit(listing):
+                        await emit(ScanItem(listing=listing, keyword=keyword))
+        except Exception as e:
+            logger.error(f"Error crawling {task.platform} seller {task.seller_id}: {e}")
+        finally:
+            self.progress.search_done(task.platform)
+
+    async def _dedupe(self, item: ScanItem, emit):
+        record, group, is_new_image = self.dedupe.add(item.listing, item.keyword)
+        if record is None:
+            return
+
+        self.listings_admitted += 1
+        self.progress.listing_found(item.listing.platform)
+        if self.synthetic is not None and SyntheticCatalog.planted_in(item.listing.thumbnail_url) is not None:
+            self.planted_seen += 1
+        if not is_new_image:
+            # Same image already downloaded: reuse the verdicts found so far,
+            # later ones are fanned out by the sink
+            self.listings_done += 1
+            if group is not None:
+                for match in group.matches:
+                    self._record_violation(record, match)
+                if group.finalized and self.store is not None:
+                    await asyncio.to_thread(self._store_records, group, [record])
+            return
+
+        item.group = group
+        if self.store is not None and await self._reuse_stored(item):
+            return
+        await emit(item)
+
+    async def _download(self, item: ScanItem, emit):
+        if item.phash is not None:
+            # Hash known from the listing store
+            await emit(item)
+            return
+
+        crawler = self.crawlers.get(item.listing.platform)
+        item.image_bytes = await crawler.download_image(item.listing.thumbnail_url) if crawler else None
+        if item.image_bytes is None:
+            self.listings_done += 1
+            return
+        self.progress.image_downloaded(len(item.image_bytes))
+        await emit(item)
+
+    async def _hash(self, item: ScanItem, emit):
+        digest = None
+        if item.image_bytes is not None:
+            digest, phash = await asyncio.to_thread(self._fingerprint, item.image_bytes)
+            item.phash = item.phash or phash
+        if item.phash is None:
+            self.listings_done += 1
+            return
+        item.group.phash = item.phash
+
+        cluster, is_new = self.clusters.assign(item.group, digest, item.phash)
+        if not is_new:
+            # Same picture already in the pipeline: take its verdicts instead
+            self.listings_done += 1
+            await self._join_cluster(item.group, cluster.representative)
+            return
+        await emit(item)
+
+    def _fingerprint(self, data: bytes):
+        """(content digest, pHash) of downloaded image bytes"""
+        return hashlib.sha1(data).hexdigest(), self.engine.phash.compute_hash_from_bytes(data)
+
+    async def _compare(self, item: ScanItem, emit):
+        try:
+            # Score this listing against every asset in one vectorized pass, best first
+            scores = self.asset_index.similarities(item.phash)
+            self.progress.comparisons += len(scores)
+            if self.planner is not None and len(scores) and scores.max() >= self.threshold:
+                self.planner.record_survivor(item.keyword, item.listing.platform)
+            for index in np.argsort(-scores, kind='stable'):
+                score = float(scores[index])
+                if score < self.threshold:
+                    break
+                item.group.pending += 1
+                await emit(ScanCandidate(
+                    item=item,
+                    asset_image=self.asset_images[index],
+                    phash_score=score,
+                    asset_hash=self.asset_hashes[index]
+                ))
+        finally:
+            self.listings_done += 1
+            item.group.compared = True
+            await self._maybe_finalize(item.group)
+
+    async def _verify(self, candidate: ScanCandidate, emit):
+        matched = False
+        try:
+            # Both fingerprints are already known: no image is reloaded here
+            full_result = self.engine.result_from_phash(
+                candidate.phash_score,
+                candidate.asset_hash,
+                candidate.item.phash
+            )
+            if full_result.is_match:
+                matched = True
+                await emit((candidate, full_result))
+        finally:
+            if not matched:
+                await self._candidate_done(candidate.item.group)
+
+    async def _sink(self, verified, emit):
+        candidate, full_result = verified
+        asset_image = candidate.asset_image
+        match = {
+            'similarity': {
+                'overall': full_result.overall_similarity,
+                'phash_score': full_result.phash_score,
+                'orb_score': full_result.orb_score,
+                'color_score': full_result.color_score,
+                'level': full_result.similarity_level
+            },
+            'asset_image': asset_image if not asset_image.startswith('data:') else '[base64]'
+        }
+
+        group = candidate.item.group
+        try:
+            group.matches.append(match)
+            for record in group.members:
+                self._record_violation(record, match)
+        finally:
+            await self._candidate_done(group)
+
+    async def _join_cluster(self, group: ImageGroup, representative: ImageGroup):
+        records = list(group.members)
+        self.dedupe.merge(group, representative)
+        for record in records:
+            for match in representative.matches:
+                self._record_violation(record, match)
+        if representative.finalized and self.store is not None:
+            await asyncio.to_thread(self._store_records, representative, records)
+
+    def _record_violation(self, record: ListingRecord, match: Dict):
+        listing = record.listing_dict()
+        if self._restored and (listing['platform'], listing['id'], match['asset_image']) in self._restored:
+            # Found again by a search that was redone after a resume
+            return
+        if self.frontier is not None:
+            self.frontier.flag(record.listing)
+        self.violations.append({
+            'listing': listing,
+            'keywords': record.keywords,
+            **match
+        })
+
+    def _synthetic_report(self) -> Dict:
+        """Recall of the scan against the planted copies it crawled"""
+        flagged = {
+            (v['listing']['platform'], v['listing']['id']): v['listing']['thumbnail_url']
+            for v in self.violations
+        }
+        found = sum(1 for url in flagged.values() if SyntheticCatalog.planted_in(url) is not None)
+        return {
+            'planted_listings': self.planted_seen,
+            'planted_found': found,
+            'false_positives': len(flagged) - found,
+            'recall': round(found / self.planted_seen, 4) if self.planted_seen else None
+        }
+
+    def _best_matches(self) -> List[Dict]:
+        """Best-matching asset per flagged listing"""
+        best: Dict = {}
+        for violation in self.violations:
+            listing = violation['listing']
+            key = (listing['platform'], listing['id'])
+            similarity = violation['similarity']['overall']
+            if key not in best or similarity > best[key]['similarity']:
+                best[key] = {
+                    'platform': listing['platform'],
+                    'listing_id': listing['id'],
+                    'asset_image': violation['asset_image'],
+                    'similarity': similarity
+                }
+        return sorted(best.values(), key=lambda match: match['similarity'], reverse=True)
+
+    # ==================== Listing Store ====================
+
+    async def _reuse_stored(self, item: ScanItem) -> bool:
+        """
+        Check the listing store for this image group's representative
+
+        Returns True when the listing is unchanged and its stored verdicts
+        were replayed, so it needs no download or comparison.
+        """
+        listing = item.listing
+        group = item.group
+        stored = await asyncio.to_thread(self.store.get, listing.platform, listing.id)
+
+        if stored is None:
+            self.incremental['new'] += 1
+            return False
+
+        if stored.image_url != group.canonical_url or not stored.image_hash:
+            self.incremental['changed'] += 1
+            return False
+
+        if stored.assets_key != self.assets_key or stored.outcome is None:
+            # Same image, different assets: reuse the hash, compare again
+            self.incremental['hash_reused'] += 1
+            item.phash = stored.image_hash
+            return False
+
+        self.incremental['unchanged_skipped'] += 1
+        self.listings_done += 1
+        group.phash = stored.image_hash
+        group.compared = True
+        for match in stored.outcome:
+            match = {**match, 'cached': True}
+            group.matches.append(match)
+            for record in group.members:
+                self._record_violation(record, match)
+        await self._maybe_finalize(group)
+        return True
+
+    async def _candidate_done(self, group: ImageGroup):
+        group.pending -= 1
+        await self._maybe_finalize(group)
+
+    async def _maybe_finalize(self, group: ImageGroup):
+        if group.finalized or not group.compared or group.pending > 0:
+            return
+        group.finalized = True
+        if self.store is not None:
+            await asyncio.to_thread(self._store_records, group, list(group.members))
+
+    def _store_records(self, group: ImageGroup, records: List[ListingRecord]):
+        outcome = [
+            {key: value for key, value in match.items() if key != 'cached'}
+            for match in group.matches
+        ]
+        for record in records:
+            self.store.put(
+                platform=record.listing.platform,
+                item_id=record.listing.id,
+                image_url=record.image_key or group.canonical_url,
+                image_hash=record.image_hash or group.phash,
+                assets_key=self.assets_key,
+                outcome=outcome
+            )
+
+    # ==================== Progress ====================
+
+    def _sample_progress(self) -> ScanProgress:
+        """Bring the telemetry up to date: counters, moving-average rates, percent and ETA"""
+        self.progress.total_scanned = self.listings_admitted
+        self.progress.listings_done = self.listings_done
+        self.progress.violations_found = len(self.violations)
+        self.progress.sample()
+        return self.progress
+
+    async def _report_progress(self):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            await self._flush_violations()
+            progress = self._sample_progress()
+            message = f"已搜尋 {self.listings_admitted} 個商品，已比對 {self.listings_done} 個..."
+            if progress.eta_seconds is not None:
+                message += f" 預估剩餘 {round(progress.eta_seconds)} 秒"
+            await self._notify(progress.progress, message)
+
+    # ==================== Checkpoints ====================
+
+    def checkpoint_state(self) -> Dict:
+        """JSON-ready state to resume from (violations: how many were handed to violation_sink)"""
+        return {
+            'searches': self.searches_completed,
+            'sellers': self.sellers_completed,
+            'violations': self.violations_flushed,
+            'listings_admitted': self.listings_admitted,
+            'listings_done': self.listings_done,
+            'planted_seen': self.planted_seen,
+            'incremental': dict(self.incremental)
+        }
+
+    def _resume(self, checkpoint: Dict, violations: List[Dict]):
+        """Continue after the checkpoint; violations are the ones stored up to it"""
+        self.resumed = True
+        self.searches_completed = [list(search) for search in checkpoint.get('searches', [])]
+        self.sellers_completed = [list(seller) for seller in checkpoint.get('sellers', [])]
+        for keyword, platform in self.searches_completed:
+            self.progress.search_done(platform)
+        for platform, seller_id in self.sellers_completed:
+            self.progress.add_searches(platform)
+            self.progress.search_done(platform)
+        self.listings_admitted = checkpoint.get('listings_admitted', 0)
+        self.listings_done = checkpoint.get('listings_done', 0)
+        self.planted_seen = checkpoint.get('planted_seen', 0)
+        self.incremental.update(checkpoint.get('incremental') or {})
+
+        self.violations = list(violations)
+        self.violations_flushed = len(self.violations)
+        self._restored = {
+            (violation['listing']['platform'], violation['listing']['id'], violation['asset_image'])
+            for violation in violations
+        }
+        if self.frontier is not None:
+            self.frontier.restore(self.sellers_completed)
+            for violation in violations:
+                self.frontier.flag(ProductListing.from_dict(violation['listing']))
+
+    async def _checkpoint(self):
+        await self._flush_violations()
+        if self.on_checkpoint is None:
+            return
+        self.checkpoints += 1
+        try:
+            result = self.on_checkpoint(self.checkpoint_state())
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.error(f"Checkpoint callback error: {e}")
+
+    async def _flush_violations(self, raise_errors: bool = False):
+        """
+        Hand violations recorded since the last flush to violation_sink (sync or async)
+
+        violations_flushed only advances once the sink accepted the batch; a failed
+        batch is logged and retried by the next flush (raise_errors=True re-raises instead)
+        """
+        if self.violation_sink is None:
+            return
+        # One flush at a time: a checkpoint must not overtake a batch still being written
+        async with self._flush_lock:
+            if self.violations_flushed >= len(self.violations):
+                return
+            batch = self.violations[self.violations_flushed:]
+            try:
+                result = self.violation_sink(batch)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                # Not counted as flushed: the same batch is retried on the next flush,
+                # and checkpoints never claim violations that were not stored
+                logger.error(f"Violation sink error: {e}")
+                if raise_errors:
+                    raise
+                return
+            self.violations_flushed += len(batch)
+
+    async def _notify(self, progress: int, message: str):
+        """Call on_progress(progress, message, stages=..., telemetry=...) — sync or async callbacks"""
+        if not self.on_progress:
+            return
+        try:
+            result = self.on_progress(
+                progress,
+                message,
+                stages=self.pipeline.snapshot(),
+                telemetry=self.progress.telemetry()
+            )
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.debug(f"Progress callback error: {e}")
@@ -1,11 +1,15 @@
 """
 Shopee Crawler - 蝦皮購物爬蟲 (簡化版)
 """
-import time
 from typing import List, Optional
+
 from loguru import logger
 
-from .base import BaseCrawler, ProductListing, CrawlerResult
+from .base import BaseCrawler, ProductListing
+from .parsing import decode_shopee_items
+
+
+SHOP_PAGE_SIZE = 30
 
 
 class ShopeeCrawler(BaseCrawler):
@@ -18,23 +22,44 @@ class ShopeeCrawler(BaseCrawler):
             **kwargs
         )
 
-    async def search(
+    async def search_page(
         self,
         keyword: str,
-        max_pages: int = 5,
-        max_results: int = 100
-    ) -> CrawlerResult:
-        """搜尋蝦皮商品 - 模擬結果"""
-        start_time = time.time()
+        page: int,
+        page_size: int = 50
+    ) -> List[ProductListing]:
+        """搜尋蝦皮商品 (search_items API)；賣家 ID 取自商品的 shopid，未開啟 live_search 時為模擬結果"""
+        if not self.live_search:
+            return self._simulated_page(keyword, page, page_size)
+
+        async with self._client() as client:
+            response = await client.get(
+                f"{self.base_url}/api/v4/search/search_items",
+                params={
+                    'by': 'relevancy',
+                    'keyword': keyword,
+                    'limit': page_size,
+                    'newest': page * page_size,
+                    'order': 'desc'
+                }
+            )
+            response.raise_for_status()
+            items = decode_shopee_items(response.content, item_key='item_basic')
 
-        # 返回模擬搜尋結果（實際爬蟲需要更複雜的反爬機制）
         listings = []
-        errors = []
+        for item in items:
+            listing = self._parse_shop_item(item, '')
+            if listing is not None:
+                listings.append(listing)
+        return listings
 
-        logger.info(f"Shopee search for: {keyword}")
+    def _simulated_page(self, keyword: str, page: int, page_size: int) -> List[ProductListing]:
+        """模擬搜尋結果 (只有一頁，沒有賣家 ID)"""
+        if page > 0:
+            return []
 
-        # 模擬找到的結果
-        for i in range(min(10, max_results)):
+        listings = []
+        for i in range(min(10, page_size)):
             listings.append(ProductListing(
                 id=f"shopee_{keyword}_{i}",
                 platform='shopee',
@@ -47,21 +72,66 @@ class ShopeeCrawler(BaseCrawler):
                 location="台灣"
             ))
 
-        duration_ms = int((time.time() - start_time) * 1000)
-
-        return CrawlerResult(
-            platform='shopee',
-            keyword=keyword,
-            total_found=len(listings),
-            listings=listings,
-            pages_scraped=1,
-            duration_ms=duration_ms,
-            errors=errors,
-            success=True
-        )
+        return listings
 
     async def get_product_details(self, product_url: str) -> Optional[ProductListing]:
         return None
 
     async def get_seller_products(self, seller_id: str, max_products: int = 50) -> List[ProductListing]:
-        return []
+        """蝦皮店舖商品 (shop search_items API，依熱門排序)"""
+        if self.synthetic is not None:
+            return self.synthetic.seller_listings(self.platform_name, seller_id, max_products)
+
+        listings: List[ProductListing] = []
+        async with self._client() as client:
+            offset = 0
+            while len(listings) < max_products:
+                try:
+                    response = await client.get(
+                        f"{self.base_url}/api/v4/shop/search_items",
+                        params={'limit': SHOP_PAGE_SIZE, 'offset': offset, 'order': 'pop', 'shopid': seller_id}
+                    )
+                    response.raise_for_status()
+                    items = decode_shopee_items(response.content)
+                except Exception as e:
+                    logger.error(f"Shopee shop {seller_id} error: {e}")
+                    break
+                if not items:
+                    break
+
+                for item in items:
+                    listing = self._parse_shop_item(item, seller_id)
+                    if listing is not None:
+                        listings.append(listing)
+                offset += SHOP_PAGE_SIZE
+                await self.random_delay()
+
+        return listings[:max_products]
+
+    def _parse_shop_item(self, item: dict, seller_id: str) -> Optional[ProductListing]:
+        item_id = item.get('itemid')
+        if not item_id:
+            return None
+        shop_id = str(item.get('shopid') or seller_id)
+
+        image_hash = item.get('image') or (item.get('images') or [''])[0]
+        price = item.get('price') or 0
+        if isinstance(price, int) and price > 100000:
+            price = price / 100000  # 蝦皮價格單位
+        rating = item.get('item_rating') or {}
+
+        return ProductListing(
+            id=f"shopee_{item_id}",
+            platform='shopee',
+            title=item.get('name') or '',
+            url=f"{self.base_url}/product/{shop_id}/{item_id}",
+            thumbnail_url=f"https://down-tw.img.susercontent.com/file/{image_hash}_tn" if image_hash else '',
+            price=float(price),
+            seller_id=shop_id,
+            seller_name=item.get('shop_name') or '',
+            seller_url=f"{self.base_url}/shop/{shop_id}",
+            sales_count=item.get('sold') or item.get('historical_sold') or 0,
+            rating=rating.get('rating_star'),
+            review_count=item.get('cmt_count') or 0,
+            location=item.get('shop_location') or ''
+        )
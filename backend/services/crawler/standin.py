@@ -0,0 +1,187 @@
+"""
+Local Marketplace Stand-in Server
+本地電商替身伺服器 - 提供錄製或合成的搜尋頁、店舖頁與商品圖片，可設定延遲與錯誤率
+
+搭配 transport.RedirectTransport 使用，所有爬蟲請求會被導向這裡：
+    http://127.0.0.1:8900/<原始主機><原始路徑>?<原始參數>
+
+啟動方式：
+    python -m services.crawler.standin --port 8900 --latency-ms 150 --error-rate 0.02
+"""
+import asyncio
+import json
+import os
+import random
+from html import escape
+from typing import Optional
+
+from fastapi import FastAPI, Request, Response
+
+from .synthetic import SYNTHETIC_IMAGE_HOST, SyntheticCatalog, _seed, synthetic_image
+from .transport import cassette_key, load_recording
+
+
+SHOPEE_IMAGE_HOST = 'down-tw.img.susercontent.com'
+RUTEN_IMAGE_HOST = 'img.ruten.com.tw'
+
+
+def _shopee_item(keyword: str, index: int) -> dict:
+    seed = _seed('shopee', keyword, index)
+    shop_id = 10000 + seed % 500
+    return {
+        'itemid': 100000000 + seed % 900000000,
+        'shopid': shop_id,
+        'name': f"{keyword} 商品 {index + 1}",
+        'image': f"{seed:016x}",
+        'price': (100 + seed % 5000) * 100000,
+        'shop_name': f"蝦皮賣家 {shop_id}",
+        'sold': seed % 300,
+        'historical_sold': seed % 3000,
+        'item_rating': {'rating_star': round(3 + (seed % 200) / 100, 2)},
+        'cmt_count': seed % 500,
+        'shop_location': '台灣'
+    }
+
+
+def _ruten_html(keyword: str, start: int, count: int, seller_id: Optional[str] = None) -> str:
+    cards = []
+    for index in range(start, start + count):
+        seed = _seed('ruten', keyword, index)
+        item_id = 21000000000000 + seed % 1000000000000
+        seller = seller_id or f"rtseller{seed % 500}"
+        cards.append(
+            f'<div class="rt-product-card" data-gno="{item_id}">'
+            f'<div class="pic"><img src="https://{RUTEN_IMAGE_HOST}/s1/{seed:016x}.jpg"></div>'
+            f'<p class="name"><a href="https://www.ruten.com.tw/item/show?{item_id}">'
+            f'{escape(keyword)} 商品 {index + 1}</a></p>'
+            f'<div class="price"><strong>${100 + seed % 5000:,}</strong></div>'
+            f'<p class="seller"><a href="https://class.ruten.com.tw/user/index00.php?s={seller}">{seller}</a></p></div>'
+        )
+    return f"<html><body>{''.join(cards)}</body></html>"
+
+
+def create_app(
+    cassette_dir: Optional[str] = None,
+    latency_ms: float = 0,
+    error_rate: float = 0.0,
+    results_per_keyword: int = 600,
+    seed: int = 0,
+    catalog: Optional[SyntheticCatalog] = None
+) -> FastAPI:
+    """
+    Build the stand-in app
+
+    Args:
+        cassette_dir: Recorded responses to serve first (see CassetteTransport)
+        latency_ms: Mean added latency per request (±50% jitter)
+        error_rate: Fraction of requests answered with HTTP 503
+        results_per_keyword: Synthetic search results per keyword
+        seed: Seed for latency jitter and error injection
+        catalog: Synthetic catalog whose thumbnails (SYNTHETIC_IMAGE_HOST) are served here
+    """
+    app = FastAPI(title="Marketplace Stand-in")
+    rng = random.Random(seed)
+
+    @app.get("/{host}/{path:path}")
+    async def serve(host: str, path: str, request: Request):
+        if latency_ms:
+            await asyncio.sleep(latency_ms * rng.uniform(0.5, 1.5) / 1000)
+        if error_rate and rng.random() < error_rate:
+            return Response(status_code=503)
+
+        params = request.query_params
+        query = request.url.query
+
+        # 1. Recorded response
+        if cassette_dir:
+            original_url = f"https://{host}/{path}" + (f"?{query}" if query else "")
+            key = cassette_key('GET', original_url)
+            base = os.path.join(cassette_dir, key[:2], key)
+            recorded = load_recording(f"{base}.json", f"{base}.body")
+            if recorded is not None:
+                status, headers, body = recorded
+                return Response(content=body, status_code=status, headers=dict(headers))
+
+        # 2. Synthetic response
+        if host == SYNTHETIC_IMAGE_HOST and catalog is not None:
+            data = catalog.render_image(f"https://{host}/{path}")
+            if data is None:
+                return Response(status_code=404)
+            return Response(content=data, media_type='image/jpeg')
+
+        if host == SHOPEE_IMAGE_HOST or host == RUTEN_IMAGE_HOST:
+            return Response(content=synthetic_image(_seed(host, path)), media_type='image/jpeg')
+
+        if host == 'shopee.tw' and path == 'api/v4/search/search_items':
+            keyword = params.get('keyword', '')
+            limit = int(params.get('limit', 60))
+            offset = int(params.get('newest', 0))
+            end = min(offset + limit, results_per_keyword)
+            items = [{'item_basic': _shopee_item(keyword, i)} for i in range(offset, end)]
+            return Response(content=json.dumps({'items': items}, ensure_ascii=False), media_type='application/json')
+
+        if host == 'shopee.tw' and path == 'api/v4/shop/search_items':
+            shop_id = params.get('shopid', '')
+            limit = int(params.get('limit', 30))
+            offset = int(params.get('offset', 0))
+            end = min(offset + limit, results_per_keyword)
+            items = [{**_shopee_item(f"shop{shop_id}", i), 'shopid': int(shop_id or 0)} for i in range(offset, end)]
+            return Response(content=json.dumps({'items': items}, ensure_ascii=False), media_type='application/json')
+
+        if host == 'find.ruten.com.tw' and path.rstrip('/') == 's':
+            page = int(params.get('p', 1))
+            start = (page - 1) * 50
+            count = max(0, min(50, results_per_keyword - start))
+            return Response(content=_ruten_html(params.get('q', ''), start, count), media_type='text/html')
+
+        if host == 'class.ruten.com.tw' and path == 'user/index00.php':
+            page = int(params.get('p', 1))
+            start = (page - 1) * 30
+            count = max(0, min(30, results_per_keyword - start))
+            seller_id = params.get('s', '')
+            return Response(content=_ruten_html(f"shop{seller_id}", start, count, seller_id), media_type='text/html')
+
+        return Response(status_code=404)
+
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local marketplace stand-in server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--cassette-dir', default=None)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--results-per-keyword', type=int, default=600)
+    parser.add_argument('--asset', action='append', default=[],
+                        help='Asset image planted in synthetic thumbnails (repeatable)')
+    parser.add_argument('--synthetic-seed', type=int, default=0)
+    parser.add_argument('--listings-per-platform', type=int, default=1_000_000)
+    parser.add_argument('--infringing-rate', type=float, default=0.01)
+    args = parser.parse_args()
+
+    assets = []
+    for asset_path in args.asset:
+        with open(asset_path, 'rb') as f:
+            assets.append(f.read())
+
+    uvicorn.run(
+        create_app(
+            cassette_dir=args.cassette_dir,
+            latency_ms=args.latency_ms,
+            error_rate=args.error_rate,
+            results_per_keyword=args.results_per_keyword,
+            catalog=SyntheticCatalog(
+                listings_per_platform=args.listings_per_platform,
+                infringing_rate=args.infringing_rate,
+                asset_images=assets,
+                seed=args.synthetic_seed
+            )
+        ),
+        host=args.host,
+        port=args.port
+    )
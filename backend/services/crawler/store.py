@@ -0,0 +1,144 @@
+"""
+Listing Store
+商品持久化儲存 - 記錄每個商品上次的圖片、指紋與比對結果，供增量掃描使用
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class StoredListing:
+    """上次掃描時的商品狀態"""
+    platform: str
+    item_id: str
+    image_url: str
+    image_hash: Optional[str]
+    last_seen: int
+    assets_key: Optional[str]
+    outcome: Optional[List[Dict]]
+
+
+class ListingStore:
+    """
+    Persistent listing store keyed by (platform, item_id)
+    使用 SQLite (WAL) 儲存；寫入先緩衝，累積到 batch_size 筆或距上次寫入超過
+    flush_interval 秒時才一次寫入；查詢先看緩衝中的資料，不會觸發寫入
+    """
+
+    def __init__(self, path: str, batch_size: int = 200, flush_interval: float = 5.0):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.commits = 0
+        self._lock = threading.Lock()
+        # Rows not yet written, latest per listing
+        self._pending: Dict[Tuple[str, str], Tuple] = {}
+        self._flushed_at = time.monotonic()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS listings (
+                platform TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                image_url TEXT NOT NULL,
+                image_hash TEXT,
+                last_seen INTEGER NOT NULL,
+                assets_key TEXT,
+                outcome TEXT,
+                PRIMARY KEY (platform, item_id)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+
+    def get(self, platform: str, item_id: str) -> Optional[StoredListing]:
+        """Look up a listing (rows still pending are answered from memory)"""
+        with self._lock:
+            row = self._pending.get((platform, item_id))
+            if row is None:
+                row = self._conn.execute(
+                    "SELECT platform, item_id, image_url, image_hash, last_seen, assets_key, outcome "
+                    "FROM listings WHERE platform = ? AND item_id = ?",
+                    (platform, item_id)
+                ).fetchone()
+
+        if row is None:
+            return None
+
+        return StoredListing(
+            platform=row[0],
+            item_id=row[1],
+            image_url=row[2],
+            image_hash=row[3],
+            last_seen=row[4],
+            assets_key=row[5],
+            outcome=json.loads(row[6]) if row[6] is not None else None
+        )
+
+    def put(
+        self,
+        platform: str,
+        item_id: str,
+        image_url: str,
+        image_hash: Optional[str],
+        assets_key: Optional[str],
+        outcome: Optional[List[Dict]],
+        last_seen: Optional[int] = None
+    ):
+        """Queue an upsert; written once batch_size rows are pending or flush_interval has passed"""
+        row = (
+            platform,
+            item_id,
+            image_url,
+            image_hash,
+            last_seen or int(time.time()),
+            assets_key,
+            json.dumps(outcome, ensure_ascii=False) if outcome is not None else None
+        )
+        with self._lock:
+            self._pending[(platform, item_id)] = row
+            if (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._flushed_at >= self.flush_interval
+            ):
+                self._flush_locked()
+
+    def flush(self):
+        """Write all pending rows"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._flushed_at = time.monotonic()
+        if not self._pending:
+            return
+        self._conn.executemany(
+            """
+            INSERT INTO listings (platform, item_id, image_url, image_hash, last_seen, assets_key, outcome)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (platform, item_id) DO UPDATE SET
+                image_url = excluded.image_url,
+                image_hash = excluded.image_hash,
+                last_seen = excluded.last_seen,
+                assets_key = excluded.assets_key,
+                outcome = excluded.outcome
+            """,
+            list(self._pending.values())
+        )
+        self._conn.commit()
+        self.commits += 1
+        self._pending = {}
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,263 @@
+"""
+Synthetic Marketplace
+合成商品目錄 - 產生大量可重現的商品與縮圖，並依比例植入已上傳素材的侵權複製品，供壓力測試與召回率量測
+
+每個平台有 listings_per_platform 筆商品 (可達數百萬筆)，全部由 seed 推導，不佔記憶體：
+- 關鍵字搜尋結果是目錄中的偽隨機抽樣，不同關鍵字會重疊 (模擬跨關鍵字重複商品)
+- 商品 n 屬於賣家 n % sellers；部分賣家為侵權賣家，其商品依比例使用素材的變形複製圖
+- 部分商品轉貼熱門商品的圖片 (不同網址；一半原檔、一半重新壓縮)，模擬賣家共用縮圖
+- 縮圖網址指向 SYNTHETIC_IMAGE_HOST，由 SyntheticImageTransport 於記憶體產生，
+  或由本地替身伺服器 (standin.py) 提供
+"""
+import hashlib
+import random
+import re
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from PIL import Image
+
+from .base import ProductListing
+
+
+SYNTHETIC_IMAGE_HOST = 'img.synthetic.test'
+
+# https://img.synthetic.test/<platform>/<item_no>.jpg                   - original image
+# https://img.synthetic.test/<platform>/<item_no>-a<k>v<v>.jpg          - planted copy of asset k
+# https://img.synthetic.test/<platform>/<item_no>-r<src>[-a<k>v<v>].jpg - repost of item src's image
+_IMAGE_PATH = re.compile(r'^/(\w+)/(\d+)(?:-r(\d+))?(?:-a(\d+)v(\d+))?\.jpg$')
+
+# Distinct transformed copies rendered per asset (crop / scale / quality)
+PLANTED_VARIANTS = 8
+
+
+def _seed(*parts) -> int:
+    return int.from_bytes(hashlib.sha1('|'.join(map(str, parts)).encode()).digest()[:8], 'big')
+
+
+def synthetic_image(seed: int, size: int = 256, blocks: int = 8) -> bytes:
+    """Deterministic JPEG: a random block pattern derived from seed"""
+    rng = random.Random(seed)
+    tiles = Image.frombytes('RGB', (blocks, blocks), rng.randbytes(blocks * blocks * 3))
+    image = tiles.resize((size, size), Image.NEAREST)
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def planted_copy(asset: Image.Image, seed: int, size: int = 256) -> bytes:
+    """
+    Re-encoded copy of an asset as a seller would post it:
+    slight crop (≤6%), rescale to thumbnail size and a random JPEG quality
+    """
+    rng = random.Random(seed)
+    width, height = asset.size
+    left = int(width * rng.uniform(0, 0.03))
+    top = int(height * rng.uniform(0, 0.03))
+    right = width - int(width * rng.uniform(0, 0.03))
+    bottom = height - int(height * rng.uniform(0, 0.03))
+    image = asset.crop((left, top, right, bottom))
+    image.thumbnail((size, size))
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=rng.randint(60, 90))
+    return buffer.getvalue()
+
+
+class SyntheticCatalog:
+    """
+    Deterministic synthetic listings for all platforms
+
+    Args:
+        listings_per_platform: Catalog size per platform
+        results_per_keyword: Search results available per keyword
+        infringing_rate: Overall fraction of listings that are planted asset copies
+        infringing_seller_rate: Fraction of sellers that post planted copies
+        repost_rate: Fraction of listings reusing the image of a popular item
+        popular_items: Pool of items whose images get reposted
+        asset_images: Encoded images of the uploaded assets to plant
+        sellers: Sellers per platform
+        seed: Catalog seed
+        image_size: Thumbnail size in pixels
+    """
+
+    def __init__(
+        self,
+        listings_per_platform: int = 1_000_000,
+        results_per_keyword: int = 2_000,
+        infringing_rate: float = 0.01,
+        infringing_seller_rate: float = 0.05,
+        repost_rate: float = 0.0,
+        popular_items: int = 200,
+        asset_images: Optional[List[bytes]] = None,
+        sellers: int = 20_000,
+        seed: int = 0,
+        image_size: int = 256
+    ):
+        self.listings_per_platform = listings_per_platform
+        self.results_per_keyword = results_per_keyword
+        self.infringing_rate = infringing_rate
+        self.infringing_seller_rate = infringing_seller_rate
+        self.repost_rate = repost_rate
+        self.popular_items = max(1, min(popular_items, listings_per_platform))
+        self.sellers = sellers
+        self.seed = seed
+        self.image_size = image_size
+
+        self._assets: List[Image.Image] = []
+        for data in asset_images or []:
+            try:
+                self._assets.append(Image.open(BytesIO(data)).convert('RGB'))
+            except Exception:
+                continue
+        self._planted_cache: Dict[Tuple[int, int], bytes] = {}
+
+    # ==================== Listings ====================
+
+    def item_no(self, platform: str, keyword: str, index: int) -> int:
+        """Catalog item shown at position index of a keyword's results"""
+        return _seed(self.seed, platform, keyword, index) % self.listings_per_platform
+
+    def planted_asset(self, platform: str, item_no: int) -> Optional[Tuple[int, int]]:
+        """(asset index, variant) when the item is a planted copy, else None"""
+        if not self._assets or self.infringing_rate <= 0:
+            return None
+
+        seller_rate = min(1.0, max(self.infringing_seller_rate, self.infringing_rate))
+        seller = item_no % self.sellers
+        if _seed(self.seed, platform, 'seller', seller) % 1_000_000 >= seller_rate * 1_000_000:
+            return None
+
+        listing_rate = self.infringing_rate / seller_rate
+        roll = _seed(self.seed, platform, 'item', item_no)
+        if roll % 1_000_000 >= listing_rate * 1_000_000:
+            return None
+        return (roll >> 20) % len(self._assets), (roll >> 40) % PLANTED_VARIANTS
+
+    def repost_source(self, platform: str, item_no: int) -> Optional[int]:
+        """Popular item whose image this listing reuses, else None"""
+        if self.repost_rate <= 0:
+            return None
+        roll = _seed(self.seed, platform, 'repost', item_no)
+        if roll % 1_000_000 >= self.repost_rate * 1_000_000:
+            return None
+        source = (roll >> 20) % self.popular_items
+        return source if source != item_no else None
+
+    def thumbnail_url(self, platform: str, item_no: int) -> str:
+        source = self.repost_source(platform, item_no)
+        image_item = item_no if source is None else source
+        name = str(item_no) if source is None else f"{item_no}-r{source}"
+
+        planted = self.planted_asset(platform, image_item)
+        if planted is None:
+            return f"https://{SYNTHETIC_IMAGE_HOST}/{platform}/{name}.jpg"
+        asset, variant = planted
+        return f"https://{SYNTHETIC_IMAGE_HOST}/{platform}/{name}-a{asset}v{variant}.jpg"
+
+    def listing(self, platform: str, item_no: int) -> ProductListing:
+        seed = _seed(self.seed, platform, item_no)
+        seller = item_no % self.sellers
+        return ProductListing(
+            id=f"{platform}_syn_{item_no}",
+            platform=platform,
+            title=f"[{platform}] 合成商品 {item_no}",
+            url=f"https://{platform}.synthetic.test/item/{item_no}",
+            thumbnail_url=self.thumbnail_url(platform, item_no),
+            price=float(100 + seed % 5000),
+            seller_id=str(seller),
+            seller_name=f"{platform} 賣家 {seller}",
+            sales_count=(seed >> 16) % 3000,
+            rating=round(3 + ((seed >> 32) % 200) / 100, 2),
+            review_count=(seed >> 24) % 500,
+            location='台灣'
+        )
+
+    def search_page(self, platform: str, keyword: str, page: int, page_size: int = 50) -> List[ProductListing]:
+        """One page of keyword results (page is 0-based)"""
+        start = page * page_size
+        end = min(start + page_size, self.results_per_keyword)
+        return [
+            self.listing(platform, self.item_no(platform, keyword, index))
+            for index in range(start, end)
+        ]
+
+    def seller_listings(self, platform: str, seller_id: str, max_products: int = 50) -> List[ProductListing]:
+        """Listings of one seller (items seller, seller + sellers, ...)"""
+        try:
+            seller = int(seller_id)
+        except (TypeError, ValueError):
+            return []
+        item_nos = range(seller, self.listings_per_platform, self.sellers)[:max_products]
+        return [self.listing(platform, item_no) for item_no in item_nos]
+
+    # ==================== Images ====================
+
+    def render_image(self, url: str) -> Optional[bytes]:
+        """Encoded thumbnail for a synthetic image URL, None if not one"""
+        parts = httpx.URL(url)
+        if parts.host != SYNTHETIC_IMAGE_HOST:
+            return None
+        matched = _IMAGE_PATH.match(parts.path)
+        if matched is None:
+            return None
+
+        platform, item_no, source, asset, variant = matched.groups()
+        if source is not None:
+            original = self.render_image(
+                f"https://{SYNTHETIC_IMAGE_HOST}/{platform}/{source}"
+                + (f"-a{asset}v{variant}" if asset is not None else '') + ".jpg"
+            )
+            if original is None or int(item_no) % 2 == 0:
+                return original
+            # Re-saved by the reposting seller
+            buffer = BytesIO()
+            Image.open(BytesIO(original)).save(buffer, format='JPEG', quality=75)
+            return buffer.getvalue()
+
+        if asset is None:
+            return synthetic_image(_seed(self.seed, platform, item_no), size=self.image_size)
+
+        asset, variant = int(asset), int(variant)
+        if asset >= len(self._assets):
+            return None
+        key = (asset, variant)
+        data = self._planted_cache.get(key)
+        if data is None:
+            data = planted_copy(self._assets[asset], _seed(self.seed, 'variant', asset, variant), self.image_size)
+            self._planted_cache[key] = data
+        return data
+
+    @staticmethod
+    def planted_in(url: str) -> Optional[int]:
+        """Asset index planted in a synthetic thumbnail URL (ground truth for recall)"""
+        matched = _IMAGE_PATH.match(httpx.URL(url).path)
+        if matched is None or matched.group(4) is None:
+            return None
+        return int(matched.group(4))
+
+
+class SyntheticImageTransport(httpx.AsyncBaseTransport):
+    """
+    Serve synthetic thumbnails from memory
+    其他主機的請求交給 wrapped (None 表示直接連線)
+    """
+
+    def __init__(self, catalog: SyntheticCatalog, wrapped: Optional[httpx.AsyncBaseTransport] = None):
+        self.catalog = catalog
+        self.wrapped = wrapped
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.url.host == SYNTHETIC_IMAGE_HOST:
+            data = self.catalog.render_image(str(request.url))
+            if data is None:
+                return httpx.Response(404, request=request)
+            return httpx.Response(200, headers={'Content-Type': 'image/jpeg'}, content=data, request=request)
+
+        if self.wrapped is None:
+            self.wrapped = httpx.AsyncHTTPTransport()
+        return await self.wrapped.handle_async_request(request)
+
+    async def aclose(self):
+        # Shared by many short-lived clients: keep the pool open
+        pass
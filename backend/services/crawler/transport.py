@@ -0,0 +1,141 @@
+"""
+Crawler HTTP Transports
+爬蟲 HTTP 傳輸層 - 錄製 / 重播 / 導向本地替身伺服器，讓爬蟲效能測試不需連線真實網站
+"""
+import hashlib
+import json
+import os
+from typing import Optional
+
+import httpx
+
+
+# Headers that no longer describe the body once httpx has decoded it
+_DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+
+def cassette_key(method: str, url: str) -> str:
+    """Stable file key for a request"""
+    return hashlib.sha1(f"{method.upper()} {url}".encode()).hexdigest()
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """
+    Record/replay transport
+    record: 轉送真實請求並將回應存檔；replay: 只從存檔回應，找不到即視為連線失敗
+    """
+
+    def __init__(
+        self,
+        cassette_dir: str,
+        mode: str = 'replay',
+        wrapped: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.cassette_dir = cassette_dir
+        self.mode = mode
+        self.wrapped = wrapped or httpx.AsyncHTTPTransport()
+        os.makedirs(cassette_dir, exist_ok=True)
+
+    def _paths(self, request: httpx.Request):
+        key = cassette_key(request.method, str(request.url))
+        base = os.path.join(self.cassette_dir, key[:2], key)
+        return f"{base}.json", f"{base}.body"
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        meta_path, body_path = self._paths(request)
+
+        if self.mode == 'replay':
+            recorded = load_recording(meta_path, body_path)
+            if recorded is None:
+                raise httpx.ConnectError(f"No recording for {request.method} {request.url}", request=request)
+            status, headers, body = recorded
+            return httpx.Response(status, headers=headers, content=body, request=request)
+
+        response = await self.wrapped.handle_async_request(request)
+        body = await response.aread()
+        await response.aclose()
+        headers = [
+            (name, value) for name, value in response.headers.items()
+            if name.lower() not in _DROPPED_HEADERS
+        ]
+
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        with open(body_path, 'wb') as f:
+            f.write(body)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'method': request.method,
+                'url': str(request.url),
+                'status': response.status_code,
+                'headers': headers
+            }, f, ensure_ascii=False)
+
+        return httpx.Response(response.status_code, headers=headers, content=body, request=request)
+
+    async def aclose(self):
+        # Shared by many short-lived clients: keep the pool open
+        pass
+
+
+def load_recording(meta_path: str, body_path: str):
+    """Return (status, headers, body) for a recorded response, or None"""
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    body = b''
+    if os.path.exists(body_path):
+        with open(body_path, 'rb') as f:
+            body = f.read()
+    return meta['status'], meta['headers'], body
+
+
+class RedirectTransport(httpx.AsyncBaseTransport):
+    """
+    Send every request to a local stand-in server
+    https://shopee.tw/api/... → http://127.0.0.1:8900/shopee.tw/api/...
+    """
+
+    def __init__(self, base_url: str, wrapped: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = httpx.URL(base_url)
+        self.wrapped = wrapped or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        original = request.url
+        request.url = self.base_url.copy_with(
+            path=f"/{original.host}{original.path}",
+            query=original.query or None
+        )
+        request.headers['Host'] = request.url.netloc.decode()
+        return await self.wrapped.handle_async_request(request)
+
+    async def aclose(self):
+        # Shared by many short-lived clients: keep the pool open
+        pass
+
+
+def build_transport(
+    mode: str = 'live',
+    cassette_dir: str = './data/cassettes',
+    standin_url: str = 'http://127.0.0.1:8900'
+) -> Optional[httpx.AsyncBaseTransport]:
+    """
+    Build the crawler transport for a mode
+
+    Args:
+        mode: 'live' (real sites), 'record', 'replay' or 'standin'
+        cassette_dir: Where recordings are stored
+        standin_url: Base URL of the local stand-in server
+
+    Returns:
+        Transport to pass to httpx.AsyncClient, or None for live traffic
+    """
+    if mode == 'live':
+        return None
+    if mode in ('record', 'replay'):
+        return CassetteTransport(cassette_dir, mode=mode)
+    if mode == 'standin':
+        return RedirectTransport(standin_url)
+    raise ValueError(f"Unknown crawler HTTP mode: {mode}")
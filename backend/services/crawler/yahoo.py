@@ -1,11 +1,9 @@
 """
 Yahoo Shopping Crawler - Yahoo 購物中心爬蟲 (簡化版)
 """
-import time
 from typing import List, Optional
-from loguru import logger
 
-from .base import BaseCrawler, ProductListing, CrawlerResult
+from .base import BaseCrawler, ProductListing
 
 
 class YahooCrawler(BaseCrawler):
@@ -18,20 +16,19 @@ class YahooCrawler(BaseCrawler):
             **kwargs
         )
 
-    async def search(
+    async def search_page(
         self,
         keyword: str,
-        max_pages: int = 5,
-        max_results: int = 100
-    ) -> CrawlerResult:
+        page: int,
+        page_size: int = 50
+    ) -> List[ProductListing]:
         """搜尋 Yahoo 商品 - 模擬結果"""
-        start_time = time.time()
-        listings = []
-        errors = []
-
-        logger.info(f"Yahoo search for: {keyword}")
+        # 模擬結果只有一頁
+        if page > 0:
+            return []
 
-        for i in range(min(10, max_results)):
+        listings = []
+        for i in range(min(10, page_size)):
             listings.append(ProductListing(
                 id=f"yahoo_{keyword}_{i}",
                 platform='yahoo',
@@ -44,21 +41,12 @@ class YahooCrawler(BaseCrawler):
                 location="台灣"
             ))
 
-        duration_ms = int((time.time() - start_time) * 1000)
-
-        return CrawlerResult(
-            platform='yahoo',
-            keyword=keyword,
-            total_found=len(listings),
-            listings=listings,
-            pages_scraped=1,
-            duration_ms=duration_ms,
-            errors=errors,
-            success=True
-        )
+        return listings
 
     async def get_product_details(self, product_url: str) -> Optional[ProductListing]:
         return None
 
     async def get_seller_products(self, seller_id: str, max_products: int = 50) -> List[ProductListing]:
+        if self.synthetic is not None:
+            return self.synthetic.seller_listings(self.platform_name, seller_id, max_products)
         return []
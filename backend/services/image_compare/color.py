@@ -6,10 +6,11 @@ import cv2
 import numpy as np
 from PIL import Image
 from io import BytesIO
-import httpx
 from typing import Optional, Tuple, Dict
 from loguru import logger
 
+from .fetch import fetch_image, check_image_bytes, check_image_file
+
 
 class ColorHistogramCompare:
     """
@@ -84,23 +85,24 @@ class ColorHistogramCompare:
                 return np.array(source.convert('RGB'))
 
             if isinstance(source, bytes):
+                check_image_bytes(source)
                 pil_image = Image.open(BytesIO(source)).convert('RGB')
                 return np.array(pil_image)
 
             if isinstance(source, str):
                 if source.startswith(('http://', 'https://')):
-                    async with httpx.AsyncClient(timeout=30) as client:
-                        response = await client.get(source)
-                        response.raise_for_status()
-                        pil_image = Image.open(BytesIO(response.content)).convert('RGB')
-                        return np.array(pil_image)
+                    image_data = await fetch_image(source)
+                    pil_image = Image.open(BytesIO(image_data)).convert('RGB')
+                    return np.array(pil_image)
                 elif source.startswith('data:image'):
                     import base64
                     header, data = source.split(',', 1)
                     image_data = base64.b64decode(data)
+                    check_image_bytes(image_data)
                     pil_image = Image.open(BytesIO(image_data)).convert('RGB')
                     return np.array(pil_image)
                 else:
+                    check_image_file(source)
                     pil_image = Image.open(source).convert('RGB')
                     return np.array(pil_image)
 
@@ -216,17 +218,19 @@ class DominantColorCompare:
             # Load image
             if isinstance(image_source, str):
                 if image_source.startswith(('http://', 'https://')):
-                    async with httpx.AsyncClient(timeout=30) as client:
-                        response = await client.get(image_source)
-                        image = Image.open(BytesIO(response.content)).convert('RGB')
+                    image_data = await fetch_image(image_source)
+                    image = Image.open(BytesIO(image_data)).convert('RGB')
                 elif image_source.startswith('data:image'):
                     import base64
                     header, data = image_source.split(',', 1)
                     image_data = base64.b64decode(data)
+                    check_image_bytes(image_data)
                     image = Image.open(BytesIO(image_data)).convert('RGB')
                 else:
+                    check_image_file(image_source)
                     image = Image.open(image_source).convert('RGB')
             elif isinstance(image_source, bytes):
+                check_image_bytes(image_source)
                 image = Image.open(BytesIO(image_source)).convert('RGB')
             else:
                 image = image_source.convert('RGB')
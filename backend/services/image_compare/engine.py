@@ -59,16 +59,7 @@ class ImageCompareEngine:
         """比對兩張圖片"""
         try:
             similarity, hash1, hash2 = await self.phash.compare_images(image1, image2)
-
-            return ComparisonResult(
-                overall_similarity=round(similarity, 2),
-                phash_score=round(similarity, 2),
-                orb_score=0,
-                color_score=0,
-                similarity_level=self._get_similarity_level(similarity),
-                is_match=similarity >= self.threshold,
-                details={'phash1': hash1, 'phash2': hash2}
-            )
+            return self.result_from_phash(similarity, hash1, hash2)
 
         except Exception as e:
             logger.error(f"Error comparing images: {e}")
@@ -82,6 +73,23 @@ class ImageCompareEngine:
                 details={'error': str(e)}
             )
 
+    def result_from_phash(
+        self,
+        similarity: float,
+        hash1: Optional[str] = None,
+        hash2: Optional[str] = None
+    ) -> ComparisonResult:
+        """比對結果 (已知 pHash 相似度時，不需重新載入圖片)"""
+        return ComparisonResult(
+            overall_similarity=round(similarity, 2),
+            phash_score=round(similarity, 2),
+            orb_score=0,
+            color_score=0,
+            similarity_level=self._get_similarity_level(similarity),
+            is_match=similarity >= self.threshold,
+            details={'phash1': hash1, 'phash2': hash2}
+        )
+
     def _get_similarity_level(self, score: float) -> str:
         """判斷相似度等級"""
         if score >= 95:
@@ -0,0 +1,249 @@
+"""
+Safe Image Fetching
+圖片安全下載 - 串流下載並限制大小，先讀檔頭判斷格式與像素尺寸，
+超過上限、非圖片或解壓縮炸彈 (小檔案、超大像素) 會在讀完前就中止
+
+本機圖片 (上傳的素材、檔案路徑、data URL) 只限制位元組數與像素數：
+檔頭格式不在下載支援清單內 (TIFF、ICO、HEIC 等) 或尺寸不在前 SNIFF_LIMIT
+位元組內時，改由 PIL 延遲開啟讀取尺寸 (只讀檔頭，不解碼)
+"""
+import os
+import struct
+from dataclasses import dataclass
+from io import BytesIO
+from typing import BinaryIO, Dict, Optional, Union
+
+import httpx
+from PIL import Image
+
+
+# Hard limits for any image we download or decode
+MAX_IMAGE_BYTES = 10 * 1024 * 1024   # 10MB encoded
+MAX_IMAGE_PIXELS = 40_000_000        # 40MP decoded (~120MB RGB)
+
+# Give up looking for the dimensions after this many header bytes
+SNIFF_LIMIT = 64 * 1024
+
+# JPEG start-of-frame markers (carry the dimensions)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# JPEG markers without a length field
+_JPEG_STANDALONE = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+
+
+class ImageRejected(Exception):
+    """Download or decode refused (too large, not an image, decompression bomb)"""
+
+
+@dataclass
+class ImageInfo:
+    """格式與像素尺寸 (由檔頭取得，不需解碼)"""
+    format: str
+    width: int
+    height: int
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+
+def sniff_image(header: bytes) -> Optional[ImageInfo]:
+    """
+    Read format and dimensions from the first bytes of an encoded image
+
+    Returns:
+        ImageInfo, or None when more bytes are needed
+
+    Raises:
+        ImageRejected: The bytes are not a supported image format
+    """
+    if len(header) < 12:
+        return None
+
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        if len(header) < 24:
+            return None
+        width, height = struct.unpack('>II', header[16:24])
+        return ImageInfo('png', width, height)
+
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        width, height = struct.unpack('<HH', header[6:10])
+        return ImageInfo('gif', width, height)
+
+    if header.startswith(b'\xff\xd8'):
+        return _sniff_jpeg(header)
+
+    if header.startswith(b'RIFF') and header[8:12] == b'WEBP':
+        return _sniff_webp(header)
+
+    if header.startswith(b'BM'):
+        if len(header) < 26:
+            return None
+        width, height = struct.unpack('<ii', header[18:26])
+        return ImageInfo('bmp', abs(width), abs(height))
+
+    raise ImageRejected("not a supported image format")
+
+
+def _sniff_jpeg(data: bytes) -> Optional[ImageInfo]:
+    i = 2
+    while True:
+        # Skip fill bytes up to the next marker
+        while i < len(data) and data[i] == 0xFF:
+            i += 1
+        if i >= len(data):
+            return None
+        marker = data[i]
+        i += 1
+        if marker in _JPEG_STANDALONE:
+            continue
+        if marker == 0xD9 or marker == 0xDA:
+            # End of image / start of scan before any frame header
+            raise ImageRejected("JPEG without frame header")
+        if i + 2 > len(data):
+            return None
+        length = struct.unpack('>H', data[i:i + 2])[0]
+        if marker in _JPEG_SOF:
+            if i + 7 > len(data):
+                return None
+            height, width = struct.unpack('>HH', data[i + 3:i + 7])
+            return ImageInfo('jpeg', width, height)
+        i += length
+
+
+def _sniff_webp(data: bytes) -> Optional[ImageInfo]:
+    if len(data) < 30:
+        return None
+    chunk = data[12:16]
+    if chunk == b'VP8 ':
+        width, height = struct.unpack('<HH', data[26:30])
+        return ImageInfo('webp', width & 0x3FFF, height & 0x3FFF)
+    if chunk == b'VP8L':
+        b0, b1, b2, b3 = data[21:25]
+        width = 1 + (b0 | ((b1 & 0x3F) << 8))
+        height = 1 + ((b1 >> 6) | (b2 << 2) | ((b3 & 0x0F) << 10))
+        return ImageInfo('webp', width, height)
+    if chunk == b'VP8X':
+        width = 1 + int.from_bytes(data[24:27], 'little')
+        height = 1 + int.from_bytes(data[27:30], 'little')
+        return ImageInfo('webp', width, height)
+    raise ImageRejected("unknown WebP chunk")
+
+
+def _check_info(info: ImageInfo, max_pixels: int) -> ImageInfo:
+    if info.width <= 0 or info.height <= 0:
+        raise ImageRejected(f"invalid dimensions {info.width}x{info.height}")
+    if info.pixels > max_pixels:
+        raise ImageRejected(f"{info.width}x{info.height} exceeds {max_pixels} pixels")
+    return info
+
+
+def _open_image_info(source: Union[str, BinaryIO], max_pixels: int) -> ImageInfo:
+    """Dimensions from PIL's lazy open (header only, pixels are not decoded)"""
+    try:
+        with Image.open(source) as image:
+            width, height = image.size
+            image_format = (image.format or '').lower()
+    except Image.DecompressionBombError as e:
+        raise ImageRejected(str(e))
+    except (OSError, SyntaxError, ValueError) as e:
+        raise ImageRejected(f"not an image: {e}")
+    return _check_info(ImageInfo(image_format, width, height), max_pixels)
+
+
+def check_image_bytes(
+    data: bytes,
+    max_pixels: int = MAX_IMAGE_PIXELS,
+    max_bytes: int = MAX_IMAGE_BYTES
+) -> ImageInfo:
+    """Validate an in-memory image before decoding it"""
+    if len(data) > max_bytes:
+        raise ImageRejected(f"{len(data)} bytes exceeds {max_bytes} bytes")
+    try:
+        info = sniff_image(data[:SNIFF_LIMIT])
+    except ImageRejected:
+        info = None
+    if info is None:
+        return _open_image_info(BytesIO(data), max_pixels)
+    return _check_info(info, max_pixels)
+
+
+def check_image_file(
+    path: str,
+    max_pixels: int = MAX_IMAGE_PIXELS,
+    max_bytes: int = MAX_IMAGE_BYTES
+) -> ImageInfo:
+    """Validate an image file before decoding it (reads the header only)"""
+    size = os.path.getsize(path)
+    if size > max_bytes:
+        raise ImageRejected(f"{size} bytes exceeds {max_bytes} bytes")
+    with open(path, 'rb') as f:
+        header = f.read(SNIFF_LIMIT)
+    try:
+        info = sniff_image(header)
+    except ImageRejected:
+        info = None
+    if info is None:
+        return _open_image_info(path, max_pixels)
+    return _check_info(info, max_pixels)
+
+
+async def fetch_image(
+    url: str,
+    client: Optional[httpx.AsyncClient] = None,
+    max_bytes: int = MAX_IMAGE_BYTES,
+    max_pixels: int = MAX_IMAGE_PIXELS,
+    timeout: float = 30,
+    headers: Optional[Dict[str, str]] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None
+) -> bytes:
+    """
+    Stream an image with a byte cap, validating its header on the way
+
+    The request is aborted as soon as the response is known to be
+    oversized (Content-Length or bytes read), not an image, or larger
+    than max_pixels once decoded.
+
+    Args:
+        url: Image URL
+        client: Client to reuse; a short-lived one is created otherwise
+        max_bytes: Encoded size limit
+        max_pixels: Decoded size limit (width × height)
+        timeout, headers, transport: Used when no client is given
+
+    Raises:
+        ImageRejected: Limits exceeded or not an image
+        httpx.HTTPError: Request failed
+    """
+    if client is None:
+        async with httpx.AsyncClient(timeout=timeout, headers=headers, transport=transport) as own_client:
+            return await fetch_image(url, own_client, max_bytes, max_pixels)
+
+    async with client.stream('GET', url) as response:
+        response.raise_for_status()
+
+        content_type = response.headers.get('content-type', '')
+        if content_type.startswith(('text/', 'application/json')):
+            raise ImageRejected(f"content type {content_type}")
+
+        declared = response.headers.get('content-length', '')
+        if declared.isdigit() and int(declared) > max_bytes:
+            raise ImageRejected(f"Content-Length {declared} exceeds {max_bytes} bytes")
+
+        buffer = bytearray()
+        info = None
+        sniffing = True
+        async for chunk in response.aiter_bytes():
+            buffer += chunk
+            if len(buffer) > max_bytes:
+                raise ImageRejected(f"body exceeds {max_bytes} bytes")
+            if sniffing:
+                info = sniff_image(bytes(buffer[:SNIFF_LIMIT]))
+                if info is not None:
+                    _check_info(info, max_pixels)
+                # A supported format whose dimensions sit past SNIFF_LIMIT
+                # (e.g. JPEG with large EXIF/ICC segments) is checked once complete
+                sniffing = info is None and len(buffer) < SNIFF_LIMIT
+
+        if info is None:
+            check_image_bytes(bytes(buffer), max_pixels, max_bytes)
+        return bytes(buffer)
@@ -6,10 +6,47 @@ import imagehash
 from PIL import Image
 import numpy as np
 from io import BytesIO
-import httpx
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 from loguru import logger
 
+from .fetch import fetch_image, check_image_bytes, check_image_file
+
+
+# Set bits per byte value, for vectorized popcount
+_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+class PackedHashes:
+    """
+    Hex hashes packed into one uint8 matrix
+    一次以 XOR + popcount 查表計算某個 hash 與所有 hash 的漢明距離
+    """
+
+    def __init__(self, hashes: List[Optional[str]], bits: int):
+        self.bits = bits
+        self.valid = np.array([h is not None for h in hashes], dtype=bool)
+        self.matrix = np.zeros((len(hashes), bits // 8), dtype=np.uint8)
+        for row, hash_hex in enumerate(hashes):
+            if hash_hex is not None:
+                self.matrix[row] = np.frombuffer(bytes.fromhex(hash_hex), dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def distances(self, hash_hex: str) -> np.ndarray:
+        """Hamming distance to every packed hash"""
+        row = np.frombuffer(bytes.fromhex(hash_hex), dtype=np.uint8)
+        return _POPCOUNT[self.matrix ^ row].sum(axis=1, dtype=np.int32)
+
+    def similarities(self, hash_hex: str) -> np.ndarray:
+        """
+        Similarity 0-100 to every packed hash (same scale as
+        PHashCompare.compute_similarity); -1 where the hash is missing
+        """
+        scores = np.round((1 - self.distances(hash_hex) / self.bits) * 100, 2)
+        scores[~self.valid] = -1
+        return scores
+
 
 class PHashCompare:
     """
@@ -49,6 +86,20 @@ class PHashCompare:
             logger.error(f"Error computing pHash: {e}")
             return None
 
+    def compute_hash_from_bytes(self, data: bytes) -> Optional[str]:
+        """
+        Compute perceptual hash from raw image bytes
+
+        Blocking (decode + DCT); call through asyncio.to_thread from async code.
+        """
+        try:
+            check_image_bytes(data)
+            image = Image.open(BytesIO(data)).convert('RGB')
+            return str(imagehash.phash(image, hash_size=self.hash_size))
+        except Exception as e:
+            logger.error(f"Error computing pHash: {e}")
+            return None
+
     async def _load_image(self, source: str | bytes | Image.Image) -> Optional[Image.Image]:
         """Load image from various sources"""
         try:
@@ -56,23 +107,24 @@ class PHashCompare:
                 return source.convert('RGB')
 
             if isinstance(source, bytes):
+                check_image_bytes(source)
                 return Image.open(BytesIO(source)).convert('RGB')
 
             if isinstance(source, str):
                 if source.startswith(('http://', 'https://')):
                     # Download from URL
-                    async with httpx.AsyncClient(timeout=30) as client:
-                        response = await client.get(source)
-                        response.raise_for_status()
-                        return Image.open(BytesIO(response.content)).convert('RGB')
+                    image_data = await fetch_image(source)
+                    return Image.open(BytesIO(image_data)).convert('RGB')
                 elif source.startswith('data:image'):
                     # Base64 data URL
                     import base64
                     header, data = source.split(',', 1)
                     image_data = base64.b64decode(data)
+                    check_image_bytes(image_data)
                     return Image.open(BytesIO(image_data)).convert('RGB')
                 else:
                     # File path
+                    check_image_file(source)
                     return Image.open(source).convert('RGB')
 
             return None
@@ -81,6 +133,10 @@ class PHashCompare:
             logger.error(f"Error loading image: {e}")
             return None
 
+    def pack(self, hashes: List[Optional[str]]) -> PackedHashes:
+        """Pack hashes for scoring one hash against all of them at once"""
+        return PackedHashes(hashes, self.hash_size * self.hash_size)
+
     def compute_similarity(self, hash1: str, hash2: str) -> float:
         """
         Compute similarity between two pHash values
@@ -0,0 +1,138 @@
+"""
+Progress Hub
+進度廣播 - 每個任務可有任意數量的訂閱者 (WebSocket / SSE)
+
+發佈端可以任意頻率 publish，hub 依 max_rate 合併 (coalesce) 成最多每秒 max_rate 次送出，
+訂閱者只會拿到最新狀態 (慢的訂閱者不會累積佇列)；新訂閱者先收到最後一次的狀態。
+最終狀態 (final=True) 立即送出，之後訂閱結束。
+"""
+import asyncio
+import time
+from typing import Dict, Optional, Set
+
+
+class Subscription:
+    """One subscriber's view of a task: the newest undelivered state (latest wins)"""
+
+    def __init__(self, hub: 'ProgressHub', task_id: str):
+        self.hub = hub
+        self.task_id = task_id
+        self.finished = False
+        self._state: Optional[Dict] = None
+        self._final = False
+        self._event = asyncio.Event()
+
+    def _offer(self, state: Dict, final: bool = False):
+        self._state = state
+        self._final = final
+        self._event.set()
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Next state; None if nothing arrived within timeout"""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._event.clear()
+        state, self._state = self._state, None
+        self.finished = self._final
+        return state
+
+    def close(self):
+        self.hub._unsubscribe(self)
+
+    def __enter__(self) -> 'Subscription':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ProgressHub:
+    """
+    Per-process progress broadcaster
+
+    Args:
+        max_rate: Deliveries per second per task (0 = every publish)
+    """
+
+    def __init__(self, max_rate: float = 4.0):
+        self.interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self._last: Dict[str, Dict] = {}
+        self._sent_at: Dict[str, float] = {}
+        self._pending: Dict[str, asyncio.TimerHandle] = {}
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self.published = 0
+        self.delivered = 0
+
+    def publish(self, task_id: str, state: Dict, final: bool = False):
+        """Record the task's state; subscribers get it now or at the next allowed delivery"""
+        self.published += 1
+        self._last[task_id] = state
+        if final or self.interval == 0:
+            self._deliver(task_id, final)
+            return
+        if task_id in self._pending:
+            # Folded into the delivery already scheduled
+            return
+        wait = self._sent_at.get(task_id, 0.0) + self.interval - time.monotonic()
+        if wait <= 0:
+            self._deliver(task_id)
+        else:
+            self._pending[task_id] = asyncio.get_running_loop().call_later(wait, self._deliver, task_id)
+
+    def _deliver(self, task_id: str, final: bool = False):
+        handle = self._pending.pop(task_id, None)
+        if handle is not None:
+            handle.cancel()
+        state = self._last.get(task_id)
+        if state is None:
+            return
+        self._sent_at[task_id] = time.monotonic()
+        for subscription in self._subscribers.get(task_id, ()):
+            subscription._offer(state, final)
+            self.delivered += 1
+        if final:
+            # Late joiners of a finished task read its stored state instead
+            self._last.pop(task_id, None)
+            self._sent_at.pop(task_id, None)
+
+    def discard(self, task_id: str):
+        """
+        Forget a task's state without a final delivery (its runner stopped)
+
+        Subscribers stay connected; with the hub quiet they fall back to the stored state.
+        """
+        handle = self._pending.pop(task_id, None)
+        if handle is not None:
+            handle.cancel()
+        self._last.pop(task_id, None)
+        self._sent_at.pop(task_id, None)
+
+    def last(self, task_id: str) -> Optional[Dict]:
+        return self._last.get(task_id)
+
+    def subscribe(self, task_id: str) -> Subscription:
+        """Subscribe to a task; the last published state (if any) is replayed first"""
+        subscription = Subscription(self, task_id)
+        self._subscribers.setdefault(task_id, set()).add(subscription)
+        state = self._last.get(task_id)
+        if state is not None:
+            subscription._offer(state)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.task_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.task_id]
+
+    def stats(self) -> Dict:
+        return {
+            'tasks': len(self._last),
+            'subscribers': sum(len(subscribers) for subscribers in self._subscribers.values()),
+            'published': self.published,
+            'delivered': self.delivered
+        }
@@ -0,0 +1,93 @@
+"""
+Storage
+持久化儲存 - 資產、掃描任務、掃描進度與侵權記錄 (SQLite WAL)
+"""
+from typing import Dict, Optional
+
+from .database import (
+    Database, DocumentTable, BufferedTable, IS_NULL, NOT_NULL, greater_than, encode_cursor, decode_cursor
+)
+from .stats import ViolationStats
+from .queue import JobQueue
+
+
+def violation_listing_key(violation: Dict) -> Optional[str]:
+    """Dedupe key: one violation per (asset, platform, listing id); None when the listing has no id"""
+    listing = violation.get('listing') or {}
+    listing_id = listing.get('id') or listing.get('url')
+    if not listing_id:
+        return None
+    return f"{violation.get('asset_id')}|{violation.get('platform')}|{listing_id}"
+
+
+class Storage:
+    """Application tables sharing one database file"""
+
+    def __init__(self, path: str):
+        self.db = Database(path)
+        self.assets = DocumentTable(
+            self.db, 'assets',
+            columns=('user_id', 'status', 'created_at'),
+            indexes=(('created_at', 'id'), ('status', 'created_at', 'id'))
+        )
+        self.scans = DocumentTable(
+            self.db, 'scans',
+            columns=('user_id', 'status', 'created_at', 'lease_until'),
+            indexes=(('created_at', 'id'), ('status', 'created_at', 'id'), ('status', 'lease_until'))
+        )
+        # Queued scans are claimed from the scans table itself; progress checkpoints for resume
+        self.scan_queue = JobQueue(self.scans)
+        self.scan_checkpoints = DocumentTable(self.db, 'scan_checkpoints')
+        # Full scan results, kept out of the scans table so listing tasks stays cheap
+        self.scan_results = DocumentTable(self.db, 'scan_results')
+        self.scan_progress = BufferedTable(self.db, 'scan_progress')
+        # Violations of each scan, appended while it runs and paged in the order they were found
+        self.scan_violations = DocumentTable(
+            self.db, 'scan_violations',
+            columns=('task_id', 'seq'),
+            indexes=(('task_id', 'seq'),),
+            order_by='seq'
+        )
+        self.violations = DocumentTable(
+            self.db, 'violations',
+            columns=('task_id', 'asset_id', 'platform', 'case_id', 'is_whitelisted', 'created_at'),
+            computed={
+                'has_case': lambda violation: 1 if violation.get('case_id') else 0,
+                'listing_key': violation_listing_key,
+                'seller_id': lambda violation: (violation.get('listing') or {}).get('seller_id') or None
+            },
+            # Each filter column leads an index ending in the page order: one range scan per page
+            indexes=(
+                ('created_at', 'id'),
+                ('task_id', 'created_at', 'id'),
+                ('asset_id', 'created_at', 'id'),
+                ('platform', 'created_at', 'id'),
+                ('has_case', 'created_at', 'id'),
+                ('case_id',),
+                ('listing_key',),
+                # Seller history for the crawl frontier: covering index for the GROUP BY
+                ('platform', 'seller_id', 'is_whitelisted'),
+            )
+        )
+        self.violation_stats = ViolationStats(self.db, self.violations)
+        self.violations.on_change = self.violation_stats.apply
+
+    def close(self):
+        self.scan_progress.flush_sync()
+        self.db.close()
+
+
+__all__ = [
+    'Storage',
+    'Database',
+    'DocumentTable',
+    'BufferedTable',
+    'ViolationStats',
+    'JobQueue',
+    'violation_listing_key',
+    'IS_NULL',
+    'NOT_NULL',
+    'greater_than',
+    'encode_cursor',
+    'decode_cursor',
+]
@@ -0,0 +1,467 @@
+"""
+SQLite Database
+SQLite (WAL) 連線與文件資料表
+
+每筆資料以 JSON 文件儲存，另外把用來篩選、排序的欄位存成獨立欄位並建立索引。
+WAL 模式下讀取不會被寫入阻擋，多個 uvicorn worker 可以共用同一個資料庫檔案。
+每個執行緒各自一個連線；路由透過 async 方法在 thread pool 中存取，不會卡住 event loop。
+"""
+import asyncio
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+class _Condition:
+    """Filter value matching NULL / non-NULL columns or a range"""
+
+    def __init__(self, sql: str, params: Sequence[Any] = ()):
+        self.sql = sql
+        self.params = list(params)
+
+
+IS_NULL = _Condition("IS NULL")
+NOT_NULL = _Condition("IS NOT NULL")
+
+
+def greater_than(value: Any) -> _Condition:
+    """Filter value matching column > value"""
+    return _Condition("> ?", (value,))
+
+
+def encode_cursor(key: Tuple) -> str:
+    """Opaque cursor for a (sort value, id) position"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple:
+    """Raises ValueError for malformed cursors"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {cursor}") from e
+    if not isinstance(key, list) or len(key) != 2:
+        raise ValueError(f"invalid cursor: {cursor}")
+    return tuple(key)
+
+
+class Database:
+    """
+    SQLite database in WAL mode
+
+    Args:
+        path: Database file
+        busy_timeout: Seconds a writer waits for another process' write lock
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+
+        conn = self.connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+
+    def connect(self) -> sqlite3.Connection:
+        """This thread's connection (autocommit; use transaction() to group writes)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction (takes the write lock up front: no upgrade deadlocks)"""
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run a blocking database call in the thread pool"""
+        return await asyncio.to_thread(fn, *args)
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+class DocumentTable:
+    """
+    JSON documents keyed by "id", with indexed columns copied from the document
+
+    Pages are ordered by (order_by, id) and continued with a keyset cursor,
+    so each page is one index range scan no matter how deep it is.
+
+    Args:
+        db: Database
+        name: Table name
+        columns: Document fields stored as columns (filterable)
+        indexes: Column tuples to index
+        computed: Extra columns derived from the document (name -> function)
+        order_by: Column pages are sorted by (ties broken by id)
+
+    on_change(conn, changes) is called inside every write transaction with
+    (old, new) document pairs (None for insert / delete), so derived data
+    such as counters commits or rolls back together with the documents.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        name: str,
+        columns: Sequence[str] = (),
+        indexes: Sequence[Tuple[str, ...]] = (),
+        computed: Optional[Dict[str, Callable[[Dict], Any]]] = None,
+        order_by: str = 'created_at'
+    ):
+        self.db = db
+        self.name = name
+        self.computed = dict(computed or {})
+        self.columns = tuple(columns) + tuple(self.computed)
+        self.order_by = order_by
+        self.on_change: Optional[Callable[[sqlite3.Connection, List[Tuple[Optional[Dict], Optional[Dict]]]], None]] = None
+
+        conn = db.connect()
+        column_sql = ''.join(f", {column}" for column in self.columns)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {name} (id TEXT PRIMARY KEY{column_sql}, data TEXT NOT NULL)")
+        self._add_missing_columns(conn)
+        for index in indexes:
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{name}_{'_'.join(index)} ON {name} ({', '.join(index)})"
+            )
+
+        column_names = ', '.join(('id', *self.columns, 'data'))
+        self._insert_sql = (
+            f"INSERT OR REPLACE INTO {name} ({column_names}) "
+            f"VALUES ({', '.join('?' * (len(self.columns) + 2))})"
+        )
+
+    def _add_missing_columns(self, conn: sqlite3.Connection):
+        """Columns added after the table was created are backfilled from the documents"""
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({self.name})")}
+        missing = [column for column in self.columns if column not in existing]
+        if not missing:
+            return
+        with self.db.transaction() as conn:
+            for column in missing:
+                conn.execute(f"ALTER TABLE {self.name} ADD COLUMN {column}")
+            rows = conn.execute(f"SELECT id, data FROM {self.name}").fetchall()
+            assignments = ', '.join(f"{column} = ?" for column in missing)
+            conn.executemany(
+                f"UPDATE {self.name} SET {assignments} WHERE id = ?",
+                [(*self._values(json.loads(data), missing), doc_id) for doc_id, data in rows]
+            )
+
+    # ==================== Sync ====================
+
+    def _values(self, doc: Dict, columns: Sequence[str]) -> List:
+        return [
+            self.computed[column](doc) if column in self.computed else doc.get(column)
+            for column in columns
+        ]
+
+    def _row(self, doc: Dict) -> Tuple:
+        return (doc['id'], *self._values(doc, self.columns), json.dumps(doc, ensure_ascii=False))
+
+    def _where(self, filters: Dict[str, Any]) -> Tuple[str, List]:
+        clauses, params = [], []
+        for column, value in filters.items():
+            if column not in self.columns:
+                raise ValueError(f"{self.name}.{column} is not an indexed column")
+            if isinstance(value, _Condition):
+                clauses.append(f"{column} {value.sql}")
+                params.extend(value.params)
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def get_sync(self, doc_id: str) -> Optional[Dict]:
+        row = self.db.connect().execute(f"SELECT data FROM {self.name} WHERE id = ?", (doc_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_sync(self, filters: Dict[str, Any]) -> List[Dict]:
+        where, params = self._where(filters)
+        rows = self.db.connect().execute(f"SELECT data FROM {self.name}{where} ORDER BY rowid", params)
+        return [json.loads(row[0]) for row in rows]
+
+    def page_sync(self, filters: Dict[str, Any], limit: int, after: Optional[Tuple]) -> Tuple[List[Dict], Optional[Tuple]]:
+        where, params = self._where(filters)
+        if after is not None:
+            where += (" AND " if where else " WHERE ") + f"({self.order_by}, id) > (?, ?)"
+            params.extend(after)
+        rows = self.db.connect().execute(
+            f"SELECT {self.order_by}, id, data FROM {self.name}{where} "
+            f"ORDER BY {self.order_by}, id LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+        next_key = (rows[limit - 1][0], rows[limit - 1][1]) if len(rows) > limit else None
+        return [json.loads(row[2]) for row in rows[:limit]], next_key
+
+    def count_sync(self, filters: Dict[str, Any]) -> int:
+        where, params = self._where(filters)
+        return self.db.connect().execute(f"SELECT COUNT(*) FROM {self.name}{where}", params).fetchone()[0]
+
+    def count_by_sync(self, columns: Sequence[str], filters: Dict[str, Any]) -> Dict[Tuple, int]:
+        for column in columns:
+            if column not in self.columns:
+                raise ValueError(f"{self.name}.{column} is not an indexed column")
+        where, params = self._where(filters)
+        group = ', '.join(columns)
+        rows = self.db.connect().execute(
+            f"SELECT {group}, COUNT(*) FROM {self.name}{where} GROUP BY {group}", params
+        )
+        return {tuple(row[:-1]): row[-1] for row in rows}
+
+    def insert_many_sync(self, docs: Iterable[Dict]):
+        with self.db.transaction() as conn:
+            self._write(conn, list(docs))
+
+    def insert_unique_sync(self, docs: List[Dict], column: str) -> List[Dict]:
+        """
+        Insert the documents whose column value is not stored yet (first one wins within docs);
+        the check and the insert share one transaction. NULL values are never duplicates.
+        """
+        if column not in self.columns:
+            raise ValueError(f"{self.name}.{column} is not an indexed column")
+        with self.db.transaction() as conn:
+            values = [self._values(doc, (column,))[0] for doc in docs]
+            keys = list({value for value in values if value is not None})
+            seen = set()
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                seen.update(row[0] for row in conn.execute(
+                    f"SELECT {column} FROM {self.name} WHERE {column} IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                ))
+            new_docs = []
+            for doc, value in zip(docs, values):
+                if value is not None:
+                    if value in seen:
+                        continue
+                    seen.add(value)
+                new_docs.append(doc)
+            self._write(conn, new_docs)
+        return new_docs
+
+    def _write(self, conn: sqlite3.Connection, docs: List[Dict]):
+        if self.on_change is not None:
+            current = self._get_many(conn, [doc['id'] for doc in docs])
+            changes = []
+            for doc in docs:
+                changes.append((current.get(doc['id']), doc))
+                current[doc['id']] = doc
+            self.on_change(conn, changes)
+        conn.executemany(self._insert_sql, [self._row(doc) for doc in docs])
+
+    def _get_many(self, conn: sqlite3.Connection, doc_ids: List[str]) -> Dict[str, Dict]:
+        found = {}
+        for start in range(0, len(doc_ids), 500):
+            chunk = doc_ids[start:start + 500]
+            rows = conn.execute(
+                f"SELECT id, data FROM {self.name} WHERE id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            found.update((doc_id, json.loads(data)) for doc_id, data in rows)
+        return found
+
+    def update_sync(self, doc_id: str, fields: Dict[str, Any]) -> Optional[Dict]:
+        with self.db.transaction() as conn:
+            return self._update(conn, doc_id, fields)
+
+    def _update(self, conn: sqlite3.Connection, doc_id: str, fields: Dict[str, Any]) -> Optional[Dict]:
+        row = conn.execute(f"SELECT data FROM {self.name} WHERE id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return None
+        old = json.loads(row[0])
+        doc = {**old, **fields}
+        if self.on_change is not None:
+            self.on_change(conn, [(old, doc)])
+        assignments = ''.join(f"{column} = ?, " for column in self.columns)
+        conn.execute(
+            f"UPDATE {self.name} SET {assignments}data = ? WHERE id = ?",
+            (*self._row(doc)[1:], doc_id)
+        )
+        return doc
+
+    def delete_sync(self, doc_id: str) -> Optional[Dict]:
+        with self.db.transaction() as conn:
+            row = conn.execute(f"SELECT data FROM {self.name} WHERE id = ?", (doc_id,)).fetchone()
+            if row is None:
+                return None
+            old = json.loads(row[0])
+            if self.on_change is not None:
+                self.on_change(conn, [(old, None)])
+            conn.execute(f"DELETE FROM {self.name} WHERE id = ?", (doc_id,))
+        return old
+
+    def delete_where_sync(self, filters: Dict[str, Any]) -> int:
+        """Delete every matching document in one statement; returns how many were deleted"""
+        if not filters:
+            raise ValueError(f"{self.name}: delete_where needs at least one filter")
+        where, params = self._where(filters)
+        with self.db.transaction() as conn:
+            if self.on_change is not None:
+                rows = conn.execute(f"SELECT data FROM {self.name}{where}", params)
+                self.on_change(conn, [(json.loads(data), None) for (data,) in rows])
+            return conn.execute(f"DELETE FROM {self.name}{where}", params).rowcount
+
+    # ==================== Async ====================
+
+    async def get(self, doc_id: str) -> Optional[Dict]:
+        return await self.db.run(self.get_sync, doc_id)
+
+    async def list(self, **filters) -> List[Dict]:
+        """Documents in insertion order; filters on indexed columns (None values ignored)"""
+        filters = {column: value for column, value in filters.items() if value is not None}
+        return await self.db.run(self.list_sync, filters)
+
+    async def page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        **filters
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of documents ordered by (order_by, id)
+
+        Returns:
+            (documents, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: Malformed cursor
+        """
+        filters = {column: value for column, value in filters.items() if value is not None}
+        after = decode_cursor(cursor) if cursor else None
+        docs, next_key = await self.db.run(self.page_sync, filters, limit, after)
+        return docs, encode_cursor(next_key) if next_key else None
+
+    async def count(self, **filters) -> int:
+        filters = {column: value for column, value in filters.items() if value is not None}
+        return await self.db.run(self.count_sync, filters)
+
+    async def count_by(self, columns: Sequence[str], **filters) -> Dict[Tuple, int]:
+        """Document counts per distinct value tuple of columns (one GROUP BY, no documents loaded)"""
+        filters = {column: value for column, value in filters.items() if value is not None}
+        return await self.db.run(self.count_by_sync, tuple(columns), filters)
+
+    async def insert(self, doc: Dict) -> Dict:
+        await self.db.run(self.insert_many_sync, [doc])
+        return doc
+
+    async def insert_many(self, docs: List[Dict]) -> List[Dict]:
+        """Insert in one transaction"""
+        if docs:
+            await self.db.run(self.insert_many_sync, docs)
+        return docs
+
+    async def insert_unique(self, docs: List[Dict], column: str) -> List[Dict]:
+        """Insert in one transaction, skipping documents whose column value already exists; returns the inserted ones"""
+        if not docs:
+            return []
+        return await self.db.run(self.insert_unique_sync, docs, column)
+
+    async def update(self, doc_id: str, **fields) -> Optional[Dict]:
+        """Merge fields into a document; returns the updated document, None if missing"""
+        return await self.db.run(self.update_sync, doc_id, fields)
+
+    async def delete(self, doc_id: str) -> Optional[Dict]:
+        """Delete a document; returns it, None if missing"""
+        return await self.db.run(self.delete_sync, doc_id)
+
+    async def delete_where(self, **filters) -> int:
+        """Delete the documents matching indexed-column filters in one transaction; returns the count"""
+        filters = {column: value for column, value in filters.items() if value is not None}
+        return await self.db.run(self.delete_where_sync, filters)
+
+
+class BufferedTable:
+    """
+    Key/value documents with coalesced writes
+
+    For frequently overwritten state (scan progress): put() only keeps the
+    latest value per key, and pending values are written together once
+    flush_interval has passed. Readers in this process see pending values;
+    other processes see them at most flush_interval late.
+    """
+
+    def __init__(self, db: Database, name: str, flush_interval: float = 0.5):
+        self.db = db
+        self.name = name
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+        db.connect().execute(
+            f"CREATE TABLE IF NOT EXISTS {name} (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def flush_sync(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        now = time.time()
+        with self.db.transaction() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.name} VALUES (?, ?, ?)",
+                [(key, json.dumps(value, ensure_ascii=False), now) for key, value in pending.items()]
+            )
+
+    def get_sync(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+        row = self.db.connect().execute(f"SELECT data FROM {self.name} WHERE id = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    async def put(self, key: str, value: Dict):
+        with self._lock:
+            self._pending[key] = value
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            await self.db.run(self.flush_sync)
+
+    async def get(self, key: str) -> Optional[Dict]:
+        return await self.db.run(self.get_sync, key)
+
+    async def flush(self):
+        await self.db.run(self.flush_sync)
+
+    async def delete(self, key: str):
+        with self._lock:
+            self._pending.pop(key, None)
+
+        def delete_sync():
+            with self.db.transaction() as conn:
+                conn.execute(f"DELETE FROM {self.name} WHERE id = ?", (key,))
+        await self.db.run(delete_sync)
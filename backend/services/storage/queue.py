@@ -0,0 +1,158 @@
+"""
+Job Queue
+持久化工作佇列 - 以資料表的 status 欄位排隊，租約 (lease) 保證每個工作同時只有一個 worker
+
+worker 領取 queued 工作時設定 lease_until，執行中定期續約；程序中斷後租約過期，
+工作回到 queued，由任一 worker 接手，並從最後的 checkpoint 繼續。
+"""
+import json
+import sqlite3
+import time
+from typing import Dict, Optional
+
+from .database import Database, DocumentTable
+
+
+QUEUED = 'queued'
+RUNNING = 'running'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class JobQueue:
+    """
+    Queue over a DocumentTable with status / user_id / created_at / lease_until columns
+
+    Args:
+        table: Jobs (documents with "status" and "user_id")
+        lease_seconds: How long a claim stays valid without renew()
+    """
+
+    def __init__(self, table: DocumentTable, lease_seconds: float = 30.0):
+        for column in ('status', 'user_id', 'created_at', 'lease_until'):
+            if column not in table.columns:
+                raise ValueError(f"{table.name}.{column} must be a column for JobQueue")
+        self.table = table
+        self.db: Database = table.db
+        self.lease_seconds = lease_seconds
+
+    # ==================== Sync ====================
+
+    def claim_sync(self, worker_id: str, max_per_user: int = 0) -> Optional[Dict]:
+        """
+        Oldest queued job whose user has fewer than max_per_user running (0 = no cap),
+        marked running under worker_id; None when nothing is claimable
+        """
+        name = self.table.name
+        capped = ""
+        params = [QUEUED]
+        if max_per_user > 0:
+            capped = (
+                f" AND COALESCE(user_id, '') NOT IN ("
+                f"SELECT COALESCE(user_id, '') FROM {name} WHERE status = ? "
+                f"GROUP BY COALESCE(user_id, '') HAVING COUNT(*) >= ?)"
+            )
+            params += [RUNNING, max_per_user]
+
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                f"SELECT id, data FROM {name} WHERE status = ?{capped} ORDER BY created_at, id LIMIT 1",
+                params
+            ).fetchone()
+            if row is None:
+                return None
+            return self.table._update(conn, row[0], {
+                'status': RUNNING,
+                'worker_id': worker_id,
+                'lease_until': time.time() + self.lease_seconds,
+                'attempts': json.loads(row[1]).get('attempts', 0) + 1
+            })
+
+    def renew_sync(self, job_id: str, worker_id: str) -> bool:
+        """Extend the lease; False if the job is no longer running under this worker"""
+        with self.db.transaction() as conn:
+            job = self._held(conn, job_id, worker_id)
+            if job is None:
+                return False
+            self.table._update(conn, job_id, {'lease_until': time.time() + self.lease_seconds})
+            return True
+
+    def release_sync(self, job_id: str, worker_id: str) -> bool:
+        """Put a job this worker holds back in the queue (e.g. on shutdown)"""
+        with self.db.transaction() as conn:
+            if self._held(conn, job_id, worker_id) is None:
+                return False
+            self.table._update(conn, job_id, {'status': QUEUED, 'worker_id': None, 'lease_until': None})
+            return True
+
+    def finish_sync(self, job_id: str, worker_id: str, fields: Dict) -> Optional[Dict]:
+        """
+        Final update of a job this worker still holds (lease cleared); None when it
+        no longer does: cancelled meanwhile, or taken over after the lease expired
+        """
+        with self.db.transaction() as conn:
+            if self._held(conn, job_id, worker_id) is None:
+                return None
+            return self.table._update(conn, job_id, {**fields, 'worker_id': None, 'lease_until': None})
+
+    def fail_sync(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Mark a job this worker holds as failed (it will not be retried)"""
+        return self.finish_sync(job_id, worker_id, {'status': FAILED, 'error': error}) is not None
+
+    def cancel_sync(self, job_id: str, fields: Dict) -> Optional[Dict]:
+        """
+        Cancel a job that is still queued or running (status checked and set in one
+        transaction); None when it does not exist or already ended
+        """
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                f"SELECT 1 FROM {self.table.name} WHERE id = ? AND status IN (?, ?)",
+                (job_id, QUEUED, RUNNING)
+            ).fetchone()
+            if row is None:
+                return None
+            return self.table._update(conn, job_id, {
+                **fields, 'status': CANCELLED, 'worker_id': None, 'lease_until': None
+            })
+
+    def requeue_expired_sync(self) -> int:
+        """Running jobs whose lease ran out (their process died) go back to the queue"""
+        name = self.table.name
+        with self.db.transaction() as conn:
+            expired = [row[0] for row in conn.execute(
+                f"SELECT id FROM {name} WHERE status = ? AND lease_until < ?",
+                (RUNNING, time.time())
+            )]
+            for job_id in expired:
+                self.table._update(conn, job_id, {'status': QUEUED, 'worker_id': None, 'lease_until': None})
+        return len(expired)
+
+    def _held(self, conn: sqlite3.Connection, job_id: str, worker_id: str) -> Optional[Dict]:
+        row = conn.execute(f"SELECT data FROM {self.table.name} WHERE id = ?", (job_id,)).fetchone()
+        job = json.loads(row[0]) if row else None
+        if job is None or job.get('status') != RUNNING or job.get('worker_id') != worker_id:
+            return None
+        return job
+
+    # ==================== Async ====================
+
+    async def claim(self, worker_id: str, max_per_user: int = 0) -> Optional[Dict]:
+        return await self.db.run(self.claim_sync, worker_id, max_per_user)
+
+    async def renew(self, job_id: str, worker_id: str) -> bool:
+        return await self.db.run(self.renew_sync, job_id, worker_id)
+
+    async def release(self, job_id: str, worker_id: str) -> bool:
+        return await self.db.run(self.release_sync, job_id, worker_id)
+
+    async def finish(self, job_id: str, worker_id: str, **fields) -> Optional[Dict]:
+        return await self.db.run(self.finish_sync, job_id, worker_id, fields)
+
+    async def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        return await self.db.run(self.fail_sync, job_id, worker_id, error)
+
+    async def cancel(self, job_id: str, **fields) -> Optional[Dict]:
+        return await self.db.run(self.cancel_sync, job_id, fields)
+
+    async def requeue_expired(self) -> int:
+        return await self.db.run(self.requeue_expired_sync)
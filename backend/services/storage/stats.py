@@ -0,0 +1,142 @@
+"""
+Violation Statistics
+侵權統計 - 隨寫入增量維護的計數器
+
+violations 每次新增、刪除、加入白名單或連結案件時，在同一個交易中更新
+violation_counters，統計 API 只讀計數器，不必掃過所有侵權記錄。
+
+scope / key:
+    all       ''             全部
+    platform  平台名稱
+    level     相似度等級 (exact / high / medium / low)
+    day       建立日期 (YYYY-MM-DD)
+    asset     資產 ID
+"""
+import json
+import sqlite3
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .database import Database, DocumentTable
+
+
+def _counter_keys(violation: Dict) -> List[Tuple[str, str]]:
+    similarity = violation.get('similarity') or {}
+    return [
+        ('all', ''),
+        ('platform', violation.get('platform') or ''),
+        ('level', similarity.get('level') or 'low'),
+        ('day', (violation.get('created_at') or '')[:10]),
+        ('asset', violation.get('asset_id') or ''),
+    ]
+
+
+def _tally(changes, counts: Dict[Tuple[str, str], List[int]]):
+    """Accumulate (total, pending, whitelisted) deltas: -1 for the old document, +1 for the new"""
+    for old, new in changes:
+        for doc, sign in ((old, -1), (new, 1)):
+            if doc is None:
+                continue
+            pending = sign if not doc.get('case_id') else 0
+            whitelisted = sign if doc.get('is_whitelisted') else 0
+            for key in _counter_keys(doc):
+                delta = counts.setdefault(key, [0, 0, 0])
+                delta[0] += sign
+                delta[1] += pending
+                delta[2] += whitelisted
+
+
+class ViolationStats:
+    """
+    Counters kept in step with the violations table
+
+    Attach with ``violations.on_change = stats.apply``; the counters are rebuilt
+    from the documents when the counter table is new (existing databases).
+    """
+
+    def __init__(self, db: Database, violations: DocumentTable):
+        self.db = db
+        self.violations = violations
+
+        conn = db.connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS violation_counters ("
+            "scope TEXT NOT NULL, key TEXT NOT NULL, "
+            "total INTEGER NOT NULL DEFAULT 0, pending INTEGER NOT NULL DEFAULT 0, "
+            "whitelisted INTEGER NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (scope, key))"
+        )
+        has_counters = conn.execute("SELECT 1 FROM violation_counters LIMIT 1").fetchone()
+        has_violations = conn.execute(f"SELECT 1 FROM {violations.name} LIMIT 1").fetchone()
+        if has_violations and not has_counters:
+            self.rebuild_sync()
+
+    def apply(self, conn: sqlite3.Connection, changes):
+        """on_change hook: fold (old, new) pairs into the counters"""
+        counts: Dict[Tuple[str, str], List[int]] = {}
+        _tally(changes, counts)
+        deltas = [(scope, key, *delta) for (scope, key), delta in counts.items() if any(delta)]
+        if not deltas:
+            return
+        conn.executemany(
+            "INSERT INTO violation_counters (scope, key, total, pending, whitelisted) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (scope, key) DO UPDATE SET "
+            "total = total + excluded.total, "
+            "pending = pending + excluded.pending, "
+            "whitelisted = whitelisted + excluded.whitelisted",
+            deltas
+        )
+        # Rollup keys whose last violation went away are dropped (the 'all' row stays)
+        conn.executemany(
+            "DELETE FROM violation_counters WHERE scope = ? AND key = ? AND total <= 0 AND scope != 'all'",
+            [(scope, key) for scope, key, total, _, _ in deltas if total < 0]
+        )
+
+    def rebuild_sync(self):
+        """Recount every violation (one pass; used for databases that predate the counters)"""
+        with self.db.transaction() as conn:
+            counts: Dict[Tuple[str, str], List[int]] = {}
+            rows = conn.execute(f"SELECT data FROM {self.violations.name}")
+            _tally(((None, json.loads(data)) for (data,) in rows), counts)
+            conn.execute("DELETE FROM violation_counters")
+            conn.executemany(
+                "INSERT INTO violation_counters (scope, key, total, pending, whitelisted) VALUES (?, ?, ?, ?, ?)",
+                [(scope, key, *delta) for (scope, key), delta in counts.items()]
+            )
+
+    def summary_sync(self, days: Optional[int] = None) -> Dict:
+        rows = self.db.connect().execute(
+            "SELECT scope, key, total, pending, whitelisted FROM violation_counters"
+        ).fetchall()
+
+        since = (date.today() - timedelta(days=days - 1)).isoformat() if days else None
+        summary = {
+            'total': 0,
+            'pending': 0,
+            'whitelisted': 0,
+            'by_platform': {},
+            'by_similarity': {'exact': 0, 'high': 0, 'medium': 0, 'low': 0},
+            'by_day': {},
+            'by_asset': {}
+        }
+        for scope, key, total, pending, whitelisted in rows:
+            if scope == 'all':
+                summary['total'] = total
+                summary['pending'] = pending
+                summary['whitelisted'] = whitelisted
+            elif scope == 'platform':
+                summary['by_platform'][key] = total
+            elif scope == 'level':
+                summary['by_similarity'][key] = total
+            elif scope == 'day':
+                if since is None or key >= since:
+                    summary['by_day'][key] = total
+            elif scope == 'asset':
+                summary['by_asset'][key] = {'total': total, 'pending': pending}
+        summary['by_day'] = dict(sorted(summary['by_day'].items()))
+        return summary
+
+    async def summary(self, days: Optional[int] = None) -> Dict:
+        """Totals and rollups read from the counters (cost independent of the violation count)"""
+        return await self.db.run(self.summary_sync, days)
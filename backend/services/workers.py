@@ -0,0 +1,141 @@
+"""
+Worker Pool
+背景工作池 - 從持久化佇列領取工作執行，持有期間定期續約
+
+每個程序一個 WorkerPool；多個程序 (uvicorn workers) 可共用同一個佇列，
+每位使用者同時執行的工作數由 max_per_user 限制 (跨程序計算)。
+"""
+import asyncio
+import os
+import socket
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from .cancel import CancelToken
+from .storage import JobQueue
+
+
+# Cancel reason when the job is no longer ours (cancelled elsewhere or taken over)
+LEASE_LOST = 'lease_lost'
+
+
+class WorkerPool:
+    """
+    Run jobs claimed from a JobQueue
+
+    Args:
+        queue: Persistent job queue
+        handler: Coroutine run as handler(job, cancel_token) for each claimed job; it
+            records the job's final status. The token is cancelled by cancel() or when
+            the lease is lost (job cancelled elsewhere, or taken over by another worker)
+        workers: Jobs run at once by this process
+        max_per_user: Running jobs per user across all processes (0 = no cap)
+        max_attempts: Claims per job before it is failed (a job that keeps killing its process)
+        poll_interval: Seconds between claims while the queue is empty
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: Callable[[Dict, CancelToken], Awaitable],
+        workers: int = 2,
+        max_per_user: int = 1,
+        max_attempts: int = 3,
+        poll_interval: float = 1.0
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.max_per_user = max_per_user
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+        self._tasks: List[asyncio.Task] = []
+        self._wake = asyncio.Event()
+        self.running: Dict[str, CancelToken] = {}
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Worker pool {self.worker_id} started ({self.workers} workers)")
+
+    async def stop(self):
+        """Stop the workers; jobs still running go back to the queue and resume elsewhere"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def cancel(self, job_id: str, reason: str = 'cancelled') -> bool:
+        """Cancel a job running in this process; False if it is not running here"""
+        token = self.running.get(job_id)
+        if token is None:
+            return False
+        token.cancel(reason)
+        return True
+
+    def wake(self):
+        """A job was queued: claim now instead of at the next poll"""
+        self._wake.set()
+
+    async def _worker(self):
+        while True:
+            job = None
+            try:
+                await self.queue.requeue_expired()
+                job = await self.queue.claim(self.worker_id, self.max_per_user)
+            except Exception as e:
+                logger.error(f"Job claim error: {e}")
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+
+            await self._run(job)
+
+    async def _run(self, job: Dict):
+        job_id = job['id']
+        if job.get('attempts', 1) > self.max_attempts:
+            logger.error(f"Job {job_id} failed: claimed {job['attempts']} times")
+            await self.queue.fail(job_id, self.worker_id, f"放棄：已嘗試 {job['attempts'] - 1} 次")
+            return
+
+        token = CancelToken()
+        self.running[job_id] = token
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, token))
+        try:
+            await self.handler(job, token)
+        except asyncio.CancelledError:
+            await self.queue.release(job_id, self.worker_id)
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            await self.queue.fail(job_id, self.worker_id, str(e))
+        finally:
+            heartbeat.cancel()
+            self.running.pop(job_id, None)
+
+    async def _heartbeat(self, job_id: str, token: CancelToken):
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            try:
+                if not await self.queue.renew(job_id, self.worker_id):
+                    logger.warning(f"Job {job_id}: lease lost, stopping")
+                    token.cancel(LEASE_LOST)
+                    return
+            except Exception as e:
+                logger.warning(f"Job {job_id}: lease renew error: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            'worker_id': self.worker_id,
+            'workers': self.workers,
+            'max_per_user': self.max_per_user,
+            'running': list(self.running)
+        }
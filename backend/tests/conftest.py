@@ -0,0 +1,20 @@
+"""
+Pytest fixtures
+測試共用設定 - 每個測試使用獨立的暫存 SQLite 資料庫
+"""
+import os
+import sys
+
+import pytest
+
+# Tests import the app packages the way main.py does (backend/ on sys.path)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.storage import Storage  # noqa: E402
+
+
+@pytest.fixture
+def storage(tmp_path):
+    store = Storage(str(tmp_path / "test.db"))
+    yield store
+    store.close()
@@ -0,0 +1,80 @@
+"""
+Response compression tests
+gzip 只套用在一般回應，SSE 串流原樣送出
+"""
+import asyncio
+import json
+import zlib
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from api.compression import GZipMiddleware
+
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    async def large():
+        return JSONResponse([{"id": i, "platform": "shopee"} for i in range(500)])
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/events")
+    async def events():
+        async def stream():
+            for i in range(50):
+                yield f"event: progress\ndata: {i}\n\n"
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+def test_large_json_is_gzipped():
+    response = _client().get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < 2000
+    assert len(response.json()) == 500
+
+
+def test_small_and_unaccepted_bodies_are_untouched():
+    client = _client()
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/large", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_streamed_chunks_are_flushed():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        for i in range(3):
+            await send({"type": "http.response.body", "body": f"line {i}\n".encode(), "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(GZipMiddleware(app, minimum_size=1024)(scope, None, send))
+
+    assert (b"content-encoding", b"gzip") in sent[0]["headers"]
+    # Each part decompresses on arrival: nothing waits in the compressor for the next chunk
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    parts = [decompressor.decompress(message["body"]) for message in sent[1:]]
+    assert parts == [b"line 0\n", b"line 1\n", b"line 2\n", b""]
+    assert decompressor.eof
+
+
+def test_event_stream_is_never_compressed():
+    with _client().stream("GET", "/events", headers={"Accept-Encoding": "gzip"}) as response:
+        assert "content-encoding" not in response.headers
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = b''.join(response.iter_raw())
+    assert body.startswith(b"event: progress\ndata: 0\n\n")
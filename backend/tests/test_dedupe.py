@@ -0,0 +1,105 @@
+"""
+Deduplication tests
+圖片網址標準化、商品去重、圖片群組合併與近似圖片分群
+"""
+from services.crawler.base import ProductListing
+from services.crawler.dedupe import ImageClusterIndex, ListingDeduplicator, canonical_image_url
+
+
+def _listing(item_id, image='https://cf.shopee.tw/file/abc_tn', platform='shopee'):
+    return ProductListing(id=item_id, platform=platform, title=item_id, url='', thumbnail_url=image, price=1.0)
+
+
+def test_canonical_image_url_folds_copies_of_one_file():
+    same = [
+        'https://down-tw.img.susercontent.com/file/abc',
+        'http://CF.SHOPEE.TW/file/abc_tn',
+        'https://cf.shopee.tw/file/abc?width=200#top',
+        '  https://down-tw.img.susercontent.com/file/abc_tn  ',
+    ]
+    assert {canonical_image_url(url) for url in same} == {'down-tw.img.susercontent.com/file/abc'}
+
+    # Only a trailing size suffix is stripped; other hosts are kept apart
+    assert canonical_image_url('https://img.ruten.com.tw/s1/abc_tn.jpg') == 'img.ruten.com.tw/s1/abc_tn.jpg'
+    assert canonical_image_url('https://other.cdn/file/abc') != canonical_image_url('https://cf.shopee.tw/file/abc')
+
+
+def test_same_listing_from_two_keywords_is_kept_once():
+    dedupe = ListingDeduplicator()
+    record, group, new_image = dedupe.add(_listing('1'), '貼紙')
+    assert record is not None and new_image
+
+    again, none_group, again_new = dedupe.add(_listing('1'), '卡通')
+    assert again is None and none_group is None and not again_new
+    assert record.keywords == ['貼紙', '卡通']
+
+    # Same id on another platform is a different listing
+    other, _, _ = dedupe.add(_listing('1', platform='ruten'), '貼紙')
+    assert other is not None
+    assert dedupe.stats()['duplicate_listings'] == 1
+
+
+def test_shared_image_is_downloaded_once():
+    dedupe = ListingDeduplicator()
+    _, group, first_new = dedupe.add(_listing('1', 'https://cf.shopee.tw/file/abc_tn'), 'k')
+    record, same_group, second_new = dedupe.add(_listing('2', 'https://down-tw.img.susercontent.com/file/abc'), 'k')
+
+    assert first_new and not second_new
+    assert same_group is group and [member.listing.id for member in group.members] == ['1', '2']
+    assert record.image_key == 'down-tw.img.susercontent.com/file/abc'
+
+    no_image, no_group, _ = dedupe.add(_listing('3', ''), 'k')
+    assert no_image is not None and no_group is None
+    assert dedupe.stats() == {'unique_listings': 3, 'unique_images': 1, 'duplicate_listings': 0, 'duplicate_images': 1}
+
+
+def test_merge_moves_members_and_routes_later_listings():
+    dedupe = ListingDeduplicator()
+    _, target, _ = dedupe.add(_listing('1', 'https://cdn/a.jpg'), 'k')
+    _, merged, _ = dedupe.add(_listing('2', 'https://cdn/b.jpg'), 'k')
+    target.phash, merged.phash = 'aaaa', 'aaab'
+
+    dedupe.merge(merged, into=target)
+    assert [member.listing.id for member in target.members] == ['1', '2']
+    assert merged.members == []
+    # Merged members keep their own hash for the listing store
+    assert target.members[1].image_hash == 'aaab' and target.members[0].image_hash is None
+
+    record, group, new_image = dedupe.add(_listing('3', 'https://cdn/b.jpg'), 'k')
+    assert group is target and not new_image
+    assert record.image_hash == 'aaab'
+
+
+def _flip(phash, bits):
+    """Hash differing from phash in the given bit positions"""
+    value = int(phash, 16)
+    for bit in bits:
+        value ^= 1 << bit
+    return format(value, f"0{len(phash)}x")
+
+
+def test_image_clusters_merge_exact_and_near_copies():
+    dedupe = ListingDeduplicator()
+    groups = {name: dedupe.add(_listing(name, f"https://cdn/{name}.jpg"), 'k')[1] for name in 'abcde'}
+    index = ImageClusterIndex()
+    base = '0123456789abcdef' * 4  # 256-bit hash, as PHashComparator produces
+    first = groups['a']
+
+    cluster, is_new = index.assign(first, 'digest-a', base)
+    assert is_new and cluster.representative is first
+
+    # Same bytes under another URL
+    assert index.assign(groups['b'], 'digest-a', _flip(base, range(64))) == (cluster, False)
+    # Up to max_distance bits apart, spread over every band
+    near = _flip(base, range(0, 256, 37))
+    assert len(range(0, 256, 37)) == index.max_distance
+    assert index.assign(groups['c'], 'digest-c', near) == (cluster, False)
+    # Later copies of that file match by digest
+    assert index.assign(groups['d'], 'digest-c', 'f' * 64) == (cluster, False)
+
+    far, is_new = index.assign(groups['e'], 'digest-e', _flip(base, range(0, 256, 32)))
+    assert is_new and far is not cluster
+
+    stats = index.stats()
+    assert (stats['images'], stats['clusters'], stats['merged_exact'], stats['merged_near']) == (5, 2, 2, 1)
+    assert stats['largest'] == [{'representative': 'a', 'images': 4, 'listings': 1}]
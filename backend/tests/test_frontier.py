@@ -0,0 +1,97 @@
+"""
+Seller frontier and search tests
+賣家擴展佇列的優先順序與去重，以及搜尋預設為模擬結果、翻頁之間延遲
+"""
+import asyncio
+
+import httpx
+
+from services.crawler.base import ProductListing
+from services.crawler.frontier import SellerFrontier
+from services.crawler.ruten import RutenCrawler
+from services.crawler.shopee import ShopeeCrawler
+
+
+def _listing(item_id, seller_id='s1', platform='shopee', sales=0, seller_url=''):
+    return ProductListing(
+        id=item_id, platform=platform, title=item_id, url=f"https://item/{item_id}", thumbnail_url='',
+        price=1.0, seller_id=seller_id, seller_url=seller_url, sales_count=sales
+    )
+
+
+def test_sellers_pop_by_violations_then_sales():
+    frontier = SellerFrontier(seller_history={('shopee', 'repeat'): 2})
+    frontier.flag(_listing('1', 'big', sales=10_000))
+    frontier.flag(_listing('2', 'repeat'))
+    frontier.flag(_listing('3', 'small', sales=5))
+    frontier.flag(_listing('4', 'small', sales=5))  # second violation re-queues with a higher priority
+
+    order = [task.seller_id for task in frontier.pop_batch()]
+    assert order == ['repeat', 'small', 'big']
+    assert frontier.pop_batch() == []
+    assert frontier.stats()['sellers_expanded'] == 3
+
+
+def test_flagging_is_counted_once_and_needs_a_seller():
+    frontier = SellerFrontier()
+    frontier.flag(_listing('1', 's1'))
+    frontier.flag(_listing('1', 's1'))
+    frontier.flag(_listing('2', ''))
+    assert frontier.priority('shopee', 's1') == 10.0
+    assert [task.seller_id for task in frontier.pop_batch()] == ['s1']
+
+    # Expanded sellers are not queued again
+    frontier.flag(_listing('3', 's1'))
+    assert frontier.pop_batch() == []
+
+
+def test_seller_budget_visited_urls_and_restore():
+    frontier = SellerFrontier(max_sellers=2)
+    frontier.restore([('ruten', 'done')])
+    frontier.flag(_listing('1', 'done', platform='ruten'))
+    frontier.visit('https://shop/seen')
+    frontier.flag(_listing('2', 'seen', seller_url='https://shop/seen'))
+    frontier.flag(_listing('3', 'a'))
+    frontier.flag(_listing('4', 'b'))
+
+    # 'done' was restored and 'seen' has a visited store page; one slot is left
+    assert len(frontier.pop_batch()) == 1
+    assert frontier.stats()['urls_skipped'] == 1
+
+
+def test_hit_rate_counts_violations_among_seller_listings():
+    frontier = SellerFrontier()
+    assert frontier.admit(_listing('1'))
+    assert frontier.admit(_listing('2'))
+    assert not frontier.admit(_listing('2'))
+    frontier.flag(_listing('2'))
+
+    stats = frontier.stats()
+    assert (stats['listings_from_sellers'], stats['violations_from_sellers'], stats['hit_rate']) == (2, 1, 0.5)
+
+
+def test_search_is_simulated_unless_live_search_is_enabled():
+    def refuse(request):
+        raise AssertionError(f"unexpected request {request.url}")
+
+    for crawler_class in (ShopeeCrawler, RutenCrawler):
+        crawler = crawler_class(transport=httpx.MockTransport(refuse))
+        listings = asyncio.run(crawler.search('貼紙', max_pages=3)).listings
+        assert len(listings) == 10
+        assert all(not listing.seller_id for listing in listings)
+
+
+def test_live_search_waits_between_pages():
+    def respond(request):
+        return httpx.Response(200, text='<div data-gno="1"><img src="i"><a href="u">T</a>$1</div>')
+
+    delays = []
+    crawler = RutenCrawler(transport=httpx.MockTransport(respond), live_search=True)
+
+    async def random_delay():
+        delays.append(True)
+    crawler.random_delay = random_delay
+
+    listings = asyncio.run(crawler.search('貼紙', max_pages=3, max_results=100)).listings
+    assert len(listings) == 3
+    assert len(delays) == 2
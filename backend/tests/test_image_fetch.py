@@ -0,0 +1,86 @@
+"""
+Image check tests
+檔頭檢查：本機圖片可用 PIL 讀尺寸 (不限下載支援格式)，下載仍限制格式，兩者都限制位元組與像素
+"""
+import asyncio
+import struct
+from io import BytesIO
+
+import httpx
+import pytest
+from PIL import Image
+
+from services.image_compare.fetch import (
+    SNIFF_LIMIT,
+    ImageRejected,
+    check_image_bytes,
+    check_image_file,
+    fetch_image,
+)
+
+
+def _encode(image_format, size=(8, 6)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def _jpeg_with_large_app_segments():
+    """JPEG whose frame header (SOF) comes after SNIFF_LIMIT bytes of APP segments"""
+    jpeg = _encode('JPEG')
+    segment = b'\xff\xef' + struct.pack('>H', 40_002) + b'\0' * 40_000
+    return jpeg[:2] + segment * 2 + jpeg[2:]
+
+
+def _fetch(body, content_type='image/jpeg', **limits):
+    def respond(request):
+        return httpx.Response(200, content=body, headers={'content-type': content_type})
+
+    return asyncio.run(fetch_image('https://img.example/a', transport=httpx.MockTransport(respond), **limits))
+
+
+def test_local_images_outside_the_sniffed_formats_are_read_with_pil(tmp_path):
+    for image_format in ('TIFF', 'ICO'):
+        info = check_image_bytes(_encode(image_format, (16, 16)))
+        assert (info.format, info.width, info.height) == (image_format.lower(), 16, 16)
+
+    path = tmp_path / 'asset.tiff'
+    path.write_bytes(_encode('TIFF'))
+    assert check_image_file(str(path)).pixels == 48
+
+
+def test_jpeg_frame_header_past_the_sniff_limit_is_accepted(tmp_path):
+    data = _jpeg_with_large_app_segments()
+    assert data.index(b'\xff\xc0') > SNIFF_LIMIT
+
+    assert check_image_bytes(data).pixels == 48
+    path = tmp_path / 'asset.jpg'
+    path.write_bytes(data)
+    assert check_image_file(str(path)).pixels == 48
+    assert _fetch(data) == data
+
+
+def test_byte_and_pixel_caps_apply_to_every_source(tmp_path):
+    tiff = _encode('TIFF', (100, 100))
+    with pytest.raises(ImageRejected):
+        check_image_bytes(tiff, max_pixels=9_999)
+    with pytest.raises(ImageRejected):
+        check_image_bytes(tiff, max_bytes=len(tiff) - 1)
+
+    path = tmp_path / 'asset.tiff'
+    path.write_bytes(tiff)
+    with pytest.raises(ImageRejected):
+        check_image_file(str(path), max_bytes=len(tiff) - 1)
+
+    with pytest.raises(ImageRejected):
+        check_image_bytes(b'<html>not an image</html>')
+
+
+def test_downloads_keep_the_supported_format_list():
+    png = _encode('PNG')
+    assert _fetch(png, 'image/png') == png
+
+    with pytest.raises(ImageRejected):
+        _fetch(_encode('TIFF'), 'image/tiff')
+    with pytest.raises(ImageRejected):
+        _fetch(_jpeg_with_large_app_segments(), max_bytes=SNIFF_LIMIT)
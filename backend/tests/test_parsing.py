@@ -0,0 +1,69 @@
+"""
+Listing parser tests
+露天商品卡解析：欄位、賣家連結、缺價格的商品卡，以及 image-guardian 副本一致
+"""
+import importlib.util
+import os
+import time
+
+from services.crawler.parsing import RutenListingParser
+from services.crawler.standin import _ruten_html
+
+
+CARDS = (
+    '<div data-gno="1"><a href="https://class.ruten.com.tw/user/index00.php?s=ab">ab</a>'
+    '<img src="https://img.ruten.com.tw/1.jpg"><a href="https://www.ruten.com.tw/item/show?1">T<b>x</b>&amp;</a>'
+    '<b>$</b> <i>1,200</i></div>'
+    '<div data-gno="2"><img src="https://img.ruten.com.tw/2.jpg"><a href="https://www.ruten.com.tw/item/show?2">U</a>'
+    '$6<a href="https://class.ruten.com.tw/user/index00.php?p=2&amp;s=cd">cd</a></div>'
+    '<div data-gno="3"><img src="https://img.ruten.com.tw/3.jpg"><a href="https://www.ruten.com.tw/item/show?3">V</a>'
+    'US$ <b>$7</b></div>'
+    '<div data-gno="4"><img src="https://img.ruten.com.tw/4.jpg"><a href="https://www.ruten.com.tw/item/show?4">no price</a></div>'
+    '<div data-gno="5"><img src="https://img.ruten.com.tw/5.jpg"><a href="https://www.ruten.com.tw/item/show?5">W</a>$8</div>'
+)
+
+IMAGE_GUARDIAN_CRAWLER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'src', 'ecommerce-platform', 'image-guardian-backend', 'services', 'crawler.py'
+)
+
+
+def test_ruten_cards_are_parsed_field_by_field():
+    assert RutenListingParser.parse(CARDS) == [
+        ('1', 'https://img.ruten.com.tw/1.jpg', 'Tx&', '1,200', 'ab'),
+        ('2', 'https://img.ruten.com.tw/2.jpg', 'U', '6', 'cd'),
+        ('3', 'https://img.ruten.com.tw/3.jpg', 'V', '7', ''),
+        # Card 4 has no price: it is skipped, not given card 5's price
+        ('5', 'https://img.ruten.com.tw/5.jpg', 'W', '8', ''),
+    ]
+
+
+def test_ruten_parser_matches_generated_pages():
+    html = _ruten_html('貼紙', 0, 50)
+    items = RutenListingParser.parse(html)
+    assert len(items) == 50
+    assert all(seller_id.startswith('rtseller') for *_, seller_id in items)
+
+
+def test_ruten_parser_stays_linear_on_malformed_pages():
+    pages = [
+        '<div data-gno="1"><img src="a"><a href="b">t</a>' + '$ x <' * 100000,
+        '<div data-gno="1">' + '<img src="a"><a href="b">t</a><' * 50000,
+        'data-gno="1"' * 50000,
+    ]
+    started = time.perf_counter()
+    for html in pages:
+        RutenListingParser.parse(html)
+    assert time.perf_counter() - started < 2
+
+
+def test_image_guardian_parser_is_kept_in_lock_step():
+    spec = importlib.util.spec_from_file_location('image_guardian_crawler', IMAGE_GUARDIAN_CRAWLER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    other = module.RutenListingParser
+    for name in ('CARD_LIMIT', 'GNO_PATTERN', 'CARD_PATTERN', 'SELLER_PATTERN', 'TAG_PATTERN'):
+        assert getattr(other, name) == getattr(RutenListingParser, name), name
+    html = CARDS + _ruten_html('貼紙', 0, 20)
+    assert other.parse(html) == RutenListingParser.parse(html)
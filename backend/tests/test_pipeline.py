@@ -0,0 +1,112 @@
+"""
+Pipeline tests
+有界佇列的背壓、多 worker 階段的停止訊號與取消後的清理
+"""
+import asyncio
+
+import pytest
+
+from services.crawler.pipeline import Pipeline, Stage
+
+
+def test_items_flow_through_multi_worker_stages():
+    seen = []
+
+    async def double(item, emit):
+        await emit(item)
+        await emit(item + 1000)
+
+    async def collect(item, emit):
+        await asyncio.sleep(0)
+        seen.append(item)
+
+    async def fail_odd(item, emit):
+        if item % 2:
+            raise ValueError("odd")
+        await emit(item)
+
+    stages = [
+        Stage('double', double, workers=3, queue_size=2),
+        Stage('filter', fail_odd, workers=4, queue_size=1),
+        Stage('collect', collect, workers=2, queue_size=1),
+    ]
+    # Finishes only if every worker of every stage received its stop signal
+    asyncio.run(asyncio.wait_for(Pipeline(stages).run(range(20)), timeout=5))
+
+    assert sorted(seen) == [i for i in range(20) if i % 2 == 0] + [i + 1000 for i in range(20) if i % 2 == 0]
+    snapshot = Pipeline(stages).snapshot()
+    assert snapshot['double']['processed'] == 20 and snapshot['double']['emitted'] == 40
+    assert snapshot['filter']['failed'] == 20
+    assert all(stats['busy'] == 0 and stats['queue_depth'] == 0 for stats in snapshot.values())
+
+
+def test_full_queue_blocks_the_producer():
+    release = asyncio.Event()
+    produced = []
+
+    def items():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    async def slow(item, emit):
+        await release.wait()
+        await emit(item)
+
+    async def sink(item, emit):
+        pass
+
+    async def scenario():
+        stages = [Stage('slow', slow, workers=1, queue_size=3), Stage('sink', sink, queue_size=1)]
+        run = asyncio.create_task(Pipeline(stages).run(items()))
+        await asyncio.sleep(0.05)
+        # One item in the worker, three queued, one waiting on put(): the producer stopped there
+        assert len(produced) == 5
+        assert stages[0].queue.qsize() == 3
+        release.set()
+        await asyncio.wait_for(run, timeout=5)
+        assert len(produced) == 100
+
+    asyncio.run(scenario())
+
+
+def test_cancel_unwinds_workers_and_drains_queues():
+    started = asyncio.Event()
+
+    async def stuck(item, emit):
+        started.set()
+        await asyncio.sleep(3600)
+
+    async def sink(item, emit):
+        pass
+
+    async def scenario():
+        stages = [Stage('stuck', stuck, workers=2, queue_size=5), Stage('sink', sink, workers=2, queue_size=5)]
+        pipeline = Pipeline(stages)
+        run = asyncio.create_task(pipeline.run(range(50)))
+        await started.wait()
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(run, timeout=5)
+        assert all(stage.queue.empty() for stage in stages)
+        assert stages[0].stats.busy == 0
+
+        # Same stages run again from a clean state
+        done = []
+
+        async def forward(item, emit):
+            await emit(item)
+
+        async def record(item, emit):
+            done.append(item)
+
+        stages[0].handler, stages[1].handler = forward, record
+        await asyncio.wait_for(pipeline.run(range(10)), timeout=5)
+        assert sorted(done) == list(range(10))
+
+    asyncio.run(scenario())
+
+
+def test_pipeline_needs_a_stage():
+    with pytest.raises(ValueError):
+        Pipeline([])
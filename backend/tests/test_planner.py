@@ -0,0 +1,82 @@
+"""
+Page planner tests
+翻頁預算：低產出停止、額度借用，以及只計入 planner 省下的頁數
+"""
+from services.crawler.base import ProductListing
+from services.crawler.planner import PagePlanner
+
+
+def _page(*ids, platform='shopee'):
+    return [ProductListing(id=item_id, platform=platform, title=item_id, url='', thumbnail_url='', price=1.0)
+            for item_id in ids]
+
+
+def test_low_yield_search_stops_on_fetch_time_signals():
+    planner = PagePlanner(min_new_ratio=0.5)
+    budget = planner.open('貼紙', 'shopee', 5)
+
+    planner.record_page(budget, _page('1', '2'))
+    assert planner.next_page(budget)
+
+    # Compare results for earlier pages arriving late do not keep the search alive
+    planner.record_survivor('貼紙', 'shopee')
+    planner.record_page(budget, _page('1', '2', '3'))
+    assert not planner.next_page(budget)
+    assert budget.stopped == 'low_yield'
+    assert not planner.next_page(budget)
+
+    stats = planner.stats()
+    assert (stats['pages_fetched'], stats['pages_saved'], stats['searches_stopped_low_yield']) == (2, 3, 1)
+    assert stats['searches'][0]['survivors'] == 1
+
+
+def test_min_pages_are_fetched_before_a_stop():
+    planner = PagePlanner(min_new_ratio=0.5, min_pages=2)
+    budget = planner.open('k', 'ruten', 3)
+    planner.record_page(budget, _page('1'))
+    planner.record_page(budget, _page('1'))
+    assert planner.next_page(budget) is False  # pages == min_pages: now it may stop
+
+    other = planner.open('k2', 'ruten', 3)
+    planner.record_page(other, _page('1'))
+    assert planner.next_page(other)  # below min_pages, even with nothing new
+
+
+def test_searches_that_run_out_are_not_counted_as_saved():
+    planner = PagePlanner()
+    budget = planner.open('k', 'shopee', 5)
+    planner.record_page(budget, _page('1', '2'))
+    planner.close(budget)
+
+    assert budget.stopped == 'exhausted'
+    assert planner.pool == 4
+    stats = planner.stats()
+    assert (stats['pages_budget'], stats['pages_fetched'], stats['pages_saved']) == (5, 1, 0)
+
+
+def test_stopped_pages_are_lent_to_searches_still_yielding():
+    planner = PagePlanner(min_new_ratio=0.5, max_extension=1.5)
+    stale = planner.open('stale', 'shopee', 2)
+    planner.record_page(stale, _page('1'))
+    planner.record_page(stale, _page('1'))
+    assert not planner.next_page(stale)
+    assert planner.pool == 0  # used its whole budget: nothing to lend
+
+    donor = planner.open('donor', 'shopee', 4)
+    planner.record_page(donor, _page('9'))
+    planner.record_page(donor, _page('9'))
+    assert not planner.next_page(donor)
+    assert planner.pool == 2
+
+    busy = planner.open('busy', 'shopee', 2)
+    for page in range(3):
+        planner.record_page(busy, _page(f"b{page}"))
+        expected = page < 2  # base 2 pages + 1 borrowed (limit 2 x 1.5 = 3)
+        assert planner.next_page(busy) is expected
+    assert busy.stopped == 'budget'
+    assert planner.pool == 1
+
+    stats = planner.stats()
+    assert stats['pages_saved'] == 2
+    assert stats['pages_reallocated'] == 1
+    assert stats['searches_extended'] == 1
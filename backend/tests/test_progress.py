@@ -0,0 +1,59 @@
+"""
+ScanProgress tests
+預估總商品數、百分比與 ETA
+"""
+from services.crawler.progress import ScanProgress
+
+
+def _progress(results_per_search=50):
+    progress = ScanProgress(status='running', results_per_search=results_per_search)
+    progress.add_searches('shopee', 2)
+    progress.add_searches('ruten', 2)
+    return progress
+
+
+def test_expected_listings_seeded_before_any_search_finishes():
+    progress = _progress()
+    progress.sample(now=0.0)
+    assert progress.expected_listings == 200
+    assert progress.progress == 0
+
+    progress.total_scanned = progress.listings_done = 40
+    progress.sample(now=2.0)
+    assert progress.expected_listings == 200
+    assert progress.progress == int(99 * 40 / 200)
+    assert progress.eta_seconds == round(160 / progress.rates['listings_done'], 1)
+
+
+def test_expected_listings_refined_from_observed_yield():
+    progress = _progress()
+    progress.sample(now=0.0)
+    progress.total_scanned = progress.listings_done = 30
+    progress.search_done('shopee')
+    progress.sample(now=1.0)
+
+    # One search returned 30 of its 50: the three left are expected to do the same
+    assert progress.expected_listings == 30 + 3 * 30
+    assert progress.progress == int(99 * 30 / 120)
+
+
+def test_no_estimate_without_a_result_cap():
+    progress = _progress(results_per_search=0)
+    progress.sample(now=0.0)
+    assert progress.expected_listings is None and progress.eta_seconds is None
+
+
+def test_progress_never_moves_backwards():
+    progress = _progress()
+    progress.sample(now=0.0)
+    progress.total_scanned = progress.listings_done = 100
+    progress.search_done('shopee')
+    progress.search_done('shopee')
+    progress.sample(now=1.0)
+    reached = progress.progress
+
+    # A seller round adds searches late: the estimate grows, the percentage holds
+    progress.add_searches('shopee', 10)
+    progress.sample(now=2.0)
+    assert progress.expected_listings > 200
+    assert progress.progress == reached
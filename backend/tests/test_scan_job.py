@@ -0,0 +1,50 @@
+"""
+ScanJob tests
+侵權記錄寫出 (violation_sink) 失敗時的計數與重試
+"""
+import asyncio
+
+import pytest
+
+from services.crawler.scan import ScanJob
+
+
+def _job(sink):
+    return ScanJob(crawlers={}, asset_images=[], keywords=[], platforms=[], violation_sink=sink)
+
+
+def test_failed_sink_batch_is_not_counted_and_is_retried():
+    written, failures = [], [1]
+
+    async def sink(batch):
+        if failures:
+            failures.pop()
+            raise OSError("disk full")
+        written.extend(batch)
+
+    job = _job(sink)
+    job.violations = [{'n': 1}, {'n': 2}]
+
+    async def scenario():
+        await job._flush_violations()
+        assert job.violations_flushed == 0
+        assert job.checkpoint_state()['violations'] == 0
+
+        job.violations.append({'n': 3})
+        await job._flush_violations()
+
+    asyncio.run(scenario())
+    assert written == [{'n': 1}, {'n': 2}, {'n': 3}]
+    assert job.violations_flushed == 3
+
+
+def test_final_flush_raises_when_sink_keeps_failing():
+    def sink(batch):
+        raise OSError("disk full")
+
+    job = _job(sink)
+    job.violations = [{'n': 1}]
+
+    with pytest.raises(OSError):
+        asyncio.run(job._flush_violations(raise_errors=True))
+    assert job.violations_flushed == 0
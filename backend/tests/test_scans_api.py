@@ -0,0 +1,77 @@
+"""
+Scan route tests
+掃描任務的使用者歸屬、checkpoint 接續與進度狀態清理
+"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.routes import scans
+from services.progress import ProgressHub
+
+
+@pytest.fixture
+def client(storage, monkeypatch):
+    monkeypatch.setattr(scans, "get_storage", lambda: storage)
+    monkeypatch.setattr(scans, "_scan_pool", None)
+    app = FastAPI()
+    app.include_router(scans.router, prefix="/api/scans")
+    return TestClient(app)
+
+
+SCAN = {"asset_ids": ["asset-1"], "platforms": ["shopee"], "keywords": ["貼紙"]}
+
+
+def test_scan_belongs_to_the_requesting_user(client, storage):
+    created = client.post("/api/scans/create", json=SCAN, headers={"X-User-Id": "user-42"}).json()
+    assert storage.scans.get_sync(created["id"])["user_id"] == "user-42"
+
+    created = client.post("/api/scans/create", json=SCAN).json()
+    assert storage.scans.get_sync(created["id"])["user_id"] == scans.settings.DEFAULT_USER_ID
+
+
+def test_load_checkpoint_drops_violations_after_it(storage, monkeypatch):
+    monkeypatch.setattr(scans, "get_storage", lambda: storage)
+    violations = [{"listing": {"platform": "shopee", "id": f"item{i}"}, "asset_image": "a.jpg"} for i in range(5)]
+    storage.scan_violations.insert_many_sync(scans.scan_violation_records("scan-1", 0, violations))
+    storage.scan_violations.insert_many_sync(scans.scan_violation_records("scan-2", 0, violations))
+    storage.scan_checkpoints.insert_many_sync([{"id": "scan-1", "state": {"violations": 3}}])
+
+    checkpoint, restored = asyncio.run(scans.load_checkpoint("scan-1"))
+
+    assert checkpoint == {"violations": 3}
+    assert restored == violations[:3]
+    assert [v["seq"] for v in storage.scan_violations.list_sync({"task_id": "scan-1"})] == [1, 2, 3]
+    assert storage.scan_violations.count_sync({"task_id": "scan-2"}) == 5
+
+
+def test_cancel_only_unfinished_scans(client, storage):
+    task_id = client.post("/api/scans/create", json=SCAN).json()["id"]
+
+    assert client.delete(f"/api/scans/{task_id}").status_code == 200
+    assert storage.scans.get_sync(task_id)["status"] == "cancelled"
+    assert client.delete(f"/api/scans/{task_id}").status_code == 409
+
+    storage.scans.update_sync(task_id, {"status": "completed"})
+    assert client.delete(f"/api/scans/{task_id}").status_code == 409
+    assert storage.scans.get_sync(task_id)["status"] == "completed"
+    assert client.delete("/api/scans/scan-missing").status_code == 404
+
+
+def test_scan_runner_drops_its_progress_state_without_a_final_publish(storage, monkeypatch):
+    monkeypatch.setattr(scans, "get_storage", lambda: storage)
+    hub = ProgressHub(max_rate=1)
+    monkeypatch.setattr(scans, "progress_hub", hub)
+
+    async def run():
+        hub.publish("scan-gone", {"progress": 10})
+        hub.publish("scan-gone", {"progress": 20})  # held for the next delivery slot
+        # Not a stored scan: the failed finish returns nothing to publish as final
+        await scans.run_scan({"id": "scan-gone", "config": {}}, scans.CancelToken())
+
+    asyncio.run(run())
+    assert hub.last("scan-gone") is None
+    assert hub.stats()["tasks"] == 0
+    assert not hub._pending and not hub._sent_at
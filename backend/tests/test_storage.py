@@ -0,0 +1,231 @@
+"""
+Storage layer tests
+分頁游標、工作佇列租約與侵權統計計數器
+"""
+import time
+
+import pytest
+
+from services.storage import NOT_NULL, Storage, decode_cursor, encode_cursor
+from services.storage.queue import CANCELLED, QUEUED, RUNNING
+
+
+def _violation(index, **fields):
+    return {
+        'id': f"v{index:03d}",
+        'task_id': 'task-1',
+        'asset_id': f"asset-{index % 2}",
+        'platform': 'shopee' if index % 3 else 'ruten',
+        'case_id': None,
+        'is_whitelisted': False,
+        'created_at': f"2026-10-0{1 + index % 3}T00:00:00",
+        'similarity': {'level': 'high'},
+        'listing': {'id': f"item{index}", 'seller_id': f"seller{index % 4}"},
+        **fields
+    }
+
+
+def _all_pages(table, limit, **filters):
+    docs, after = [], None
+    while True:
+        page, after = table.page_sync(filters, limit, after)
+        docs.extend(page)
+        if after is None:
+            return docs
+
+
+# ==================== Keyset pagination ====================
+
+def test_page_cursor_walks_ties_without_gaps_or_repeats(storage):
+    # Most rows share created_at: only the id tie-breaker separates them
+    docs = [{'id': f"a{i:02d}", 'user_id': 'u', 'status': 'active', 'created_at': '2026-10-01'} for i in range(10)]
+    docs += [{'id': 'b00', 'user_id': 'u', 'status': 'active', 'created_at': '2026-09-30'}]
+    docs += [{'id': 'c00', 'user_id': 'u', 'status': 'archived', 'created_at': '2026-10-02'}]
+    storage.assets.insert_many_sync(reversed(docs))
+
+    for limit in (1, 3, 4, 12, 50):
+        ids = [doc['id'] for doc in _all_pages(storage.assets, limit)]
+        assert ids == ['b00'] + [f"a{i:02d}" for i in range(10)] + ['c00']
+
+    ids = [doc['id'] for doc in _all_pages(storage.assets, 3, status='active')]
+    assert ids == ['b00'] + [f"a{i:02d}" for i in range(10)]
+
+
+def test_page_cursor_round_trip(storage):
+    storage.assets.insert_many_sync(
+        {'id': f"a{i}", 'status': 'active', 'created_at': '2026-10-01'} for i in range(5)
+    )
+    page, after = storage.assets.page_sync({}, 2, None)
+    assert [doc['id'] for doc in page] == ['a0', 'a1']
+    assert decode_cursor(encode_cursor(after)) == after == ('2026-10-01', 'a1')
+
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
+
+
+def test_count_by_groups_without_null_keys(storage):
+    storage.violations.insert_many_sync(_violation(i) for i in range(12))
+    storage.violations.insert_many_sync([_violation(99, listing={'id': 'x'})])
+
+    counts = storage.violations.count_by_sync(('platform', 'seller_id'), {'seller_id': NOT_NULL})
+    assert sum(counts.values()) == 12
+    assert counts[('ruten', 'seller0')] == 1 and counts[('shopee', 'seller0')] == 2
+    assert all(seller is not None for _, seller in counts)
+
+
+# ==================== Job queue leases ====================
+
+def _queue_scan(storage, scan_id, user_id='user-1', created_at='2026-10-01T00:00:00'):
+    storage.scans.insert_many_sync([{
+        'id': scan_id, 'user_id': user_id, 'status': QUEUED, 'created_at': created_at, 'lease_until': None
+    }])
+
+
+def test_claim_takes_oldest_and_respects_user_cap(storage):
+    queue = storage.scan_queue
+    _queue_scan(storage, 's2', created_at='2026-10-02')
+    _queue_scan(storage, 's1', created_at='2026-10-01')
+    _queue_scan(storage, 's3', user_id='user-2', created_at='2026-10-03')
+
+    first = queue.claim_sync('w1', max_per_user=1)
+    assert first['id'] == 's1' and first['status'] == RUNNING and first['attempts'] == 1
+    # user-1 is at its cap: the next claim skips s2
+    assert queue.claim_sync('w2', max_per_user=1)['id'] == 's3'
+    assert queue.claim_sync('w3', max_per_user=1) is None
+    assert queue.claim_sync('w3')['id'] == 's2'
+
+
+def test_requeue_expired_only_touches_lapsed_leases(storage):
+    queue = storage.scan_queue
+    _queue_scan(storage, 'live')
+    _queue_scan(storage, 'dead', created_at='2026-10-02')
+    queue.claim_sync('w1')
+    queue.claim_sync('w2')
+
+    assert queue.requeue_expired_sync() == 0
+
+    storage.scans.update_sync('dead', {'lease_until': time.time() - 1})
+    assert queue.requeue_expired_sync() == 1
+
+    dead = storage.scans.get_sync('dead')
+    assert dead['status'] == QUEUED and dead['worker_id'] is None and dead['lease_until'] is None
+    assert storage.scans.get_sync('live')['status'] == RUNNING
+
+
+def test_expired_lease_is_taken_over(storage):
+    queue = storage.scan_queue
+    _queue_scan(storage, 's1')
+    queue.claim_sync('w1')
+    assert queue.renew_sync('s1', 'w1')
+
+    storage.scans.update_sync('s1', {'lease_until': time.time() - 1})
+    queue.requeue_expired_sync()
+    job = queue.claim_sync('w2')
+    assert job['id'] == 's1' and job['attempts'] == 2
+
+    # The old worker lost the job: its writes are refused
+    assert not queue.renew_sync('s1', 'w1')
+    assert not queue.release_sync('s1', 'w1')
+    assert queue.finish_sync('s1', 'w1', {'status': 'completed'}) is None
+    assert not queue.fail_sync('s1', 'w1', 'boom')
+
+    assert queue.finish_sync('s1', 'w2', {'status': 'completed'})['status'] == 'completed'
+    assert storage.scans.get_sync('s1')['lease_until'] is None
+
+
+def test_cancel_is_compare_and_set(storage):
+    queue = storage.scan_queue
+    _queue_scan(storage, 'queued')
+    _queue_scan(storage, 'running', created_at='2026-09-01')
+    _queue_scan(storage, 'done', created_at='2026-10-05')
+    queue.claim_sync('w1')
+    storage.scans.update_sync('done', {'status': 'completed'})
+
+    assert queue.cancel_sync('queued', {'completed_at': 'now'})['status'] == CANCELLED
+    cancelled = queue.cancel_sync('running', {})
+    assert cancelled['status'] == CANCELLED and cancelled['worker_id'] is None
+    # The worker that held it can no longer finish it
+    assert queue.finish_sync('running', 'w1', {'status': 'completed'}) is None
+
+    assert queue.cancel_sync('done', {}) is None
+    assert queue.cancel_sync('queued', {}) is None
+    assert queue.cancel_sync('missing', {}) is None
+    assert storage.scans.get_sync('done')['status'] == 'completed'
+
+
+# ==================== Violation counters ====================
+
+def _recounted(storage):
+    storage.violation_stats.rebuild_sync()
+    return storage.violation_stats.summary_sync()
+
+
+def test_stats_follow_whitelist_case_and_delete(storage):
+    stats = storage.violation_stats
+    storage.violations.insert_many_sync(_violation(i) for i in range(6))
+
+    summary = stats.summary_sync()
+    assert (summary['total'], summary['pending'], summary['whitelisted']) == (6, 6, 0)
+    assert summary['by_platform'] == {'ruten': 2, 'shopee': 4}
+
+    storage.violations.update_sync('v001', {'is_whitelisted': True})
+    storage.violations.update_sync('v002', {'case_id': 'case-1'})
+    summary = stats.summary_sync()
+    assert (summary['total'], summary['pending'], summary['whitelisted']) == (6, 5, 1)
+
+    # Deleting a whitelisted violation takes it out of every counter
+    storage.violations.delete_sync('v001')
+    storage.violations.delete_sync('v000')
+    summary = stats.summary_sync()
+    assert (summary['total'], summary['pending'], summary['whitelisted']) == (4, 3, 0)
+    assert summary['by_platform'] == {'ruten': 1, 'shopee': 3}
+    assert summary == _recounted(storage)
+
+
+def test_stats_drop_emptied_rollups(storage):
+    storage.violations.insert_many_sync([_violation(0)])
+    storage.violations.delete_sync('v000')
+
+    summary = storage.violation_stats.summary_sync()
+    assert summary['total'] == 0
+    assert summary['by_platform'] == {} and summary['by_day'] == {} and summary['by_asset'] == {}
+
+
+def test_stats_roll_back_with_the_write(storage):
+    storage.violations.insert_many_sync([_violation(0)])
+
+    with pytest.raises(RuntimeError):
+        with storage.db.transaction() as conn:
+            storage.violations._update(conn, 'v000', {'is_whitelisted': True})
+            raise RuntimeError("abort")
+
+    summary = storage.violation_stats.summary_sync()
+    assert summary['whitelisted'] == 0
+    assert storage.violations.get_sync('v000')['is_whitelisted'] is False
+
+
+def test_stats_rebuilt_for_existing_database(tmp_path):
+    path = str(tmp_path / "old.db")
+    store = Storage(path)
+    store.violations.insert_many_sync(_violation(i) for i in range(4))
+    store.db.connect().execute("DELETE FROM violation_counters")
+    store.close()
+
+    store = Storage(path)
+    try:
+        assert store.violation_stats.summary_sync()['total'] == 4
+    finally:
+        store.close()
+
+
+def test_delete_where_is_bulk_and_keeps_counters(storage):
+    storage.violations.insert_many_sync(_violation(i) for i in range(6))
+    storage.violations.insert_many_sync([_violation(10, task_id='task-2')])
+
+    removed = storage.violations.delete_where_sync({'task_id': 'task-1', 'platform': 'shopee'})
+    assert removed == 4
+    assert storage.violations.count_sync({}) == 3
+    assert storage.violation_stats.summary_sync() == _recounted(storage)
+
+    with pytest.raises(ValueError):
+        storage.violations.delete_where_sync({})
@@ -0,0 +1,82 @@
+"""
+Listing store tests
+寫入緩衝：未寫入的資料可查詢、達 batch_size 或 flush_interval 才寫入、關閉時寫完
+"""
+import pytest
+
+from services.crawler.store import ListingStore
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "listings.db")
+
+
+def _put(store, item_id, image_hash='ff00', outcome=None, **fields):
+    store.put('shopee', item_id, f"https://img/{item_id}", image_hash, 'assets-1', outcome, **fields)
+
+
+def test_pending_rows_are_answered_without_a_write(store_path):
+    store = ListingStore(store_path, batch_size=10, flush_interval=3600)
+    _put(store, '1', outcome=[{'asset_id': 'a', 'score': 0.9}], last_seen=100)
+
+    stored = store.get('shopee', '1')
+    assert stored.image_url == 'https://img/1'
+    assert stored.last_seen == 100
+    assert stored.outcome == [{'asset_id': 'a', 'score': 0.9}]
+    assert store.commits == 0
+    assert store.get('ruten', '1') is None
+
+    # A second store on the same file does not see unflushed rows
+    other = ListingStore(store_path)
+    assert other.get('shopee', '1') is None
+    other.close()
+    store.close()
+
+
+def test_rows_are_written_once_batch_size_is_pending(store_path):
+    store = ListingStore(store_path, batch_size=3, flush_interval=3600)
+    _put(store, '1')
+    _put(store, '1', image_hash='0f0f')  # same listing: replaces the pending row
+    _put(store, '2')
+    assert store.commits == 0
+
+    _put(store, '3')
+    assert store.commits == 1
+
+    reader = ListingStore(store_path)
+    assert reader.get('shopee', '1').image_hash == '0f0f'
+    assert reader.get('shopee', '3') is not None
+    reader.close()
+    store.close()
+    assert store.commits == 1  # nothing left to write
+
+
+def test_rows_are_written_once_flush_interval_passes(store_path):
+    store = ListingStore(store_path, batch_size=100, flush_interval=0)
+    _put(store, '1')
+    assert store.commits == 1
+
+    store.flush_interval = 3600
+    _put(store, '1', outcome=[])
+    assert store.commits == 1
+    assert store.get('shopee', '1').outcome == []
+
+    store.flush()
+    assert store.commits == 2
+    store.flush()  # empty flush does not commit
+    assert store.commits == 2
+    store.close()
+
+
+def test_close_writes_pending_rows(store_path):
+    store = ListingStore(store_path, batch_size=100, flush_interval=3600)
+    _put(store, '1', image_hash=None)
+    store.close()
+    assert store.commits == 1
+
+    reader = ListingStore(store_path)
+    stored = reader.get('shopee', '1')
+    assert stored.image_hash is None and stored.outcome is None
+    assert stored.assets_key == 'assets-1'
+    reader.close()
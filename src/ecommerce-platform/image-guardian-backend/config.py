@@ -42,11 +42,27 @@ CRAWLER_CONFIG = {
     "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
 }
 
+# 圖片下載配置（完整掃描）
+DOWNLOAD_CONFIG = {
+    "max_concurrency": 32,        # 同時下載總數
+    "per_host_concurrency": 6,    # 單一 CDN 主機同時下載數
+    "max_bytes": 10 * 1024 * 1024,  # 單張圖片上限 10MB
+    "max_pixels": 40_000_000,     # 解碼後像素上限（防解壓縮炸彈）
+    "timeout": 30.0,              # 單次請求逾時（秒）
+    "fingerprint_workers": 4,     # 同時計算指紋的工作數
+}
+
 # 相似度配置
 SIMILARITY_CONFIG = {
     "phash_weight": 0.50,  # pHash 權重
     "orb_weight": 0.35,    # ORB 權重
     "color_weight": 0.15,  # 顏色直方圖權重
+    # 縮圖 pHash 初篩門檻（progressive 掃描，通過才下載原圖）；
+    # 完整比對達標的商品縮圖 pHash 最低約 59，門檻需低於此值才不漏報
+    "thumbnail_prescreen": 55,
+    # pHash 距離 <= 此值視為同一張圖（只比對一次）；64 bit 指紋的 3 bit 約 4.7%，
+    # backend 的 256 bit 指紋用 7 bit (約 2.7%)，刻意較嚴：合併的圖直接沿用代表圖的結果
+    "cluster_distance": 3,
     "thresholds": {
         "exact": 95,       # 完全相同
         "high": 80,        # 高度相似
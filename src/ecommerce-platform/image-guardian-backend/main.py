@@ -11,6 +11,8 @@ AI 自動檢舉系統後端 API
 import os
 import io
 import uuid
+import asyncio
+import hashlib
 from typing import List, Optional
 from datetime import datetime
 
@@ -21,10 +23,12 @@ from pydantic import BaseModel
 
 from config import (
     API_HOST, API_PORT, DEBUG, CORS_ORIGINS,
-    IMAGE_CONFIG, SIMILARITY_CONFIG
+    IMAGE_CONFIG, SIMILARITY_CONFIG, DOWNLOAD_CONFIG
 )
 from services.fingerprint import FingerprintService, ImageFingerprint, SimilarityResult
 from services.crawler import PlatformCrawler, ProductListing
+from services.downloader import ImageDownloader
+from services.image_cluster import ImageClusterIndex
 
 # Gemini Vision 服務（可選）
 gemini_service = None
@@ -587,6 +591,9 @@ class FullScanRequest(BaseModel):
     max_pages: int = 2
     similarity_threshold: float = 70.0
     use_ai_verification: bool = True
+    # 先比對縮圖，只下載候選商品的原圖（選用：初篩只看 pHash，只靠 ORB/顏色達標的商品會被略過）
+    progressive: bool = False
+    thumbnail_threshold: Optional[float] = None  # 縮圖 pHash 初篩門檻（預設見 SIMILARITY_CONFIG）
 
 
 @app.post("/api/crawler/search")
@@ -676,15 +683,14 @@ async def full_scan(request: FullScanRequest):
     完整掃描流程（推薦）
 
     1. 使用關鍵字搜尋或爬取指定網址
-    2. 下載商品圖片
-    3. 計算指紋並與原創圖片比對
+    2. 下載商品圖片，重複使用的圖片分群（每群只比對代表圖）
+       （progressive=true 時先下載縮圖以 pHash 初篩，通過者的原圖邊篩邊下載）
+    3. 計算完整指紋並與原創圖片比對
     4. 可疑案例 (>=70%) 使用 AI 複查
-    5. 回傳侵權商品列表（含購買網址）
+    5. 回傳侵權商品列表（含購買網址），代表圖的結果套用到同群商品
 
     這是一站式掃描，適合快速找出侵權商品
     """
-    import httpx
-
     # 驗證原創指紋存在
     if request.original_fingerprint_id not in fingerprints_db:
         raise HTTPException(
@@ -724,62 +730,191 @@ async def full_scan(request: FullScanRequest):
         "ai_verified": 0,
         "confirmed_infringements": 0
     }
+    original_bytes = fingerprints_db[request.original_fingerprint_id].get("image_bytes")
+
+    # 重複使用的縮圖分群：每群只比對代表圖，結果套用到所有成員
+    clusters = ImageClusterIndex(max_distance=SIMILARITY_CONFIG["cluster_distance"])
+    representative_results = {}
+
+    def joined_cluster(listing: ProductListing, image_bytes: bytes, phash: str) -> bool:
+        """True 表示已有相同（或近乎相同）的圖片在比對中，此商品沿用其結果"""
+        _, is_new = clusters.assign(listing, hashlib.sha1(image_bytes).hexdigest(), phash)
+        return not is_new
+
+    async def check_listing(listing: ProductListing, image_bytes: bytes):
+        """計算指紋並比對（CPU 工作在執行緒中進行，不阻塞下載）"""
+        try:
+            suspect_fp = await asyncio.to_thread(fingerprint_service.compute_fingerprint, image_bytes)
+            comparison = fingerprint_service.compare(original_fp, suspect_fp)
+
+            # 如果相似度達標
+            if comparison.overall < request.similarity_threshold:
+                return
+            scan_summary["fingerprint_matches"] += 1
+
+            result = {
+                "listing": listing.to_dict(),
+                "fingerprint_similarity": comparison.to_dict(),
+                "ai_verification": None,
+                "is_confirmed_infringement": False
+            }
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        for listing in all_listings:
-            if not listing.image_url:
-                continue
+            # AI 複查
+            if request.use_ai_verification and GEMINI_AVAILABLE:
+                try:
+                    if original_bytes:
+                        ai_result = await asyncio.to_thread(gemini_service.compare_images, original_bytes, image_bytes)
+                        result["ai_verification"] = ai_result.to_dict()
+                        result["is_confirmed_infringement"] = ai_result.is_infringement
+                        scan_summary["ai_verified"] += 1
+
+                        if ai_result.is_infringement:
+                            scan_summary["confirmed_infringements"] += 1
+                except Exception:
+                    # AI 失敗時以指紋為準
+                    if comparison.overall >= 85:
+                        result["is_confirmed_infringement"] = True
+                        scan_summary["confirmed_infringements"] += 1
+            elif comparison.overall >= 85:
+                result["is_confirmed_infringement"] = True
+                scan_summary["confirmed_infringements"] += 1
+
+            infringement_results.append(result)
+            representative_results[id(listing)] = result
+
+        except Exception:
+            pass  # 跳過無法處理的圖片
+
+    # 下載池依完成順序交出圖片，指紋工作數有上限
+    downloader = ImageDownloader(
+        max_concurrency=DOWNLOAD_CONFIG["max_concurrency"],
+        per_host_concurrency=DOWNLOAD_CONFIG["per_host_concurrency"],
+        max_bytes=DOWNLOAD_CONFIG["max_bytes"],
+        max_pixels=DOWNLOAD_CONFIG["max_pixels"],
+        timeout=DOWNLOAD_CONFIG["timeout"],
+        headers={"User-Agent": platform_crawler.headers["User-Agent"]},
+        transport=platform_crawler.transport,
+    )
+    fingerprint_slots = asyncio.Semaphore(DOWNLOAD_CONFIG["fingerprint_workers"])
 
-            scan_summary["total_scanned"] += 1
+    async def process(downloads, handler):
+        """依完成順序處理下載結果；工作已滿時暫停取用，下載池隨之減速"""
+        workers = set()
 
+        async def run(listing: ProductListing, image_bytes: bytes):
             try:
-                # 下載圖片
-                img_response = await client.get(listing.image_url)
-                if img_response.status_code != 200:
+                await handler(listing, image_bytes)
+            finally:
+                fingerprint_slots.release()
+
+        try:
+            async for listing, image_bytes in downloads:
+                if image_bytes is None:
                     continue
+                await fingerprint_slots.acquire()
+                worker = asyncio.create_task(run(listing, image_bytes))
+                workers.add(worker)
+                worker.add_done_callback(workers.discard)
+            await asyncio.gather(*list(workers))
+        finally:
+            for worker in list(workers):
+                worker.cancel()
+
+    if request.progressive:
+        # 漸進式：先下載縮圖算 pHash，只有通過初篩的商品才下載原圖做完整比對
+        thumbnail_threshold = (
+            request.thumbnail_threshold
+            if request.thumbnail_threshold is not None
+            else SIMILARITY_CONFIG["thumbnail_prescreen"]
+        )
+        # 通過初篩的商品立即排入原圖下載，不等所有縮圖處理完
+        candidates: asyncio.Queue = asyncio.Queue()
+        full_images_fetched = 0
+        full_downloader = ImageDownloader(
+            max_concurrency=DOWNLOAD_CONFIG["max_concurrency"],
+            per_host_concurrency=DOWNLOAD_CONFIG["per_host_concurrency"],
+            max_bytes=DOWNLOAD_CONFIG["max_bytes"],
+            max_pixels=DOWNLOAD_CONFIG["max_pixels"],
+            timeout=DOWNLOAD_CONFIG["timeout"],
+            headers={"User-Agent": platform_crawler.headers["User-Agent"]},
+            transport=platform_crawler.transport,
+        )
 
-                image_bytes = img_response.content
-
-                # 計算指紋並比對
-                suspect_fp = fingerprint_service.compute_fingerprint(image_bytes)
-                comparison = fingerprint_service.compare(original_fp, suspect_fp)
-
-                # 如果相似度達標
-                if comparison.overall >= request.similarity_threshold:
-                    scan_summary["fingerprint_matches"] += 1
-
-                    result = {
-                        "listing": listing.to_dict(),
-                        "fingerprint_similarity": comparison.to_dict(),
-                        "ai_verification": None,
-                        "is_confirmed_infringement": False
-                    }
-
-                    # AI 複查
-                    if request.use_ai_verification and GEMINI_AVAILABLE:
-                        try:
-                            original_bytes = fingerprints_db[request.original_fingerprint_id].get("image_bytes")
-                            if original_bytes:
-                                ai_result = gemini_service.compare_images(original_bytes, image_bytes)
-                                result["ai_verification"] = ai_result.to_dict()
-                                result["is_confirmed_infringement"] = ai_result.is_infringement
-                                scan_summary["ai_verified"] += 1
-
-                                if ai_result.is_infringement:
-                                    scan_summary["confirmed_infringements"] += 1
-                        except Exception:
-                            # AI 失敗時以指紋為準
-                            if comparison.overall >= 85:
-                                result["is_confirmed_infringement"] = True
-                                scan_summary["confirmed_infringements"] += 1
-                    elif comparison.overall >= 85:
-                        result["is_confirmed_infringement"] = True
-                        scan_summary["confirmed_infringements"] += 1
+        async def candidate_listings():
+            while True:
+                listing = await candidates.get()
+                if listing is None:
+                    return
+                yield listing
 
-                    infringement_results.append(result)
+        def thumbnail_of(listing: ProductListing) -> str:
+            return listing.thumbnail_url or listing.image_url
 
-            except Exception as e:
-                continue  # 跳過無法處理的圖片
+        async def screen_thumbnail(listing: ProductListing, thumbnail_bytes: bytes):
+            try:
+                phash = await asyncio.to_thread(fingerprint_service.compute_phash, thumbnail_bytes)
+            except Exception:
+                return
+            if joined_cluster(listing, thumbnail_bytes, phash):
+                return
+            score = fingerprint_service.phash_similarity(original_fp.phash, phash)
+            if score < thumbnail_threshold:
+                return
+            if not listing.image_url or listing.image_url == thumbnail_of(listing):
+                # 縮圖即原圖（例如露天），不需再下載
+                await check_listing(listing, thumbnail_bytes)
+            else:
+                nonlocal full_images_fetched
+                full_images_fetched += 1
+                candidates.put_nowait(listing)
+
+        full_images = asyncio.create_task(
+            process(full_downloader.stream(candidate_listings(), key=lambda l: l.image_url), check_listing)
+        )
+        try:
+            await process(downloader.stream(all_listings, key=thumbnail_of), screen_thumbnail)
+        finally:
+            candidates.put_nowait(None)
+        await full_images
+        scan_summary["total_scanned"] = downloader.stats.requested
+        scan_summary["progressive"] = {
+            "thumbnail_threshold": thumbnail_threshold,
+            "full_images_fetched": full_images_fetched,
+            "thumbnail_bytes": downloader.stats.bytes_downloaded,
+            "full_image_bytes": full_downloader.stats.bytes_downloaded,
+            "full_image_download": full_downloader.stats.to_dict(),
+        }
+    else:
+        async def check_full_image(listing: ProductListing, image_bytes: bytes):
+            try:
+                phash = await asyncio.to_thread(fingerprint_service.compute_phash, image_bytes)
+            except Exception:
+                return
+            if not joined_cluster(listing, image_bytes, phash):
+                await check_listing(listing, image_bytes)
+
+        await process(downloader.stream(all_listings, key=lambda l: l.image_url), check_full_image)
+        scan_summary["total_scanned"] = downloader.stats.requested
+
+    scan_summary["download"] = downloader.stats.to_dict()
+
+    # 將代表圖的結果套用到同群成員
+    for cluster in clusters.clusters:
+        result = representative_results.get(id(cluster.representative))
+        if result is None or not cluster.members:
+            continue
+        cluster_info = {"size": cluster.size, "representative": cluster.representative.listing_id}
+        result["cluster"] = cluster_info
+        for member in cluster.members:
+            # 每個成員各自一份結果，之後修改某一筆不會影響代表圖或其他成員
+            member_result = dict(result)
+            member_result["listing"] = member.to_dict()
+            member_result["cluster"] = dict(cluster_info)
+            infringement_results.append(member_result)
+            scan_summary["fingerprint_matches"] += 1
+            if result["is_confirmed_infringement"]:
+                scan_summary["confirmed_infringements"] += 1
+    scan_summary["clusters"] = clusters.stats()
 
     # 按相似度排序
     infringement_results.sort(
@@ -14,19 +14,33 @@
 
 import os
 import re
+import sys
+import time
 import json
 import asyncio
 import httpx
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from urllib.parse import urlparse, urlencode, quote
 import random
+from html import unescape
 
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # orjson 為選用套件，未安裝時使用標準庫
+    json_loads = json.loads
 
-@dataclass
+
+@dataclass(slots=True)
 class ProductListing:
-    """商品資訊"""
+    """
+    商品資訊
+
+    使用 __slots__ 並將平台、賣家字串 intern，
+    crawled_at 存 epoch 秒數，to_dict() 時才轉成 ISO 字串
+    """
     listing_id: str
     platform: str
     title: str
@@ -42,10 +56,96 @@ class ProductListing:
     rating: float = 0
     review_count: int = 0
     location: str = ""
-    crawled_at: str = ""
+    crawled_at: int = 0
+
+    def __post_init__(self):
+        self.platform = _intern(self.platform)
+        self.currency = _intern(self.currency)
+        self.seller_name = _intern(self.seller_name)
+        self.seller_id = _intern(self.seller_id)
+        self.location = _intern(self.location)
 
     def to_dict(self) -> dict:
-        return asdict(self)
+        data = asdict(self)
+        data["crawled_at"] = datetime.fromtimestamp(self.crawled_at).isoformat() if self.crawled_at else ""
+        return data
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def decode_shopee_items(payload: bytes, item_key: Optional[str] = None) -> List[dict]:
+    """
+    解碼蝦皮 API 回應，只取出商品資料
+
+    Args:
+        payload: 原始回應內容 (bytes)
+        item_key: 商品資料所在的欄位 (搜尋 API 為 "item_basic")
+
+    Returns:
+        商品資料 dict 列表
+    """
+    data = json_loads(payload)
+    items = data.get("items") or []
+    if item_key:
+        return [item.get(item_key) or {} for item in items]
+    return items
+
+
+class RutenListingParser:
+    """
+    露天商品列表解析器 (搜尋頁與店舖頁共用)
+    與 backend/services/crawler/parsing.py 的 RutenListingParser 保持完全相同
+
+    以 data-gno 屬性切出每張商品卡 (最多 CARD_LIMIT 字元)，再對每張卡套用一個
+    預先編譯的正則：第一張圖片、之後第一個商品連結的文字 (標題)、之後第一個 $價格
+    ($ 與數字可分屬不同標籤)、之後指向賣場 (index00.php?s=) 的連結 (賣家帳號，
+    沒有時為空字串)。每段只用 possessive 重複，不回溯；比對範圍以 pos/endpos
+    限制在單張卡內，整頁為線性時間。
+    """
+
+    # Longest card markup looked at: a card without a price cannot drag the match across the page
+    CARD_LIMIT = 8192
+
+    GNO_PATTERN = re.compile(r'data-gno="?(\d+)')
+    CARD_PATTERN = re.compile(
+        r'[^<]*+(?:<(?!img\b)[^<]*+)*+'
+        r'<img\b[^>]*?\ssrc="([^"]+)"[^>]*>'
+        r'[^<]*+(?:<(?!a\b)[^<]*+|<a\b[^>]*index00\.php[^<]*+)*+'
+        r'<a\b[^>]*?\shref="[^"]*"[^>]*>([^<]*+(?:<(?!/a>)[^<]*+)*+)</a>'
+        r'[^$]*+(?:\$(?!(?:<[^>]*>|\s)*\d)[^$]*+)*+\$(?:<[^>]*>|\s)*+(\d+(?:,\d+)*)'
+        r'(?:[^<]*+(?:<(?!a\b)[^<]*+)*+<a\b[^>]*index00\.php\?(?:[^&"\'>]*&(?:amp;)?)*?s=([^&"\'\s>]+))?'
+    )
+    SELLER_PATTERN = re.compile(r'index00\.php\?(?:[^&"\'>]*&(?:amp;)?)*?s=([^&"\'\s>]+)')
+    TAG_PATTERN = re.compile(r'<[^>]*>')
+
+    @classmethod
+    def parse(cls, html: str) -> List[Tuple[str, str, str, str, str]]:
+        """Return (item_id, image_url, title, price, seller_id) tuples"""
+        bounds = [(match.end(), match.group(1)) for match in cls.GNO_PATTERN.finditer(html)]
+        bounds.append((len(html), None))
+        items = []
+        for (start, item_id), (next_start, _) in zip(bounds, bounds[1:]):
+            end = min(next_start, start + cls.CARD_LIMIT)
+            match = cls.CARD_PATTERN.match(html, start, end)
+            if match is None:
+                continue
+            image_url, title, price, seller_id = match.groups()
+            if '<' in title:
+                title = cls.TAG_PATTERN.sub('', title)
+            if '&' in title:
+                title = unescape(title)
+            title = title.strip()
+            if not title:
+                continue
+            if seller_id is None:
+                # Seller link placed before the title link
+                seller = cls.SELLER_PATTERN.search(html, start, match.start(2))
+                seller_id = seller.group(1) if seller else ''
+            items.append((item_id, image_url, title, price, seller_id))
+
+        return items
 
 
 class PlatformCrawler:
@@ -58,13 +158,21 @@ class PlatformCrawler:
     - 指定網址爬取
     """
 
-    def __init__(self):
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Args:
+            transport: 自訂 HTTP 傳輸層 (錄製/重播、本地替身伺服器)，None 表示連線真實網站
+        """
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Accept": "application/json, text/plain, */*",
             "Accept-Language": "zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7",
         }
         self.timeout = 30.0
+        self.transport = transport
+
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(headers=self.headers, timeout=self.timeout, transport=self.transport)
 
     # ==================== 蝦皮 (Shopee) ====================
 
@@ -89,7 +197,7 @@ class PlatformCrawler:
         """
         results = []
 
-        async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout) as client:
+        async with self._client() as client:
             for page in range(max_pages):
                 try:
                     # 蝦皮搜尋 API
@@ -116,15 +224,14 @@ class PlatformCrawler:
                         print(f"蝦皮搜尋失敗: {response.status_code}")
                         continue
 
-                    data = response.json()
-                    items = data.get("items", [])
+                    items = decode_shopee_items(response.content, item_key="item_basic")
 
                     if not items:
                         break
 
-                    for item in items:
-                        item_basic = item.get("item_basic", {})
-                        listing = self._parse_shopee_item(item_basic)
+                    crawled_at = int(time.time())
+                    for item_basic in items:
+                        listing = self._parse_shopee_item(item_basic, crawled_at)
                         if listing:
                             results.append(listing)
 
@@ -160,7 +267,7 @@ class PlatformCrawler:
             print(f"無法解析店舖 ID: {shop_url}")
             return results
 
-        async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout) as client:
+        async with self._client() as client:
             offset = 0
             limit = 30
 
@@ -173,14 +280,14 @@ class PlatformCrawler:
                     if response.status_code != 200:
                         break
 
-                    data = response.json()
-                    items = data.get("items", [])
+                    items = decode_shopee_items(response.content)
 
                     if not items:
                         break
 
+                    crawled_at = int(time.time())
                     for item in items:
-                        listing = self._parse_shopee_item(item)
+                        listing = self._parse_shopee_item(item, crawled_at)
                         if listing:
                             results.append(listing)
 
@@ -210,7 +317,7 @@ class PlatformCrawler:
 
         shop_id, item_id = match.groups()
 
-        async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout) as client:
+        async with self._client() as client:
             try:
                 url = f"https://shopee.tw/api/v4/item/get?itemid={item_id}&shopid={shop_id}"
                 response = await client.get(url)
@@ -218,8 +325,8 @@ class PlatformCrawler:
                 if response.status_code != 200:
                     return None
 
-                data = response.json()
-                item = data.get("data", {})
+                data = json_loads(response.content)
+                item = data.get("data") or {}
 
                 return self._parse_shopee_item(item)
 
@@ -227,46 +334,56 @@ class PlatformCrawler:
                 print(f"蝦皮商品爬取錯誤: {e}")
                 return None
 
-    def _parse_shopee_item(self, item: dict) -> Optional[ProductListing]:
-        """解析蝦皮商品資料"""
+    def _parse_shopee_item(self, item: dict, crawled_at: Optional[int] = None) -> Optional[ProductListing]:
+        """
+        解析蝦皮商品資料
+
+        只讀取需要的欄位；同一頁的商品共用 crawled_at，不必逐筆取時間
+        """
         try:
-            item_id = str(item.get("itemid", ""))
-            shop_id = str(item.get("shopid", ""))
+            get = item.get
+            item_id = get("itemid")
+            shop_id = get("shopid")
 
             if not item_id or not shop_id:
                 return None
 
+            item_id = str(item_id)
+            shop_id = str(shop_id)
+
             # 圖片 URL
-            image_hash = item.get("image", "")
+            image_hash = get("image") or ""
             if not image_hash:
-                images = item.get("images", [])
+                images = get("images")
                 image_hash = images[0] if images else ""
 
             image_url = f"https://down-tw.img.susercontent.com/file/{image_hash}" if image_hash else ""
-            thumbnail_url = f"https://down-tw.img.susercontent.com/file/{image_hash}_tn" if image_hash else ""
+            thumbnail_url = f"{image_url}_tn" if image_hash else ""
 
             # 價格處理
-            price = item.get("price", 0)
+            price = get("price") or 0
             if isinstance(price, int) and price > 100000:
                 price = price / 100000  # 蝦皮價格單位轉換
 
+            rating = get("item_rating")
+
             return ProductListing(
                 listing_id=item_id,
                 platform="shopee",
-                title=item.get("name", ""),
+                title=get("name") or "",
                 price=float(price),
                 currency="TWD",
                 url=f"https://shopee.tw/product/{shop_id}/{item_id}",
                 image_url=image_url,
                 thumbnail_url=thumbnail_url,
-                seller_name=item.get("shop_name", "") or item.get("shopee_verified", ""),
+                seller_name=get("shop_name") or get("shopee_verified") or "",
                 seller_id=shop_id,
                 seller_url=f"https://shopee.tw/shop/{shop_id}",
-                sales_count=item.get("sold", 0) or item.get("historical_sold", 0),
-                rating=item.get("item_rating", {}).get("rating_star", 0),
-                review_count=item.get("cmt_count", 0),
-                location=item.get("shop_location", ""),
-                crawled_at=datetime.now().isoformat()
+                sales_count=get("sold") or get("historical_sold") or 0,
+                rating=rating.get("rating_star", 0) if rating else 0,
+                review_count=get("cmt_count") or 0,
+                location=get("shop_location") or "",
+                crawled_at=crawled_at or int(time.time())
             )
 
         except Exception as e:
@@ -303,7 +420,7 @@ class PlatformCrawler:
         """
         results = []
 
-        async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout) as client:
+        async with self._client() as client:
             for page in range(1, max_pages + 1):
                 try:
                     # 露天搜尋頁面
@@ -353,7 +470,7 @@ class PlatformCrawler:
 
         seller_id = match.group(1)
 
-        async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout) as client:
+        async with self._client() as client:
             page = 1
             while len(results) < max_items:
                 try:
@@ -380,34 +497,33 @@ class PlatformCrawler:
 
         return results[:max_items]
 
-    def _parse_ruten_search_html(self, html: str) -> List[ProductListing]:
-        """解析露天搜尋結果 HTML"""
+    def _parse_ruten_search_html(self, html: str, seller_id: str = "") -> List[ProductListing]:
+        """解析露天搜尋結果 HTML (seller_id: 商品卡沒有賣場連結時使用)"""
         results = []
+        crawled_at = int(time.time())
 
-        # 使用正則提取商品 (簡化版)
-        # 實際應使用 BeautifulSoup
-        pattern = r'data-gno="(\d+)".*?<img[^>]*src="([^"]+)".*?<a[^>]*href="([^"]+)"[^>]*>([^<]+)</a>.*?\$(\d+(?:,\d+)?)'
-
-        matches = re.findall(pattern, html, re.DOTALL)
+        # 每張商品卡以 data-gno 為界，避免跨整頁的 .*? 正則大量回溯
+        matches = RutenListingParser.parse(html)
 
         for match in matches:
             try:
-                item_id, image_url, url, title, price = match
+                item_id, image_url, title, price, card_seller_id = match
                 price = float(price.replace(',', ''))
+                card_seller_id = card_seller_id or seller_id
 
                 results.append(ProductListing(
                     listing_id=item_id,
                     platform="ruten",
-                    title=title.strip(),
+                    title=title,
                     price=price,
                     currency="TWD",
                     url=f"https://www.ruten.com.tw/item/show?{item_id}",
                     image_url=image_url,
                     thumbnail_url=image_url,
                     seller_name="",
-                    seller_id="",
-                    seller_url="",
-                    crawled_at=datetime.now().isoformat()
+                    seller_id=card_seller_id,
+                    seller_url=f"https://class.ruten.com.tw/user/index00.php?s={card_seller_id}" if card_seller_id else "",
+                    crawled_at=crawled_at
                 ))
             except:
                 continue
@@ -416,8 +532,8 @@ class PlatformCrawler:
 
     def _parse_ruten_shop_html(self, html: str, seller_id: str) -> List[ProductListing]:
         """解析露天店舖頁面 HTML"""
-        # 類似 search 的解析邏輯
-        return self._parse_ruten_search_html(html)
+        # 與搜尋頁相同的商品卡，賣家為此店舖
+        return self._parse_ruten_search_html(html, seller_id)
 
     # ==================== 通用方法 ====================
 
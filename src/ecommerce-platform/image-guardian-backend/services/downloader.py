@@ -0,0 +1,209 @@
+"""
+圖片下載池 - 有上限的並行下載
+
+核心功能：
+1. 全域並行數上限 + 每個 CDN 主機的並行數上限（避免單一主機被打爆或封鎖）
+2. 串流下載，超過大小上限立即中止；先讀檔頭判斷格式與像素尺寸，
+   非圖片或解壓縮炸彈（小檔案、超大像素）在讀完前就中止
+3. 依完成順序回傳結果，下游（指紋計算）不必等整批下載完
+4. 尚未被取走的結果數量有上限，記憶體用量固定
+
+使用方式：
+    from services.downloader import ImageDownloader
+
+    downloader = ImageDownloader(max_concurrency=32, per_host_concurrency=6)
+    async for listing, image_bytes in downloader.stream(listings, key=lambda l: l.image_url):
+        ...
+"""
+
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Optional, Tuple, TypeVar, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+from .image_sniff import SNIFF_LIMIT, ImageRejected, check_image_bytes, check_info, sniff_image
+
+
+T = TypeVar("T")
+
+
+@dataclass
+class DownloadStats:
+    """下載統計"""
+    requested: int = 0
+    downloaded: int = 0
+    failed: int = 0
+    too_large: int = 0
+    rejected: int = 0   # 非圖片或像素超過上限
+    bytes_downloaded: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class ImageTooLarge(ImageRejected):
+    """圖片超過大小上限"""
+
+
+class ImageDownloader:
+    """
+    有上限的並行圖片下載池
+
+    Args:
+        max_concurrency: 同時進行的下載總數
+        per_host_concurrency: 單一主機同時進行的下載數
+        max_bytes: 單張圖片大小上限（超過即中止下載）
+        max_pixels: 解碼後像素上限（寬 × 高）
+        timeout: 單次請求逾時（秒）
+        max_pending: 已排程但尚未被取走的下載數上限（預設為 max_concurrency 的 4 倍）
+        headers: 請求標頭
+        transport: 自訂 HTTP 傳輸層（錄製/重播、本地替身伺服器）
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 32,
+        per_host_concurrency: int = 6,
+        max_bytes: int = 10 * 1024 * 1024,
+        max_pixels: int = 40_000_000,
+        timeout: float = 30.0,
+        max_pending: Optional[int] = None,
+        headers: Optional[Dict[str, str]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+        self.timeout = timeout
+        self.max_pending = max_pending or max_concurrency * 4
+        self.headers = headers or {}
+        self.transport = transport
+        self.stats = DownloadStats()
+
+    async def fetch(self, client: httpx.AsyncClient, url: str) -> Optional[bytes]:
+        """串流下載單張圖片；失敗、超過上限或不是圖片時回傳 None"""
+        try:
+            async with client.stream("GET", url) as response:
+                if response.status_code != 200:
+                    self.stats.failed += 1
+                    return None
+
+                content_type = response.headers.get("content-type", "")
+                if content_type.startswith(("text/", "application/json")):
+                    raise ImageRejected(f"content type {content_type}")
+
+                declared = response.headers.get("content-length")
+                if declared and declared.isdigit() and int(declared) > self.max_bytes:
+                    raise ImageTooLarge(url)
+
+                buffer = bytearray()
+                info = None
+                sniffing = True
+                async for chunk in response.aiter_bytes():
+                    buffer += chunk
+                    if len(buffer) > self.max_bytes:
+                        raise ImageTooLarge(url)
+                    if sniffing:
+                        # 檔頭一到就檢查格式與像素尺寸
+                        info = sniff_image(bytes(buffer[:SNIFF_LIMIT]))
+                        if info is not None:
+                            check_info(info, self.max_pixels)
+                        # 支援的格式但尺寸不在前 SNIFF_LIMIT 位元組內 (例如 EXIF 很大的 JPEG)：下載完再檢查
+                        sniffing = info is None and len(buffer) < SNIFF_LIMIT
+
+            if info is None:
+                check_image_bytes(bytes(buffer), self.max_pixels)
+
+            self.stats.downloaded += 1
+            self.stats.bytes_downloaded += len(buffer)
+            return bytes(buffer)
+
+        except ImageTooLarge:
+            self.stats.too_large += 1
+            return None
+        except ImageRejected:
+            self.stats.rejected += 1
+            return None
+        except Exception:
+            self.stats.failed += 1
+            return None
+
+    async def stream(
+        self,
+        items: Union[Iterable[T], AsyncIterable[T]],
+        key: Callable[[T], Optional[str]] = lambda item: item,
+    ) -> AsyncIterator[Tuple[T, Optional[bytes]]]:
+        """
+        下載所有項目的圖片，依完成順序產出 (item, image_bytes)
+
+        key 取出項目的圖片網址；沒有網址的項目會被略過。
+        下載失敗的項目也會產出，image_bytes 為 None。
+        items 也可以是非同步迭代器（例如上游邊篩選邊產生的項目），項目一到就開始下載。
+        """
+        host_limits: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.per_host_concurrency)
+        )
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        pending = asyncio.Semaphore(self.max_pending)
+        results: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async with httpx.AsyncClient(
+            headers=self.headers,
+            timeout=self.timeout,
+            transport=self.transport,
+            limits=httpx.Limits(max_connections=self.max_concurrency),
+        ) as client:
+
+            async def download(item, url: str):
+                try:
+                    async with host_limits[urlsplit(url).netloc]:
+                        async with global_limit:
+                            data = await self.fetch(client, url)
+                except Exception:
+                    data = None
+                await results.put((item, data))
+
+            tasks = set()
+
+            async def schedule(item):
+                url = key(item)
+                if not url:
+                    return
+                await pending.acquire()
+                self.stats.requested += 1
+                task = asyncio.create_task(download(item, url))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            async def feed():
+                try:
+                    if hasattr(items, "__aiter__"):
+                        async for item in items:
+                            await schedule(item)
+                    else:
+                        for item in items:
+                            await schedule(item)
+                    await asyncio.gather(*list(tasks))
+                finally:
+                    await results.put(done)
+
+            feeder = asyncio.create_task(feed())
+            try:
+                while True:
+                    result = await results.get()
+                    if result is done:
+                        break
+                    pending.release()
+                    yield result
+            finally:
+                # Consumer stopped early: downloads must not outlive the client
+                feeder.cancel()
+                outstanding = list(tasks)
+                for task in outstanding:
+                    task.cancel()
+                await asyncio.gather(feeder, *outstanding, return_exceptions=True)
@@ -25,6 +25,8 @@ from dataclasses import dataclass, asdict
 import base64
 import io
 
+from .image_sniff import check_image_bytes
+
 
 @dataclass
 class ImageFingerprint:
@@ -120,6 +122,7 @@ class FingerprintService:
             pil_image = Image.open(image_source)
             cv_image = cv2.imread(image_source)
         elif isinstance(image_source, bytes):
+            check_image_bytes(image_source)
             pil_image = Image.open(io.BytesIO(image_source))
             nparr = np.frombuffer(image_source, np.uint8)
             cv_image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
@@ -158,6 +161,28 @@ class FingerprintService:
             height=height
         )
 
+    def compute_phash(self, image_source) -> str:
+        """
+        只計算 pHash（用於縮圖初篩，不做 ORB 與顏色直方圖）
+
+        Args:
+            image_source: 圖片路徑 (str) 或 PIL Image 或 bytes
+
+        Returns:
+            pHash 字串
+        """
+        if isinstance(image_source, bytes):
+            check_image_bytes(image_source)
+            image_source = Image.open(io.BytesIO(image_source))
+        elif isinstance(image_source, str):
+            image_source = Image.open(image_source)
+
+        return str(imagehash.phash(image_source, hash_size=self.hash_size))
+
+    def phash_similarity(self, hash1: str, hash2: str) -> float:
+        """pHash 相似度分數 (0-100)，與 compare() 的 phash_score 相同算法"""
+        return max(0, 100 - (self._hamming_distance(hash1, hash2) * 100 / 64))
+
     def compare(self, fp1: ImageFingerprint, fp2: ImageFingerprint) -> SimilarityResult:
         """
         比對兩個圖片指紋的相似度
@@ -0,0 +1,91 @@
+"""
+圖片分群 - 以內容雜湊與近似 pHash 將重複使用的縮圖分群
+
+轉賣賣家常在多個商品、多個店舖使用同一張縮圖。
+每群只比對代表圖（含 Gemini 複查），結果套用到所有成員。
+
+近似判定：與代表圖的 pHash 漢明距離 <= max_distance。
+pHash 切成 max_distance + 1 段，距離這麼近的兩個 hash 至少有一段完全相同，
+因此只需檢查共用某一段的群集。
+
+使用方式：
+    from services.image_cluster import ImageClusterIndex
+
+    index = ImageClusterIndex(max_distance=3)
+    cluster, is_new = index.assign(listing, hashlib.sha1(image_bytes).hexdigest(), phash)
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass
+class ImageCluster:
+    """同一張（或近乎相同）圖片的商品"""
+    representative: Any
+    phash: str
+    members: List[Any] = field(default_factory=list)   # 不含代表
+    exact: int = 0
+    near: int = 0
+
+    @property
+    def size(self) -> int:
+        return 1 + len(self.members)
+
+
+class ImageClusterIndex:
+    """依內容雜湊與近似 pHash 分群"""
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.clusters: List[ImageCluster] = []
+        self._by_digest: Dict[str, ImageCluster] = {}
+        self._by_band: Dict[Tuple[int, str], List[ImageCluster]] = {}
+
+    def _band_keys(self, phash: str) -> List[Tuple[int, str]]:
+        width = max(1, len(phash) // self.bands)
+        return [(band, phash[band * width:(band + 1) * width]) for band in range(self.bands)]
+
+    def assign(self, item: Any, digest: Optional[str], phash: str) -> Tuple[ImageCluster, bool]:
+        """
+        將項目放入群集
+
+        Returns:
+            (cluster, is_new)，is_new 為 True 表示此項目成為新群集的代表
+        """
+        cluster = self._by_digest.get(digest) if digest else None
+        if cluster is not None:
+            cluster.members.append(item)
+            cluster.exact += 1
+            return cluster, False
+
+        value = int(phash, 16)
+        band_keys = self._band_keys(phash)
+        for key in band_keys:
+            for cluster in self._by_band.get(key, ()):
+                if (value ^ int(cluster.phash, 16)).bit_count() <= self.max_distance:
+                    cluster.members.append(item)
+                    cluster.near += 1
+                    if digest:
+                        self._by_digest[digest] = cluster
+                    return cluster, False
+
+        cluster = ImageCluster(representative=item, phash=phash)
+        self.clusters.append(cluster)
+        if digest:
+            self._by_digest[digest] = cluster
+        for key in band_keys:
+            self._by_band.setdefault(key, []).append(cluster)
+        return cluster, True
+
+    def stats(self, top: int = 10) -> dict:
+        """群集統計（最大的 top 個群集大小）"""
+        sizes = sorted((cluster.size for cluster in self.clusters), reverse=True)
+        return {
+            "images": sum(sizes),
+            "clusters": len(self.clusters),
+            "merged_exact": sum(cluster.exact for cluster in self.clusters),
+            "merged_near": sum(cluster.near for cluster in self.clusters),
+            "largest": [size for size in sizes[:top] if size > 1],
+        }
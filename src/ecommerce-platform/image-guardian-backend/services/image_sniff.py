@@ -0,0 +1,158 @@
+"""
+圖片檔頭檢查 - 不解碼即可取得格式與像素尺寸
+
+用於串流下載時提早中止：非圖片、超過像素上限（解壓縮炸彈：檔案很小、解碼後極大）
+記憶體中的圖片 (上傳檔案) 格式不在下載支援清單內 (TIFF、ICO、HEIC 等)
+或尺寸不在前 SNIFF_LIMIT 位元組內時，改由 PIL 延遲開啟讀取尺寸 (只讀檔頭，不解碼)
+
+使用方式：
+    from services.image_sniff import sniff_image, check_image_bytes, ImageRejected
+
+    info = check_image_bytes(image_bytes, max_pixels=40_000_000)
+    print(info.format, info.width, info.height)
+"""
+
+import struct
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional
+
+from PIL import Image
+
+
+# 解碼後像素上限 (40MP，RGB 約 120MB)
+MAX_IMAGE_PIXELS = 40_000_000
+
+# 讀到這麼多位元組仍找不到尺寸即放棄
+SNIFF_LIMIT = 64 * 1024
+
+# JPEG SOF 標記（含尺寸）
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# 沒有長度欄位的 JPEG 標記
+_JPEG_STANDALONE = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+
+
+class ImageRejected(Exception):
+    """拒絕下載或解碼（過大、非圖片、解壓縮炸彈）"""
+
+
+@dataclass
+class ImageInfo:
+    """格式與像素尺寸 (由檔頭取得，不需解碼)"""
+    format: str
+    width: int
+    height: int
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+
+def sniff_image(header: bytes) -> Optional[ImageInfo]:
+    """
+    由圖片開頭的位元組讀取格式與尺寸
+
+    Returns:
+        ImageInfo，位元組不足時回傳 None
+
+    Raises:
+        ImageRejected: 不是支援的圖片格式
+    """
+    if len(header) < 12:
+        return None
+
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        if len(header) < 24:
+            return None
+        width, height = struct.unpack(">II", header[16:24])
+        return ImageInfo("png", width, height)
+
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        width, height = struct.unpack("<HH", header[6:10])
+        return ImageInfo("gif", width, height)
+
+    if header.startswith(b"\xff\xd8"):
+        return _sniff_jpeg(header)
+
+    if header.startswith(b"RIFF") and header[8:12] == b"WEBP":
+        return _sniff_webp(header)
+
+    if header.startswith(b"BM"):
+        if len(header) < 26:
+            return None
+        width, height = struct.unpack("<ii", header[18:26])
+        return ImageInfo("bmp", abs(width), abs(height))
+
+    raise ImageRejected("not a supported image format")
+
+
+def _sniff_jpeg(data: bytes) -> Optional[ImageInfo]:
+    i = 2
+    while True:
+        # 略過填充位元組
+        while i < len(data) and data[i] == 0xFF:
+            i += 1
+        if i >= len(data):
+            return None
+        marker = data[i]
+        i += 1
+        if marker in _JPEG_STANDALONE:
+            continue
+        if marker == 0xD9 or marker == 0xDA:
+            # 在 frame header 之前就結束或開始掃描資料
+            raise ImageRejected("JPEG without frame header")
+        if i + 2 > len(data):
+            return None
+        length = struct.unpack(">H", data[i:i + 2])[0]
+        if marker in _JPEG_SOF:
+            if i + 7 > len(data):
+                return None
+            height, width = struct.unpack(">HH", data[i + 3:i + 7])
+            return ImageInfo("jpeg", width, height)
+        i += length
+
+
+def _sniff_webp(data: bytes) -> Optional[ImageInfo]:
+    if len(data) < 30:
+        return None
+    chunk = data[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", data[26:30])
+        return ImageInfo("webp", width & 0x3FFF, height & 0x3FFF)
+    if chunk == b"VP8L":
+        b0, b1, b2, b3 = data[21:25]
+        width = 1 + (b0 | ((b1 & 0x3F) << 8))
+        height = 1 + ((b1 >> 6) | (b2 << 2) | ((b3 & 0x0F) << 10))
+        return ImageInfo("webp", width, height)
+    if chunk == b"VP8X":
+        width = 1 + int.from_bytes(data[24:27], "little")
+        height = 1 + int.from_bytes(data[27:30], "little")
+        return ImageInfo("webp", width, height)
+    raise ImageRejected("unknown WebP chunk")
+
+
+def check_info(info: ImageInfo, max_pixels: int) -> ImageInfo:
+    if info.width <= 0 or info.height <= 0:
+        raise ImageRejected(f"invalid dimensions {info.width}x{info.height}")
+    if info.pixels > max_pixels:
+        raise ImageRejected(f"{info.width}x{info.height} exceeds {max_pixels} pixels")
+    return info
+
+
+def check_image_bytes(data: bytes, max_pixels: int = MAX_IMAGE_PIXELS) -> ImageInfo:
+    """解碼前檢查記憶體中的圖片"""
+    try:
+        info = sniff_image(data[:SNIFF_LIMIT])
+    except ImageRejected:
+        info = None
+    if info is None:
+        # PIL 延遲開啟：只讀檔頭取得尺寸，不解碼像素
+        try:
+            with Image.open(BytesIO(data)) as image:
+                width, height = image.size
+                info = ImageInfo((image.format or "").lower(), width, height)
+        except Image.DecompressionBombError as e:
+            raise ImageRejected(str(e))
+        except (OSError, SyntaxError, ValueError) as e:
+            raise ImageRejected(f"not an image: {e}")
+    return check_info(info, max_pixels)
@@ -64,12 +64,42 @@ export interface ScanTaskResponse {
   completed_at?: string;
 }
 
+export interface ScanPlatformProgress {
+  searches_total: number;
+  searches_done: number;
+  listings: number;
+  percent: number;
+}
+
+export interface ScanTelemetry {
+  elapsed_seconds: number;
+  listings_per_sec: number;
+  listings_done_per_sec: number;
+  images_per_sec: number;
+  comparisons_per_sec: number;
+  bytes_per_sec: number;
+  listings: number;
+  listings_done: number;
+  expected_listings: number | null;
+  images_downloaded: number;
+  bytes_downloaded: number;
+  comparisons: number;
+  violations: number;
+  searches_done: number;
+  searches_total: number;
+  platforms: Record<string, ScanPlatformProgress>;
+  platforms_completed: string[];
+  eta_seconds: number | null;
+}
+
 export interface ScanProgress {
   task_id: string;
   progress: number;
   message: string;
   scanned: number;
   violations: number;
+  eta_seconds?: number | null;
+  telemetry?: ScanTelemetry;
 }
 
 export interface ViolationData {
@@ -247,7 +277,43 @@ class ImageGuardianApiClient {
     platforms_searched: string[];
     keywords_used: string[];
   }> {
-    return this.request(`/api/scans/${taskId}/results`);
+    const summary = await this.request<{
+      total_scanned: number;
+      violations_found: number;
+      platforms_searched: string[];
+      keywords_used: string[];
+    }>(`/api/scans/${taskId}/results`);
+
+    // 侵權商品分頁讀取（每頁最多 1000 筆）
+    const violations: ViolationData[] = [];
+    let cursor: string | null = null;
+    do {
+      const page = await this.getScanViolationsPage(taskId, cursor);
+      violations.push(...page.violations);
+      cursor = page.nextCursor;
+    } while (cursor);
+
+    return { ...summary, violations };
+  }
+
+  async getScanViolationsPage(
+    taskId: string,
+    cursor: string | null = null,
+    limit: number = 1000
+  ): Promise<{ violations: ViolationData[]; nextCursor: string | null }> {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (cursor) params.set('cursor', cursor);
+
+    const response = await fetch(`${this.baseUrl}/api/scans/${taskId}/results/violations?${params}`);
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ detail: response.statusText }));
+      throw new Error(error.detail || `API Error: ${response.status}`);
+    }
+
+    return {
+      violations: await response.json(),
+      nextCursor: response.headers.get('X-Next-Cursor'),
+    };
   }
 
   async cancelScan(taskId: string): Promise<{ message: string; id: string }> {